@@ -0,0 +1,102 @@
+"""Per-document PDF render time: add_font() on every document vs the cached engine
+
+    python benchmarks/bench_pdf.py --docs 30 --sections 3
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from io import BytesIO
+
+from fpdf import FPDF
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ink2deck.pdf_engine import render_pdf, unicode_font  # noqa: E402
+
+TEXT = (
+    "Lecture notes: café, naïve, Δx → 0, ∑ aᵢ ≤ ∞\n\n"
+    "Second slide — Ünïcödé survives the round trip\n\n"
+    "Third slide: 1 + 1 = 2"
+)
+
+
+def synthetic_photo(index, width=1600, height=1200):
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    for line in range(6):
+        draw.text((60, 80 + line * 150), f"Board {index} line {line}", fill="black")
+    stream = BytesIO()
+    image.save(stream, format="JPEG", quality=85)
+    return stream.getvalue()
+
+
+def render_naive(sections, font_path):
+    # What create_pdf used to do: a fresh FPDF that parses the TTF every time
+    pdf = FPDF()
+    pdf.add_font("DejaVu", "", font_path)
+    pdf.set_font("DejaVu", "", 12)
+    for text, _ in sections:
+        pdf.add_page()
+        pdf.multi_cell(0, 10, text=text)
+    return bytes(pdf.output())
+
+
+def summarize(name, latencies, sizes):
+    latencies = sorted(latencies)
+    return {
+        "name": name,
+        "docs": len(latencies),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 1),
+        "mean_kb": round(statistics.mean(sizes) / 1024, 1),
+    }
+
+
+def bench(name, render, sections, docs):
+    latencies, sizes = [], []
+    for _ in range(docs):
+        t0 = time.perf_counter()
+        sizes.append(len(render(sections)))
+        latencies.append(time.perf_counter() - t0)
+    return summarize(name, latencies, sizes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--sections", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    font = unicode_font()
+    font_load = time.perf_counter() - start
+    if font is None:
+        sys.exit("No Unicode TTF found; set INK2DECK_PDF_FONT")
+
+    images = [synthetic_photo(i) for i in range(args.sections)]
+    sections = [(TEXT, image) for image in images]
+    text_only = [(TEXT, None) for _ in images]
+    font_path = font[0].ttffile
+
+    results = [
+        bench("add_font per document (text only)", lambda s: render_naive(s, font_path), text_only, args.docs),
+        bench("cached engine (text only)", render_pdf, text_only, args.docs),
+        bench("cached engine (with images)", render_pdf, sections, args.docs),
+    ]
+
+    if args.json:
+        print(json.dumps({"font_load_s": round(font_load, 3), "results": results}, indent=2))
+        return
+    print(f"font load (once per process): {font_load * 1000:.0f} ms")
+    print(f"{'path':<40} {'p50 ms':>8} {'p95 ms':>8} {'KB':>8}")
+    for r in results:
+        print(f"{r['name']:<40} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['mean_kb']:>8}")
+
+
+if __name__ == "__main__":
+    main()
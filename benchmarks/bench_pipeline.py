@@ -0,0 +1,302 @@
+"""Per-stage latency, throughput and peak memory of the image-to-deck pipeline
+
+    python benchmarks/bench_pipeline.py                      # main*.jpg + 1..24 MP boards
+    python benchmarks/bench_pipeline.py --sizes 1 4 --repeat 3 --out run.json
+    python benchmarks/bench_pipeline.py --write-baseline
+    python benchmarks/bench_pipeline.py --check              # fail on regressions of the fastest run
+
+Inputs are the bundled main*.jpg photos plus synthetic whiteboards generated
+from a fixed seed. Gemini is replaced by the deterministic in-process
+FakeModel (the shared client's rate limit is disabled), so numbers measure
+this code, not the network. Timed iterations run without tracemalloc; one
+extra iteration per input measures each stage's peak traced memory (Python
+and NumPy/OpenCV arrays; Pillow's internal buffers are not traced).
+
+--check compares each stage's fastest run (min of --repeat), which load on
+the machine can only slow down, with the baseline's, and allows TOLERANCE
+plus SLACK_MS. Inputs with a regressed stage are measured once more before
+failing, so a single busy moment does not fail an unchanged tree. Baselines
+are per machine: a note is printed when the baseline came from another one.
+"""
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from io import BytesIO
+
+# Configure the pipeline before it is imported: fake Gemini, no rate limit, no caches
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ["INK2DECK_GEMINI_RPS"] = "0"
+os.environ["INK2DECK_ENGINE_POLICY"] = "sequential"
+os.environ.setdefault("INK2DECK_CACHE_DISK", "0")
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+from PIL import Image  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(ROOT, "benchmarks", "pipeline_baseline.json")
+sys.path.insert(0, ROOT)
+
+from ink2deck.decks import create_pdf_for_sections, create_ppt_for_sections  # noqa: E402
+from ink2deck.gemini import normalize_for_upload  # noqa: E402
+from ink2deck.gemini_stub import FakeModel  # noqa: E402
+from ink2deck.ocr import extract_text_layout, extract_text_with_ocr  # noqa: E402
+from ink2deck.preprocess import PreprocessedImage  # noqa: E402
+from ink2deck.regions import detect_text_regions  # noqa: E402
+
+DEFAULT_SIZES = (1, 2, 4, 8, 12, 24)
+# A stage fails --check when its fastest run is this much, and SLACK_MS, slower than the baseline's
+TOLERANCE = 1.25
+SLACK_MS = 2.0
+
+
+def synthetic_board(megapixels, seed=0):
+    """JPEG bytes of a 4:3 whiteboard photo: uneven lighting, sensor noise, handwriting-like lines"""
+    height = int(round((megapixels * 1e6 * 3 / 4) ** 0.5))
+    width = int(round(height * 4 / 3))
+    rng = np.random.default_rng(seed * 1000 + megapixels)
+    # Vignetted off-white background
+    ys, xs = np.mgrid[0:height, 0:width].astype(np.float32)
+    falloff = ((xs / width - 0.5) ** 2 + (ys / height - 0.5) ** 2) * 60
+    board = np.clip(235 - falloff + rng.normal(0, 4, (height, width)), 0, 255).astype(np.uint8)
+    board = cv2.cvtColor(board, cv2.COLOR_GRAY2BGR)
+
+    scale = width / 1200
+    for block in range(3):
+        top = int(height * (0.12 + block * 0.3))
+        for line in range(3):
+            y = top + int(line * 55 * scale)
+            text = f"Lecture {seed} block {block} line {line}: y = {rng.integers(2, 9)}x + {rng.integers(0, 99)}"
+            cv2.putText(board, text, (int(40 * scale), y), cv2.FONT_HERSHEY_SCRIPT_SIMPLEX,
+                        1.1 * scale, (40, 30, 160), max(1, int(2.5 * scale)), cv2.LINE_AA)
+    ok, encoded = cv2.imencode(".jpg", board, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return encoded.tobytes()
+
+
+def load_inputs(sizes, include_bundled=True):
+    inputs = []
+    if include_bundled:
+        for path in sorted(glob.glob(os.path.join(ROOT, "main*.jpg"))):
+            with open(path, "rb") as f:
+                inputs.append((os.path.basename(path), f.read()))
+    for megapixels in sizes:
+        inputs.append((f"synthetic_{megapixels}mp.jpg", synthetic_board(megapixels)))
+    return inputs
+
+
+def run_pipeline(data, model, tesseract):
+    """One pass over every stage; returns {stage: wall seconds}"""
+    timings = {}
+
+    def stage(name, func):
+        start = time.perf_counter()
+        result = func()
+        timings[name] = time.perf_counter() - start
+        return result
+
+    pre = stage("decode", lambda: PreprocessedImage.from_bytes(data))
+    binary = stage("preprocess", lambda: pre.ocr_input)
+    stage("regions", lambda: detect_text_regions(binary))
+    stage("gemini_upload", lambda: normalize_for_upload(pre.ocr_image(), bilevel=True))
+    text = stage("ocr", lambda: extract_text_with_ocr(pre, model, tesseract))
+    stage("deck.pdf", lambda: create_pdf_for_sections([(text, data)]))
+    stage("deck.pptx", lambda: create_ppt_for_sections([(text, data)]).close())
+    return timings
+
+
+def peak_memory(data, model, tesseract):
+    """Peak traced bytes per stage, from one instrumented pass"""
+    peaks = {}
+    state = {}
+    stages = (
+        ("decode", lambda: state.update(pre=PreprocessedImage.from_bytes(data))),
+        ("preprocess", lambda: state["pre"].ocr_input),
+        ("regions", lambda: detect_text_regions(state["pre"].ocr_input)),
+        ("gemini_upload", lambda: normalize_for_upload(state["pre"].ocr_image(), bilevel=True)),
+        ("ocr", lambda: state.update(text=extract_text_with_ocr(state["pre"], model, tesseract))),
+        ("deck.pdf", lambda: create_pdf_for_sections([(state["text"], data)])),
+        ("deck.pptx", lambda: create_ppt_for_sections([(state["text"], data)]).close()),
+    )
+    tracemalloc.start()
+    try:
+        for name, func in stages:
+            # Reset at each stage boundary so every peak is that stage's own
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            func()
+            peaks[name] = max(0, tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(samples, megapixels, peaks):
+    stages = {}
+    for name, values in samples.items():
+        ordered = sorted(values)
+        mean = statistics.mean(ordered)
+        stages[name] = {
+            "runs": len(ordered),
+            "mean_ms": round(mean * 1000, 2),
+            "min_ms": round(ordered[0] * 1000, 2),
+            "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+            "images_per_s": round(1 / mean, 2) if mean else None,
+            "megapixels_per_s": round(megapixels / mean, 2) if mean else None,
+            "peak_bytes": peaks.get(name),
+        }
+    return stages
+
+
+def bench_input(name, data, model, tesseract, repeat):
+    # Header only: the source resolution, not what decode scaled it to
+    with Image.open(BytesIO(data)) as image:
+        size = image.size
+    megapixels = round(size[0] * size[1] / 1e6, 2)
+    # Warm-up pass: fonts, worker pools and lazy imports are not part of a stage's cost
+    run_pipeline(data, model, tesseract)
+    samples = {}
+    total = []
+    for _ in range(repeat):
+        timings = run_pipeline(data, model, tesseract)
+        for stage, seconds in timings.items():
+            samples.setdefault(stage, []).append(seconds)
+        total.append(sum(timings.values()))
+    samples["total"] = total
+    return {
+        "input": name,
+        "size": list(size),
+        "megapixels": megapixels,
+        "input_bytes": len(data),
+        "stages": summarize(samples, megapixels, peak_memory(data, model, tesseract)),
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import PIL
+
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "versions": {"numpy": np.__version__, "opencv": cv2.__version__, "pillow": PIL.__version__},
+    }
+
+
+def check(report, baseline, tolerance=TOLERANCE, slack_ms=SLACK_MS):
+    """{input: [failure message]} for stages whose fastest run regressed"""
+    failures = {}
+    previous = {result["input"]: result for result in baseline.get("results", [])}
+    for result in report["results"]:
+        before = previous.get(result["input"])
+        if before is None:
+            continue
+        for stage, stats in result["stages"].items():
+            recorded = before["stages"].get(stage, {})
+            # Baselines written before min_ms was recorded only have the p50, which is no faster
+            budget = recorded.get("min_ms", recorded.get("p50_ms"))
+            if budget and stats["min_ms"] > budget * tolerance + slack_ms:
+                failures.setdefault(result["input"], []).append(
+                    f"{result['input']} {stage}: fastest {stats['min_ms']} ms, baseline {budget} ms"
+                )
+    return failures
+
+
+def _same_machine(report, baseline):
+    here, there = report["environment"], baseline.get("environment", {})
+    return all(here.get(key) == there.get(key) for key in ("platform", "cpus", "python"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="*", default=list(DEFAULT_SIZES), help="synthetic megapixels")
+    parser.add_argument("--no-bundled", action="store_true", help="skip the bundled main*.jpg photos")
+    parser.add_argument("--repeat", type=int, default=5, help="timed passes per input")
+    parser.add_argument("--gemini-latency-ms", type=int, default=50, help="fixed latency of the fake Gemini")
+    parser.add_argument("--engine", choices=["fake-gemini", "tesseract"], default="fake-gemini",
+                        help="tesseract needs the binary; fake-gemini measures everything around OCR")
+    parser.add_argument("--out", help="also write the JSON report here")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--write-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="exit 1 if a stage's fastest run regressed")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    model = FakeModel(latency=args.gemini_latency_ms / 1000) if args.engine == "fake-gemini" else None
+    inputs = load_inputs(args.sizes, include_bundled=not args.no_bundled)
+    report = {
+        "environment": environment(),
+        "config": {
+            "repeat": args.repeat, "engine": args.engine, "gemini_latency_ms": args.gemini_latency_ms,
+            "sizes": args.sizes, "bundled": not args.no_bundled,
+        },
+        "results": [],
+    }
+    for name, data in inputs:
+        result = bench_input(name, data, model, extract_text_layout, args.repeat)
+        report["results"].append(result)
+        if not args.json:
+            print(f"{name} ({result['megapixels']} MP)", file=sys.stderr)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'input':<22} {'stage':<14} {'p50 ms':>9} {'p95 ms':>9} {'img/s':>8} {'peak MB':>8}")
+        for result in report["results"]:
+            for stage, stats in result["stages"].items():
+                peak = stats["peak_bytes"]
+                print(
+                    f"{result['input']:<22} {stage:<14} {stats['p50_ms']:>9} {stats['p95_ms']:>9} "
+                    f"{stats['images_per_s']:>8} {peak / 1024 / 1024 if peak is not None else float('nan'):>8.1f}"
+                )
+
+    for path in filter(None, [args.out, args.baseline if args.write_baseline else None]):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    if args.check:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if not _same_machine(report, baseline):
+            print("note: the baseline was recorded on another machine; re-record it here with --write-baseline "
+                  "on a known-good commit", file=sys.stderr)
+        failures = check(report, baseline)
+        if failures:
+            # Measure the suspects again and keep each stage's faster run
+            retry = {"results": []}
+            for name, data in inputs:
+                if name in failures:
+                    retry["results"].append(bench_input(name, data, model, extract_text_layout, args.repeat))
+            for result, again in zip([r for r in report["results"] if r["input"] in failures], retry["results"]):
+                for stage, stats in again["stages"].items():
+                    stats["min_ms"] = min(stats["min_ms"], result["stages"][stage]["min_ms"])
+            failures = check(retry, baseline)
+        for messages in failures.values():
+            for failure in messages:
+                print(f"FAIL: {failure}", file=sys.stderr)
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Compare per-call pytesseract against the warm Tesseract worker pool
+
+    python benchmarks/bench_tesseract_pool.py --images 40 --workers 4
+
+Needs the tesseract binary; tesserocr is used by the pool when installed.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ink2deck.ocr import extract_text_with_tesseract  # noqa: E402
+from ink2deck.tesseract_pool import TesseractPool  # noqa: E402
+
+
+def synthetic_board(index, width=1200, height=400):
+    board = np.full((height, width), 255, dtype=np.uint8)
+    for line in range(3):
+        cv2.putText(
+            board, f"Lecture {index} line {line}: x = {index * 7 + line}",
+            (30, 100 + line * 110), cv2.FONT_HERSHEY_SIMPLEX, 1.6, 0, 3
+        )
+    return board
+
+
+def summarize(name, latencies, wall):
+    latencies = sorted(latencies)
+    return {
+        "name": name,
+        "images": len(latencies),
+        "wall_s": round(wall, 3),
+        "images_per_s": round(len(latencies) / wall, 2) if wall else None,
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 1),
+    }
+
+
+def bench_sequential(name, ocr, images):
+    latencies = []
+    start = time.perf_counter()
+    for image in images:
+        t0 = time.perf_counter()
+        ocr(image)
+        latencies.append(time.perf_counter() - t0)
+    return summarize(name, latencies, time.perf_counter() - start)
+
+
+def bench_concurrent(name, pool, images):
+    start = time.perf_counter()
+    submitted = [(time.perf_counter(), pool.submit(image)) for image in images]
+    latencies = []
+    for t0, future in submitted:
+        future.result()
+        latencies.append(time.perf_counter() - t0)
+    return summarize(name, latencies, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--backend", default="auto", choices=["auto", "tesserocr", "pytesseract"])
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    images = [synthetic_board(i) for i in range(args.images)]
+    results = [bench_sequential("pytesseract per call", extract_text_with_tesseract, images)]
+
+    start = time.perf_counter()
+    pool = TesseractPool(workers=args.workers, backend=args.backend)
+    info = pool.health_check(timeout=60)
+    startup = time.perf_counter() - start
+    if info is None:
+        sys.exit("Tesseract pool failed its health check")
+
+    results.append(bench_sequential(f"warm pool ({info['backend']}) sequential", pool.ocr, images))
+    results.append(bench_concurrent(f"warm pool ({info['backend']}) x{args.workers}", pool, images))
+    pool.shutdown()
+
+    if args.json:
+        print(json.dumps({"pool_startup_s": round(startup, 3), "results": results}, indent=2))
+        return
+    print(f"pool start-up: {startup * 1000:.0f} ms")
+    print(f"{'path':<40} {'img/s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for r in results:
+        print(f"{r['name']:<40} {r['images_per_s']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8}")
+
+
+if __name__ == "__main__":
+    main()
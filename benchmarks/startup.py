@@ -0,0 +1,116 @@
+"""Cold-start import cost of each page, from python -X importtime
+
+    python benchmarks/startup.py                 # print the report
+    python benchmarks/startup.py --write-baseline
+    python benchmarks/startup.py --check         # fail on regressions
+
+Each page module is imported in a fresh interpreter after streamlit (which
+every render pays for anyway), so the numbers are what routing to that page
+adds on a fresh worker. Home and login must not load any of HEAVY_MODULES.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(ROOT, "benchmarks", "startup_baseline.json")
+
+PAGES = {
+    "home": "ink2deck.views.home",
+    "login": "ink2deck.views.login",
+    "upload": "ink2deck.views.upload",
+    # What the first upload adds once OCR work starts
+    "ocr": "ink2deck.ocr",
+}
+HEAVY_MODULES = ("cv2", "pytesseract", "google.generativeai", "pptx", "fpdf")
+LIGHT_PAGES = ("home", "login")
+# A page fails --check when it is this much slower than the baseline
+TOLERANCE = 1.5
+
+
+def measure(module):
+    """(total_ms, {package: self_ms}, loaded module names) for importing module"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import streamlit; import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    total, by_package, loaded, after_streamlit = 0.0, {}, set(), False
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        stripped = name.strip()
+        if after_streamlit:
+            loaded.add(stripped)
+            package = stripped.split(".")[0]
+            by_package[package] = by_package.get(package, 0.0) + int(self_us) / 1000
+            if name == " " + stripped:
+                total += int(cumulative) / 1000
+        elif name == " streamlit":
+            after_streamlit = True
+    return total, by_package, loaded
+
+
+def run(repeat):
+    report = {}
+    for page, module in PAGES.items():
+        runs = [measure(module) for _ in range(repeat)]
+        total, by_package, loaded = min(runs, key=lambda r: r[0])
+        slowest = sorted(by_package.items(), key=lambda item: -item[1])[:8]
+        report[page] = {
+            "module": module,
+            "total_ms": round(total, 1),
+            "slowest": {name: round(ms, 1) for name, ms in slowest},
+            "heavy_loaded": sorted(m for m in HEAVY_MODULES if m in loaded),
+        }
+    return report
+
+
+def check(report):
+    with open(BASELINE) as f:
+        baseline = json.load(f)
+    failures = []
+    for page, result in report.items():
+        if page in LIGHT_PAGES and result["heavy_loaded"]:
+            failures.append(f"{page} loads {', '.join(result['heavy_loaded'])}")
+        budget = baseline.get(page, {}).get("total_ms")
+        if budget and result["total_ms"] > budget * TOLERANCE:
+            failures.append(f"{page} takes {result['total_ms']} ms, baseline {budget} ms")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="runs per page; the fastest is kept")
+    parser.add_argument("--write-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = run(args.repeat)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for page, result in report.items():
+            heavy = ", ".join(result["heavy_loaded"]) or "none"
+            print(f"{page:<8} {result['total_ms']:>8.1f} ms  heavy: {heavy}")
+            for name, ms in result["slowest"].items():
+                print(f"{'':<10}{ms:>8.1f} ms  {name}")
+
+    if args.write_baseline:
+        with open(BASELINE, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    if args.check:
+        failures = check(report)
+        for failure in failures:
+            print(f"FAIL: {failure}", file=sys.stderr)
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Ink2Deck helpers shared by the Streamlit app"""
@@ -0,0 +1,5 @@
+import sys
+
+from ink2deck.cli import main
+
+sys.exit(main())
@@ -0,0 +1,78 @@
+"""Home page hero image: resolved, resized and encoded once per process
+
+The hero is shown in a 500px circle, so the bundled 1024px JPEG is center
+cropped to a square of that size and encoded as WebP (JPEG if Pillow lacks
+WebP). It is inlined as a data URI by default. With INK2DECK_HERO_STATIC=1 it
+is written to static/ next to app.py and referenced by URL instead, which
+needs `server.enableStaticServing = true` in the Streamlit config.
+"""
+import base64
+import os
+from functools import lru_cache
+from io import BytesIO
+
+# Directory holding app.py and the bundled images
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HERO_SIZE = int(os.getenv("INK2DECK_HERO_SIZE", "500"))
+HERO_QUALITY = int(os.getenv("INK2DECK_HERO_QUALITY", "80"))
+HERO_CANDIDATES = [
+    "main2.jpg", "main4.jpg",
+    os.path.join(APP_DIR, "main2.jpg"),
+    os.path.join(APP_DIR, "main4.jpg"),
+    os.path.join(APP_DIR, "Ink2Deck", "main2.jpg"),
+    "/app/Ink2Deck/main2.jpg", "/app/main2.jpg"
+]
+
+
+@lru_cache(maxsize=None)
+def hero_path():
+    for path in HERO_CANDIDATES:
+        normalized_path = os.path.normpath(path)
+        if os.path.isfile(normalized_path):
+            return normalized_path
+    return None
+
+
+@lru_cache(maxsize=None)
+def hero_image():
+    """(bytes, mime, extension) of the right-sized hero, or None if no image is bundled"""
+    path = hero_path()
+    if path is None:
+        return None
+    from PIL import Image, ImageOps
+
+    try:
+        with Image.open(path) as image:
+            # object-fit: cover in a square, so crop to a square first
+            image = ImageOps.fit(image.convert("RGB"), (HERO_SIZE, HERO_SIZE), Image.LANCZOS)
+        stream = BytesIO()
+        try:
+            image.save(stream, format="WEBP", quality=HERO_QUALITY, method=6)
+            return stream.getvalue(), "image/webp", "webp"
+        except (OSError, KeyError):
+            stream = BytesIO()
+            image.save(stream, format="JPEG", quality=HERO_QUALITY, optimize=True, progressive=True)
+            return stream.getvalue(), "image/jpeg", "jpg"
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=None)
+def hero_src():
+    """img src for the hero: a data URI, or a static file URL when enabled"""
+    image = hero_image()
+    if image is None:
+        return ""
+    data, mime, extension = image
+    if os.getenv("INK2DECK_HERO_STATIC") == "1":
+        static_dir = os.path.join(APP_DIR, "static")
+        filename = f"hero.{extension}"
+        try:
+            os.makedirs(static_dir, exist_ok=True)
+            with open(os.path.join(static_dir, filename), "wb") as f:
+                f.write(data)
+            return f"app/static/{filename}"
+        except OSError:
+            pass  # Read-only deploy; fall back to inlining
+    return f"data:{mime};base64,{base64.b64encode(data).decode()}"
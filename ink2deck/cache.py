@@ -0,0 +1,195 @@
+"""Content-addressed result cache shared by every session in the process"""
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+# Eviction empties the disk store down to this share of its budget, so a
+# full store is not rescanned on every write
+DISK_LOW_WATER = 0.9
+
+
+def cache_key(*parts):
+    """Hash bytes/str/other parts into a stable hex key"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (bytes, bytearray, memoryview)):
+            data = bytes(part)
+        else:
+            data = repr(part).encode("utf-8")
+        # Length prefix so ("ab", "c") and ("a", "bc") never collide
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Two-tier cache: bounded in-memory LRU in front of an optional on-disk store"""
+
+    def __init__(self, name, max_items=128, disk_dir=None, max_disk_bytes=256 * 1024 * 1024):
+        self.name = name
+        self.max_items = max_items
+        self.disk_dir = os.path.join(disk_dir, name) if disk_dir else None
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._disk_bytes = 0
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key + ".pkl")
+
+    def get(self, key):
+        """Return the cached value or None"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return self._memory[key]
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+            self._remember(key, value)
+        return value
+
+    def put(self, key, value):
+        """Store a value in both tiers"""
+        with self._lock:
+            self._remember(key, value)
+            self._stats["stores"] += 1
+        self._write_disk(key, value)
+
+    def get_or_compute(self, key, compute, should_store=bool):
+        """Return the cached value, computing and storing it on a miss"""
+        value = self.get(key)
+        if value is not None:
+            return value
+        value = compute()
+        if should_store(value):
+            self.put(key, value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_items"] = len(self._memory)
+        stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+
+    def _remember(self, key, value):
+        # Caller holds the lock
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            # Bump mtime so eviction drops least recently used entries first
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Corrupt or truncated entry, drop it and treat as a miss
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def _write_disk(self, key, value):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file and rename so readers never see partial entries
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+        except Exception:
+            return
+        with self._lock:
+            self._disk_bytes += size
+            over_budget = self._disk_bytes > self.max_disk_bytes
+        if over_budget:
+            self._evict_disk()
+
+    def _disk_entries(self):
+        for root, _, files in os.walk(self.disk_dir):
+            for filename in files:
+                if not filename.endswith(".pkl"):
+                    continue
+                path = os.path.join(root, filename)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield st.st_mtime, st.st_size, path
+
+    def _evict_disk(self):
+        """Drop least recently used files until the store is down to DISK_LOW_WATER of its budget"""
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_disk_bytes * DISK_LOW_WATER:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            with self._lock:
+                self._stats["evictions"] += 1
+        with self._lock:
+            self._disk_bytes = total
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name, max_items=None, disk=True):
+    """Process-wide cache instance, configured from the environment"""
+    with _caches_lock:
+        if name not in _caches:
+            disk_dir = None
+            if disk and os.getenv("INK2DECK_CACHE_DISK", "1") != "0":
+                disk_dir = os.getenv(
+                    "INK2DECK_CACHE_DIR",
+                    os.path.join(os.path.expanduser("~"), ".cache", "ink2deck"),
+                )
+            _caches[name] = ResultCache(
+                name,
+                max_items=max_items or int(os.getenv("INK2DECK_CACHE_ITEMS", "128")),
+                disk_dir=disk_dir,
+                max_disk_bytes=int(os.getenv("INK2DECK_CACHE_MAX_MB", "256")) * 1024 * 1024,
+            )
+        return _caches[name]
+
+
+def get_ocr_cache():
+    return get_cache("ocr")
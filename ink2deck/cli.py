@@ -0,0 +1,176 @@
+"""ink2deck command line: bulk whiteboard photo to deck conversion
+
+    python -m ink2deck photos/ -o decks/ --format pptx pdf --workers 8
+    python -m ink2deck "archive/**/*.jpg" scans/*.pdf lectures/*.mp4 -o decks/
+
+A PDF becomes one deck with a section per page, a video one with a section
+per keyframe (each distinct state of the board). Their decks keep the
+source suffix (notes.pdf -> notes.pdf.pptx), so they never clash with the
+deck of a photo of the same name. Inputs that would still write the same
+deck (x.jpg and x.png, or a/x.jpg and b/x.jpg given separately) are skipped
+and reported; the rest of the run goes ahead. An input without any text
+leaves a .empty marker instead of decks, so later runs skip it too.
+"""
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg"}
+DOCUMENT_SUFFIXES = {".pdf", ".mp4", ".mov", ".m4v", ".webm", ".avi", ".mkv"}
+INPUT_SUFFIXES = IMAGE_SUFFIXES | DOCUMENT_SUFFIXES
+
+
+def _output_stem(relative):
+    # Photos drop their suffix as they always have; PDFs and videos keep it
+    return relative.with_suffix("") if relative.suffix.lower() in IMAGE_SUFFIXES else relative
+
+
+def _glob_base(pattern):
+    """The leading directories of a glob pattern that contain no wildcards"""
+    parts = Path(pattern).parts
+    base = []
+    for part in parts[:-1]:
+        if glob.has_magic(part):
+            break
+        base.append(part)
+    return Path(*base) if base else Path(".")
+
+
+def find_inputs(patterns):
+    """(path, relative output stem) for every image, PDF or video under the given dirs/globs/files
+
+    Outputs mirror each input's path below its directory or below the
+    wildcard-free start of its glob. Returns (inputs, conflicts): conflicts
+    are [(stem, [path, ...])] of inputs left out because they would write
+    the same deck.
+    """
+    found = {}
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            for candidate in sorted(path.rglob("*")):
+                if candidate.suffix.lower() in INPUT_SUFFIXES and candidate.is_file():
+                    found.setdefault(candidate, _output_stem(candidate.relative_to(path)))
+            continue
+        base = _glob_base(pattern) if glob.has_magic(pattern) else path.parent
+        matches = [Path(p) for p in sorted(glob.glob(pattern, recursive=True))] or [path]
+        for candidate in matches:
+            if candidate.suffix.lower() in INPUT_SUFFIXES and candidate.is_file():
+                found.setdefault(candidate, _output_stem(candidate.relative_to(base)))
+
+    by_stem = {}
+    for candidate, stem in found.items():
+        by_stem.setdefault(stem, []).append(candidate)
+    inputs = [(candidate, stem) for candidate, stem in found.items() if len(by_stem[stem]) == 1]
+    conflicts = [(stem, candidates) for stem, candidates in by_stem.items() if len(candidates) > 1]
+    return inputs, conflicts
+
+
+def _fresh(path, source_mtime):
+    return path.exists() and path.stat().st_mtime >= source_mtime
+
+
+def is_up_to_date(source, targets, marker=None):
+    """Every deck is newer than the source, or the source had no text when it last changed"""
+    source_mtime = source.stat().st_mtime
+    if marker is not None and _fresh(marker, source_mtime):
+        return True
+    return all(_fresh(t, source_mtime) for t in targets)
+
+
+def convert_one(source, targets, formats, model, marker=None):
+    from ink2deck.pipeline import convert
+
+    start = time.perf_counter()
+    result = convert([source.read_bytes()], formats, model, memoize=False)
+    if result.unreadable:
+        raise ValueError("could not be read")
+    if not result.outputs:
+        if marker is not None:
+            marker.parent.mkdir(parents=True, exist_ok=True)
+            marker.write_text(f"No text found in {source}\n")
+        return "empty", time.perf_counter() - start
+    for fmt, target in targets.items():
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so an interrupted run never leaves a deck that looks up to date
+        tmp = target.with_name(target.name + ".part")
+        tmp.write_bytes(result.outputs[fmt])
+        os.replace(tmp, target)
+    if marker is not None and marker.exists():
+        marker.unlink()
+    return "done", time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="ink2deck", description="Convert whiteboard photos into slide decks")
+    parser.add_argument("inputs", nargs="+", help="image, PDF or video files, directories or glob patterns")
+    parser.add_argument("-o", "--output", default="decks", help="output directory (default: decks)")
+    parser.add_argument("-f", "--format", nargs="+", choices=["pptx", "pdf"], default=["pptx", "pdf"])
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="images converted concurrently")
+    parser.add_argument("--force", action="store_true", help="rebuild outputs even if they are up to date")
+    parser.add_argument("--no-gemini", action="store_true", help="use local OCR only")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(levelname)s %(name)s: %(message)s")
+
+    from ink2deck.gemini import get_model
+
+    out_dir = Path(args.output)
+    inputs, conflicts = find_inputs(args.inputs)
+    for stem, candidates in conflicts:
+        print(f"Skipping {', '.join(map(str, candidates))}: all would be written to {out_dir / stem}.*",
+              file=sys.stderr)
+    if not inputs and not conflicts:
+        print("No input images found", file=sys.stderr)
+        return 2
+
+    todo, skipped = [], 0
+    for source, stem in inputs:
+        targets = {fmt: out_dir / stem.with_name(f"{stem.name}.{fmt}") for fmt in args.format}
+        marker = out_dir / stem.with_name(f"{stem.name}.empty")
+        if not args.force and is_up_to_date(source, targets.values(), marker):
+            skipped += 1
+            continue
+        todo.append((source, targets, marker))
+
+    print(f"{len(inputs)} images, {skipped} up to date, {len(todo)} to convert with {args.workers} workers",
+          flush=True)
+    model = None if args.no_gemini else get_model()
+    counts = {"done": 0, "empty": 0, "failed": 0}
+    conflicting = sum(len(candidates) for _, candidates in conflicts)
+    total_bytes = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = {
+            executor.submit(convert_one, source, targets, args.format, model, marker): source
+            for source, targets, marker in todo
+        }
+        for n, future in enumerate(as_completed(futures), 1):
+            source = futures[future]
+            try:
+                status, seconds = future.result()
+                detail = f"{seconds:.1f}s"
+            except Exception as e:
+                status, detail = "failed", str(e)
+            counts[status] += 1
+            if status != "failed":
+                total_bytes += source.stat().st_size
+            print(f"[{n}/{len(todo)}] {status:<6} {source} ({detail})", flush=True)
+
+    elapsed = time.perf_counter() - start
+    rate = counts["done"] / elapsed if elapsed else 0.0
+    print(
+        f"Converted {counts['done']}, no text {counts['empty']}, failed {counts['failed']}, "
+        f"conflicting {conflicting}, skipped {skipped} in {elapsed:.1f}s "
+        f"({rate:.2f} images/s, {total_bytes / 1024 / 1024 / elapsed if elapsed else 0:.2f} MB/s input)",
+        flush=True
+    )
+    return 1 if counts["failed"] or conflicting else 0
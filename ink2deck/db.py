@@ -0,0 +1,122 @@
+"""Process-wide MongoDB client and user lookups"""
+import functools
+import logging
+import os
+import threading
+
+import certifi
+from dotenv import load_dotenv
+from pymongo import ASCENDING, MongoClient
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from ink2deck.tracing import span
+
+logger = logging.getLogger(__name__)
+
+DB_NAME = "Ink2Deck"
+
+_client = None
+_client_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def _load_env():
+    load_dotenv()
+
+
+def mongo_configured():
+    """MONGO_URI or INK2DECK_MONGO_MOCK=1 is set, in the environment or .env"""
+    _load_env()
+    return os.getenv("INK2DECK_MONGO_MOCK") == "1" or bool(os.getenv("MONGO_URI"))
+
+
+def _create_client():
+    _load_env()
+    if os.getenv("INK2DECK_MONGO_MOCK") == "1":
+        # Local stand-in for tests and offline development
+        try:
+            import mongomock
+            import mongomock.gridfs
+        except ImportError as e:
+            raise RuntimeError("INK2DECK_MONGO_MOCK=1 requires the mongomock package") from e
+        # Lets the gridfs package (the conversion history's deck store) run on mongomock
+        mongomock.gridfs.enable_gridfs_integration()
+        return mongomock.MongoClient()
+
+    MONGO_URI = os.getenv("MONGO_URI")
+    if not MONGO_URI:
+        raise ValueError("MongoDB URI not found")
+    return MongoClient(
+        MONGO_URI,
+        tlsCAFile=certifi.where(),
+        serverSelectionTimeoutMS=5000,
+        connectTimeoutMS=3000,
+        maxPoolSize=int(os.getenv("MONGO_MAX_POOL_SIZE", "50")),
+        minPoolSize=int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+        maxIdleTimeMS=int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000")),
+    )
+
+
+def ensure_indexes(db):
+    """Unique indexes backing the login and signup lookups, and the conversion history's indexes"""
+    users = db["users"]
+    for field in ("username", "email"):
+        try:
+            users.create_index([(field, ASCENDING)], unique=True, name=f"{field}_unique")
+        except OperationFailure as e:
+            # Usually pre-existing duplicates; lookups still work, just unindexed
+            logger.warning("Could not create unique index on users.%s: %s", field, e)
+    from ink2deck.history import ensure_history_indexes
+
+    try:
+        ensure_history_indexes(db)
+    except OperationFailure as e:
+        logger.warning("Could not create conversion history indexes: %s", e)
+
+
+def get_client():
+    """Shared, lazily created client; indexes are ensured on first connect"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                client = _create_client()
+                ensure_indexes(client[DB_NAME])
+                _client = client
+    return _client
+
+
+def get_db():
+    return get_client()[DB_NAME]
+
+
+def get_users():
+    return get_db()["users"]
+
+
+def find_login(username):
+    """Only the fields needed to check a password"""
+    with span("mongo.find_login"):
+        return get_users().find_one({"username": username}, {"_id": 0, "password": 1})
+
+
+def user_exists(username, email):
+    with span("mongo.user_exists"):
+        return get_users().find_one(
+            {"$or": [{"username": username}, {"email": email}]}, {"_id": 1}
+        ) is not None
+
+
+def create_user(name, email, username, password_hash):
+    """Insert a user; returns False if the username or email is taken"""
+    try:
+        with span("mongo.create_user"):
+            get_users().insert_one({
+                "name": name,
+                "email": email,
+                "username": username,
+                "password": password_hash
+            })
+    except DuplicateKeyError:
+        return False
+    return True
@@ -0,0 +1,387 @@
+"""PDF/PPTX deck builders, memoized so reruns and repeat downloads are free"""
+import logging
+import os
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+
+from pptx import Presentation
+from pptx.util import Inches, Pt
+
+from ink2deck.cache import cache_key, get_cache
+from ink2deck.media import MediaLayer
+from ink2deck.pdf_engine import image_size, render_pdf
+from ink2deck.tracing import span, start_memory_tracing
+
+logger = logging.getLogger(__name__)
+
+PDF_OPTIONS = {"font_size": 12, "line_height": 10}
+PPTX_OPTIONS = {"body_font_size": 18, "image_width": 6}
+
+# Decks larger than this are spooled to a temp file while being written, and
+# are not kept in the in-memory artifact cache
+SPOOL_MAX_BYTES = int(os.getenv("INK2DECK_SPOOL_MAX_MB", "8")) * 1024 * 1024
+# Presentations kept open for incremental rebuilds after a text edit, one per image batch
+LIVE_DECKS = int(os.getenv("INK2DECK_LIVE_DECKS", "8"))
+
+
+class BuildStats:
+    """Recent deck builds: format, duration, output size and peak memory"""
+
+    def __init__(self, window=100):
+        self._lock = threading.Lock()
+        self._builds = deque(maxlen=window)
+
+    def record(self, fmt, seconds, output_bytes, peak_bytes, media=None):
+        build = {
+            "format": fmt, "seconds": seconds, "output_bytes": output_bytes, "peak_bytes": peak_bytes, "media": media,
+        }
+        with self._lock:
+            self._builds.append(build)
+        logger.info(
+            "Built %s: %d bytes in %.2fs, peak %s%s", fmt, output_bytes, seconds,
+            f"{peak_bytes / 1024 / 1024:.1f} MB" if peak_bytes is not None else "not traced",
+            f", images {media['source_bytes']} -> {media['embedded_bytes']} bytes" if media else ""
+        )
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._builds)
+
+
+deck_build_stats = BuildStats()
+
+
+@contextmanager
+def measure_build(fmt, sections=()):
+    """Time a build as a deck.<fmt> span and, with INK2DECK_TRACE_MEMORY=1, its peak traced memory
+
+    Yields a dict the caller fills with output_bytes and the MediaLayer
+    report. tracemalloc peaks are process-wide, so concurrent builds inflate
+    each other's numbers.
+    """
+    start_memory_tracing()
+    result = {"output_bytes": 0, "media": None}
+    bytes_in = sum(
+        len(text.encode("utf-8")) + (len(image) if isinstance(image, (bytes, bytearray)) else 0)
+        for text, image in sections
+    )
+    with span(f"deck.{fmt}", bytes_in=bytes_in, sections=len(sections)) as build:
+        try:
+            yield result
+        finally:
+            build.bytes_out = result["output_bytes"]
+            if result["media"]:
+                build.attrs.update(
+                    images_in_bytes=result["media"]["source_bytes"],
+                    images_out_bytes=result["media"]["embedded_bytes"],
+                )
+    deck_build_stats.record(fmt, build.wall, result["output_bytes"], build.peak_bytes, result["media"])
+
+
+def _picture_stream(image):
+    """Original upload bytes are embedded as-is; PIL images are encoded once as PNG"""
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return BytesIO(image)
+    image_stream = BytesIO()
+    image.save(image_stream, format="PNG")
+    image_stream.seek(0)
+    return image_stream
+
+
+def split_slides(text):
+    """One slide per blank-line separated block"""
+    return [s.strip() for s in text.split("\n\n") if s.strip()]
+
+
+def slide_blocks(text, image=None):
+    """[(slide text, [figure JPEG bytes])] for one section
+
+    Figures cropped from the image (see layout.page_figures) go on the slide
+    whose share of the text matches their height on the board, so a diagram
+    drawn halfway down sits next to the text written around it.
+    """
+    blocks = split_slides(text)
+    figures = []
+    if image is not None and blocks:
+        from ink2deck.layout import LAYOUT_FIGURES, page_figures
+
+        figures = page_figures(image) if LAYOUT_FIGURES else []
+    assigned = [[] for _ in blocks]
+    for data, (_, y) in figures:
+        assigned[min(len(blocks) - 1, int(y * len(blocks)))].append(data)
+    return list(zip(blocks, assigned))
+
+
+def create_ppt_for_sections(sections, body_font_size=18, image_width=6, spool_max_bytes=SPOOL_MAX_BYTES):
+    """Create one PowerPoint with a section (image slide + text slides) per (text, image)
+
+    image is the uploaded file's bytes (embedded without re-encoding) or a PIL
+    image. Returns a SpooledTemporaryFile positioned at the start: small decks
+    stay in memory, large ones go to disk instead of a second in-memory copy.
+    """
+    with measure_build("pptx", sections) as build:
+        deck = LiveDeck(body_font_size, image_width)
+        build["media"] = deck.update(sections)["media"]
+        ppt_stream = deck.save(spool_max_bytes)
+        build["output_bytes"] = ppt_stream.seek(0, os.SEEK_END)
+        ppt_stream.seek(0)
+    return ppt_stream
+
+
+class LiveDeck:
+    """A Presentation kept in memory and patched, slide by slide, to match new sections
+
+    Every slide is keyed by a hash of what it shows (the image bytes or one
+    text block). update() keeps slides whose content is still wanted, picture
+    parts included, adds slides only for new blocks, drops the rest and puts
+    the slide list in order, so an edit costs the changed slides plus the save.
+    """
+
+    def __init__(self, body_font_size=18, image_width=6):
+        self.body_font_size = body_font_size
+        self.image_width = image_width
+        self.lock = threading.Lock()
+        self.prs = Presentation()
+        self._title_slide = self.prs.slides.add_slide(self.prs.slide_layouts[0])
+        self._title_slide.shapes.title.text = "Whiteboard Content"
+        self._title_slide.placeholders[1].text = "Automatically Generated from Image"
+        # content hash -> slides showing it; slide_id -> current title
+        self._slides = {}
+        self._titles = {}
+
+    def _figure_box(self, count):
+        """Inches available to each of count figures stacked beside a text slide's body"""
+        body = self.prs.slide_layouts[1].placeholders[1]
+        column, gap = int(body.width * 0.4), Inches(0.2)
+        cell = (body.height - gap * (count - 1)) // max(1, count)
+        return (column - gap) / Inches(1), cell / Inches(1)
+
+    def plan(self, sections):
+        """([(content hash, kind, title, content)] per slide in deck order, media report)
+
+        Images are registered with a MediaLayer first, so the hashes are of
+        the bytes actually embedded and a budget step change replaces them.
+        """
+        media = MediaLayer()
+        wanted = []
+        slide_number = 1
+        for section_number, (text, image) in enumerate(sections, 1):
+            image = _image_bytes(image)
+            media.want(image, self.image_width)
+            wanted.append(("image", f"Image {section_number}" if len(sections) > 1 else "", image))
+            for content, figures in slide_blocks(text, image):
+                for data in figures:
+                    media.want(data, *self._figure_box(len(figures)))
+                wanted.append(("text", f"Slide {slide_number}", (content, figures)))
+                slide_number += 1
+        media.fit()
+
+        slides = []
+        for kind, title, content in wanted:
+            if kind == "image":
+                data = media.get(content, self.image_width)
+                slides.append((cache_key("image", data), kind, title, data))
+            else:
+                text, figures = content
+                figures = [media.get(data, *self._figure_box(len(figures))) for data in figures]
+                slides.append((cache_key("text", text, *figures), kind, title, (text, figures)))
+        return slides, media.report()
+
+    def update(self, sections):
+        """Make the deck show sections; returns how many slides were reused, added and removed, and the media report"""
+        available = {key: list(slides) for key, slides in self._slides.items()}
+        ordered, kept = [], {}
+        reused = 0
+        slides, media = self.plan(sections)
+        for key, kind, title, content in slides:
+            pool = available.get(key)
+            if pool:
+                slide = pool.pop(0)
+                reused += 1
+                if self._titles[slide.slide_id] != title:
+                    slide.shapes.title.text = title
+                    self._titles[slide.slide_id] = title
+            elif kind == "image":
+                slide = self._add_image_slide(title, content)
+            else:
+                slide = self._add_text_slide(title, *content)
+            ordered.append(slide)
+            kept.setdefault(key, []).append(slide)
+
+        removed = [slide for pool in available.values() for slide in pool]
+        self._reorder([self._title_slide] + ordered, removed)
+        self._slides = kept
+        return {"reused": reused, "added": len(ordered) - reused, "removed": len(removed), "media": media}
+
+    def _add_image_slide(self, title, image):
+        slide = self.prs.slides.add_slide(self.prs.slide_layouts[5])
+        if title:
+            slide.shapes.title.text = title
+        slide.shapes.add_picture(_picture_stream(image), Inches(1), Inches(1), width=Inches(self.image_width))
+        self._titles[slide.slide_id] = title
+        return slide
+
+    def _add_text_slide(self, title, content, figures=()):
+        slide = self.prs.slides.add_slide(self.prs.slide_layouts[1])
+        slide.shapes.title.text = title
+        body = slide.placeholders[1]
+        body.text = content
+        for paragraph in body.text_frame.paragraphs:
+            paragraph.font.size = Pt(self.body_font_size)
+        if figures:
+            # Text keeps the left 60% of the body area; figures are stacked on the right.
+            # The placeholder inherits its position, so set all four to override just the width
+            left, top, width, height = body.left, body.top, body.width, body.height
+            column = int(width * 0.4)
+            body.left, body.top, body.width, body.height = left, top, width - column, height
+            gap = Inches(0.2)
+            cell = (height - gap * (len(figures) - 1)) // len(figures)
+            for data in figures:
+                figure_width, figure_height = image_size(data)
+                scale = min((column - gap) / figure_width, cell / figure_height)
+                x = left + width - column + gap + (column - gap - int(figure_width * scale)) // 2
+                slide.shapes.add_picture(BytesIO(data), x, top, int(figure_width * scale), int(figure_height * scale))
+                top += cell + gap
+        self._titles[slide.slide_id] = title
+        return slide
+
+    def _reorder(self, slides, removed):
+        # python-pptx has no API for this; the order is the <p:sldIdLst> in presentation.xml.
+        # Slide.slide_id is looked up in that list, so read the ids before emptying it
+        sld_id_lst = self.prs.slides._sldIdLst
+        entries = {int(entry.id): entry for entry in sld_id_lst}
+        keep_ids = [slide.slide_id for slide in slides]
+        removed_ids = [slide.slide_id for slide in removed]
+        for entry in list(sld_id_lst):
+            sld_id_lst.remove(entry)
+        for slide_id in removed_ids:
+            # Unreferenced parts (the slide, and a picture only it used) are left out of the next save
+            self.prs.part.drop_rel(entries[slide_id].rId)
+            del self._titles[slide_id]
+        for slide_id in keep_ids:
+            sld_id_lst.append(entries[slide_id])
+        # add_slide() names the next part slide<n + 1>.xml, so keep partnames contiguous;
+        # relationships cache their target path on first use, so drop the cached ones
+        self.prs.part.rename_slide_parts([entry.rId for entry in sld_id_lst])
+        for rel in self.prs.part.rels.values():
+            rel.__dict__.pop("target_partname", None)
+            rel.__dict__.pop("target_ref", None)
+
+    def save(self, spool_max_bytes=SPOOL_MAX_BYTES):
+        ppt_stream = SpooledTemporaryFile(max_size=spool_max_bytes)
+        self.prs.save(ppt_stream)
+        return ppt_stream
+
+
+def create_pdf_for_sections(sections, font_size=12, line_height=10):
+    """Create one PDF with an image page (if any) and a page per slide for each section
+
+    sections are (text, image) pairs like the PowerPoint builder takes, or
+    plain texts for text-only PDFs.
+    """
+    sections = [(section, None) if isinstance(section, str) else section for section in sections]
+    sections = [(text, _image_bytes(image)) for text, image in sections]
+    with measure_build("pdf", sections) as build:
+        media = MediaLayer()
+        data = render_pdf(sections, font_size=font_size, line_height=line_height, media=media)
+        build["output_bytes"] = len(data)
+        build["media"] = media.report()
+    return data
+
+
+def _image_bytes(image):
+    if image is None or isinstance(image, (bytes, bytearray)):
+        return image
+    if isinstance(image, memoryview):
+        return bytes(image)
+    return _picture_stream(image).getvalue()
+
+
+def _artifact_cache():
+    # Decks are cheap to rebuild after a restart, so keep them in memory only
+    return get_cache("artifacts", max_items=32, disk=False)
+
+
+def _cacheable(data):
+    # Caps the artifact cache at 32 * SPOOL_MAX_BYTES; larger decks are served
+    # from the finished job and MongoDB, or rebuilt
+    return bool(data) and len(data) <= SPOOL_MAX_BYTES
+
+
+def _as_sections(sections):
+    if isinstance(sections, str):
+        sections = [sections]
+    return [(section, None) if isinstance(section, str) else tuple(section) for section in sections]
+
+
+def deck_key(kind, sections, options=None):
+    """Artifact key of a "pdf" or "pptx" deck: every section's text and image, and the build options"""
+    options = dict(PDF_OPTIONS if kind == "pdf" else PPTX_OPTIONS, **(options or {}))
+    return cache_key(kind, *[part for section in _as_sections(sections) for part in section], sorted(options.items()))
+
+
+def _shared(kind, key, build):
+    """build(), unless MongoDB already holds this deck (built by another replica or user); stores new builds"""
+    from ink2deck.history import load_deck, save_deck
+
+    data = load_deck(key)
+    if data is None:
+        data = build()
+        save_deck(key, kind, data)
+    return data
+
+
+def get_pdf_bytes(sections, options=None):
+    """PDF bytes for a text, texts or [(text, image_bytes), ...], built at most once per (sections, options)"""
+    sections = _as_sections(sections)
+    options = dict(PDF_OPTIONS, **(options or {}))
+    key = deck_key("pdf", sections, options)
+    return _artifact_cache().get_or_compute(
+        key, lambda: _shared("pdf", key, lambda: create_pdf_for_sections(sections, **options)), _cacheable
+    )
+
+
+def get_pptx_bytes(sections, options=None):
+    """PPTX bytes for [(text, image_bytes), ...], built at most once per (sections, options)
+
+    A rebuild for the same images with edited text patches that batch's live
+    deck instead of starting over, so only the changed slides are rebuilt.
+    The deck is read out of its spooled file into one bytes copy, which the
+    artifact cache keeps only up to SPOOL_MAX_BYTES.
+    """
+    options = dict(PPTX_OPTIONS, **(options or {}))
+    key = deck_key("pptx", sections, options)
+
+    def build():
+        deck = _live_deck(sections, options)
+        with deck.lock, measure_build("pptx", sections) as result:
+            changes = deck.update(sections)
+            result["media"] = changes["media"]
+            with deck.save() as ppt_stream:
+                ppt_stream.seek(0)
+                data = ppt_stream.read()
+            result["output_bytes"] = len(data)
+        logger.info("PPTX sync: %(reused)d slides reused, %(added)d added, %(removed)d removed", changes)
+        return data
+
+    return _artifact_cache().get_or_compute(key, lambda: _shared("pptx", key, build), _cacheable)
+
+
+_live_decks = OrderedDict()
+_live_decks_lock = threading.Lock()
+
+
+def _live_deck(sections, options):
+    """The LiveDeck for these sections' images and options, least recently used evicted past LIVE_DECKS"""
+    key = cache_key("live-pptx", *[_image_bytes(image) for _, image in sections], sorted(options.items()))
+    with _live_decks_lock:
+        deck = _live_decks.get(key)
+        if deck is None:
+            deck = _live_decks[key] = LiveDeck(**options)
+        _live_decks.move_to_end(key)
+        while len(_live_decks) > max(1, LIVE_DECKS):
+            _live_decks.popitem(last=False)
+        return deck
@@ -0,0 +1,244 @@
+"""Multi-page uploads: PDFs (scans, exported whiteboards) and videos of a board
+
+    pages = Pages(uploads, names)
+    texts = ocr_batch(pages, model)       # each page is OCR'd as soon as it is produced
+    sections = list(zip(texts, pages.images))
+
+Iterating Pages yields one image per photo, one per PDF page and one per
+video keyframe (see video.py), in upload, page and time order. A PDF page is
+rendered at INK2DECK_PDF_DPI (capped at INK2DECK_DECODE_MAX_EDGE, which is
+all OCR uses), encoded as a JPEG and its bitmap freed before the next page
+is rendered, so a 300-page scan never has more than one page decoded at a
+time. Only the encoded pages, which the deck needs anyway, are kept.
+
+Consecutive photos of the same board (a burst) are treated like video
+keyframes: duplicates are skipped and a fuller photo replaces an earlier
+one, unless INK2DECK_SKIP_DUPLICATE_PHOTOS=0.
+"""
+import logging
+import os
+import tempfile
+import threading
+from io import BytesIO
+
+from ink2deck.preprocess import default_config
+from ink2deck.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Render resolution of PDF pages; 150 dpi reads as well as a phone photo of the page
+PDF_DPI = int(os.getenv("INK2DECK_PDF_DPI", "150"))
+# Pages beyond this are skipped (with a warning) rather than converted
+PDF_MAX_PAGES = int(os.getenv("INK2DECK_PDF_MAX_PAGES", "300"))
+PDF_JPEG_QUALITY = 90
+SKIP_DUPLICATE_PHOTOS = os.getenv("INK2DECK_SKIP_DUPLICATE_PHOTOS", "1") != "0"
+
+# PDFium is not thread-safe, not even across documents
+_pdfium_lock = threading.Lock()
+
+
+def is_pdf(data):
+    return bytes(data[:5]) == b"%PDF-"
+
+
+# ISO media brands that are still images, not video
+_IMAGE_BRANDS = {b"heic", b"heix", b"mif1", b"msf1", b"avif"}
+
+
+def is_video(data):
+    """MP4/MOV, WebM/MKV or AVI, by their signature"""
+    head = bytes(data[:12])
+    if head[4:8] == b"ftyp":
+        return head[8:12] not in _IMAGE_BRANDS
+    return head[:4] == b"\x1a\x45\xdf\xa3" or (head[:4] == b"RIFF" and head[8:12] == b"AVI ")
+
+
+def _open(data):
+    import pypdfium2 as pdfium
+
+    try:
+        return pdfium.PdfDocument(data)
+    except pdfium.PdfiumError as e:
+        raise ValueError(f"Could not open PDF: {e}") from e
+
+
+def pdf_page_count(data):
+    with _pdfium_lock:
+        pdf = _open(data)
+        try:
+            return min(len(pdf), PDF_MAX_PAGES)
+        finally:
+            pdf.close()
+
+
+def _render_page(pdf, index, dpi, max_edge):
+    page = pdf[index]
+    try:
+        width, height = page.get_size()
+        # Points are 1/72 inch
+        scale = min(dpi / 72, max_edge / max(width, height)) if max_edge else dpi / 72
+        bitmap = page.render(scale=scale)
+        try:
+            image = bitmap.to_pil()
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            stream = BytesIO()
+            image.save(stream, format="JPEG", quality=PDF_JPEG_QUALITY)
+            return stream.getvalue()
+        finally:
+            bitmap.close()
+    finally:
+        page.close()
+
+
+def iter_pdf_pages(data, dpi=PDF_DPI, max_edge=None):
+    """JPEG bytes of each page, rendered only when the consumer asks for it"""
+    max_edge = default_config().max_edge if max_edge is None else max_edge
+    with _pdfium_lock:
+        pdf = _open(data)
+        count = len(pdf)
+    if count > PDF_MAX_PAGES:
+        logger.warning("PDF has %d pages; only the first %d are converted", count, PDF_MAX_PAGES)
+    try:
+        for index in range(min(count, PDF_MAX_PAGES)):
+            # The lock is released between pages, so other uploads' PDFs interleave
+            with _pdfium_lock, span("pdf.render_page", page=index + 1, dpi=dpi) as s:
+                page = _render_page(pdf, index, dpi, max_edge)
+                s.bytes_out = len(page)
+            yield page
+    finally:
+        with _pdfium_lock:
+            pdf.close()
+
+
+def iter_video_keyframes(data, max_edge=None, on_position=None):
+    """(JPEG bytes, seconds) per keyframe of a video upload, decoded from a temporary file"""
+    from ink2deck.video import iter_keyframes
+
+    max_edge = default_config().max_edge if max_edge is None else max_edge
+    # OpenCV only reads videos from a path
+    with tempfile.NamedTemporaryFile(prefix="ink2deck-", suffix=".video", delete=False) as f:
+        f.write(data)
+        path = f.name
+    try:
+        yield from iter_keyframes(path, max_edge, on_position=on_position)
+    finally:
+        os.unlink(path)
+
+
+def _board_mask(data):
+    import numpy as np
+
+    from ink2deck.preprocess import load_image
+    from ink2deck.video import SIGNATURE_WIDTH, ink_mask, thumbnail
+
+    return ink_mask(thumbnail(np.asarray(load_image(data, SIGNATURE_WIDTH * 2).convert("L"))))
+
+
+def _timestamp(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}:{seconds:02d}"
+
+
+class Pages:
+    """Images to OCR for a batch of uploads, PDFs and videos expanded lazily
+
+    How many images a batch yields is only known once it has been read (a
+    video's keyframes, skipped duplicates), so Pages has no len(). While
+    iterating, every yielded image and its name ("scan.pdf p. 3",
+    "lecture.mp4 12:40") are kept in images and names, in order, and its
+    (upload index, name suffix) in sources; skipped uploads are listed in
+    skipped (names) and skipped_uploads (indexes), those skipped because they
+    could not be read also in unreadable_uploads, and position is the share
+    of the uploads read so far. A photo, PDF or video that cannot be read is
+    logged and skipped rather than failing the batch.
+    """
+
+    def __init__(self, uploads, names=None, dpi=PDF_DPI, skip_duplicates=SKIP_DUPLICATE_PHOTOS):
+        self.uploads = uploads
+        self.upload_names = names or [f"Image {i + 1}" for i in range(len(uploads))]
+        self.dpi = dpi
+        self.skip_duplicates = skip_duplicates
+        self.images = []
+        self.names = []
+        self.sources = []
+        self.skipped = []
+        self.skipped_uploads = []
+        self.unreadable_uploads = []
+        self.position = 0.0
+
+    def _add(self, image, number, suffix=""):
+        self.images.append(image)
+        self.names.append(self.upload_names[number] + suffix)
+        self.sources.append((number, suffix))
+        return image
+
+    def _skip(self, number):
+        self.skipped.append(self.upload_names[number])
+        self.skipped_uploads.append(number)
+
+    def _unreadable(self, number, error):
+        logger.warning("Skipping %s: %s", self.upload_names[number], error)
+        self._skip(number)
+        self.unreadable_uploads.append(number)
+
+    def __iter__(self):
+        from ink2deck.video import VIDEO_CHANGE_THRESHOLD, VIDEO_ERASE_THRESHOLD, ink_change
+
+        self.images, self.names, self.sources = [], [], []
+        self.skipped, self.skipped_uploads, self.unreadable_uploads = [], [], []
+        total = len(self.uploads)
+        # (upload index, ink mask) of the last photo kept; held back until the board
+        # changes, because a later, fuller photo of the same board replaces it
+        kept = None
+        for number, (data, name) in enumerate(zip(self.uploads, self.upload_names)):
+            def advance(fraction, number=number):
+                self.position = (number + fraction) / total
+
+            if kept is not None and (is_pdf(data) or is_video(data)):
+                yield self._add(self.uploads[kept[0]], kept[0])
+                kept = None
+
+            if is_pdf(data):
+                try:
+                    count = pdf_page_count(data)
+                    for page_number, page in enumerate(iter_pdf_pages(data, self.dpi), 1):
+                        advance(page_number / max(count, 1))
+                        yield self._add(page, number, f" p. {page_number}")
+                except ValueError as e:
+                    self._unreadable(number, e)
+                advance(1.0)
+            elif is_video(data):
+                try:
+                    for frame, seconds in iter_video_keyframes(data, on_position=advance):
+                        yield self._add(frame, number, f" {_timestamp(seconds)}")
+                except ValueError as e:
+                    self._unreadable(number, e)
+                advance(1.0)
+            elif not self.skip_duplicates or total == 1:
+                advance(1.0)
+                yield self._add(data, number)
+            else:
+                advance(1.0)
+                try:
+                    mask = _board_mask(data)
+                except OSError as e:
+                    # Truncated files and non-images (PIL's UnidentifiedImageError is an OSError)
+                    self._unreadable(number, e)
+                    continue
+                if kept is not None:
+                    added, removed = ink_change(kept[1], mask)
+                    if added + removed < VIDEO_CHANGE_THRESHOLD:
+                        logger.info("Skipping %s: same board as %s", name, self.upload_names[kept[0]])
+                        self._skip(number)
+                        continue
+                    if removed < VIDEO_ERASE_THRESHOLD:
+                        logger.info("Skipping %s: %s shows the same board with more on it",
+                                    self.upload_names[kept[0]], name)
+                        self._skip(kept[0])
+                        kept = (number, mask)
+                        continue
+                    yield self._add(self.uploads[kept[0]], kept[0])
+                kept = (number, mask)
+        if kept is not None:
+            yield self._add(self.uploads[kept[0]], kept[0])
@@ -0,0 +1,182 @@
+"""OCR engine selection: sequential fallback, hedged requests or a race"""
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from ink2deck.tracing import bind_context, span
+
+logger = logging.getLogger(__name__)
+
+POLICY_MODES = ("sequential", "hedged", "race")
+
+
+@dataclass(frozen=True)
+class EnginePolicy:
+    """How engines are started and how long each one may take (seconds)"""
+    mode: str = "sequential"
+    # hedged: start the next engine if the current one has not answered after this long
+    hedge_after: float = 2.0
+    deadlines: dict = field(default_factory=lambda: {"gemini": 30.0, "tesseract": 60.0})
+
+    def stagger(self):
+        if self.mode not in POLICY_MODES:
+            raise ValueError(f"Unknown engine policy: {self.mode}")
+        return {"sequential": math.inf, "hedged": self.hedge_after, "race": 0.0}[self.mode]
+
+    def deadline(self, engine):
+        return self.deadlines.get(engine, math.inf)
+
+
+def default_policy():
+    return EnginePolicy(
+        mode=os.getenv("INK2DECK_ENGINE_POLICY", "sequential"),
+        hedge_after=int(os.getenv("INK2DECK_HEDGE_AFTER_MS", "2000")) / 1000,
+        deadlines={
+            "gemini": int(os.getenv("INK2DECK_GEMINI_DEADLINE_MS", "30000")) / 1000,
+            "tesseract": int(os.getenv("INK2DECK_TESSERACT_DEADLINE_MS", "60000")) / 1000,
+        },
+    )
+
+
+@dataclass
+class Engine:
+    """run(cancel_event) -> text; it should return early once cancel_event is set"""
+    name: str
+    run: object
+
+
+@dataclass
+class EngineResult:
+    text: str
+    engine: str
+    latency: float
+    attempts: dict
+
+
+class EngineStats:
+    """Which engine won and how long it took, over the recent window"""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self.wins = {}
+        self.outcomes = {}
+        self._latencies = {}
+        self._window = window
+
+    def record(self, result):
+        with self._lock:
+            self.wins[result.engine] = self.wins.get(result.engine, 0) + 1
+            for engine, outcome in result.attempts.items():
+                key = f"{engine}:{outcome}"
+                self.outcomes[key] = self.outcomes.get(key, 0) + 1
+            self._latencies.setdefault(result.engine, deque(maxlen=self._window)).append(result.latency)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = {}
+            for engine, values in self._latencies.items():
+                ordered = sorted(values)
+                latencies[engine] = {
+                    "p50_ms": round(ordered[len(ordered) // 2] * 1000, 1),
+                    "p99_ms": round(ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))] * 1000, 1),
+                }
+            return {"wins": dict(self.wins), "outcomes": dict(self.outcomes), "latency": latencies}
+
+
+engine_stats = EngineStats()
+
+# Engine calls block on network or worker processes, so threads are cheap here
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("INK2DECK_ENGINE_THREADS", "16")), thread_name_prefix="ocr-engine"
+)
+
+
+def _traced_run(engine, cancel):
+    with span(f"ocr.engine.{engine.name}") as engine_span:
+        text = engine.run(cancel)
+        engine_span.bytes_out = len(text.encode("utf-8")) if text else 0
+        engine_span.attrs["cancelled"] = cancel.is_set()
+        return text
+
+
+def run_engines(engines, policy=None):
+    """Run engines (in preference order) under policy; first non-empty answer wins
+
+    Engines past their deadline are cancelled and count as failed, which
+    starts the next engine immediately, as does an empty answer or an error.
+    An engine without a deadline may take as long as it needs. Returns an
+    EngineResult; engine is "none" if every engine failed, and attempts maps
+    each engine to "won", "empty", "error", "timeout" or "cancelled".
+    """
+    policy = policy or default_policy()
+    stagger = policy.stagger()
+    start = time.monotonic()
+    attempts = {}
+    pending = {}
+    next_index = 0
+    next_start = start
+
+    def launch():
+        nonlocal next_index, next_start
+        engine = engines[next_index]
+        next_index += 1
+        cancel = threading.Event()
+        now = time.monotonic()
+        future = _executor.submit(bind_context(_traced_run), engine, cancel)
+        pending[future] = (engine, now + policy.deadline(engine.name), cancel)
+        next_start = now + stagger
+
+    def finish(text, engine_name):
+        for future, (engine, _, cancel) in pending.items():
+            cancel.set()
+            future.cancel()
+            attempts.setdefault(engine.name, "cancelled")
+        result = EngineResult(text, engine_name, time.monotonic() - start, attempts)
+        engine_stats.record(result)
+        return result
+
+    if engines:
+        launch()
+    while pending or next_index < len(engines):
+        now = time.monotonic()
+        if next_index < len(engines) and (not pending or now >= next_start):
+            launch()
+            continue
+
+        wake_at = min(deadline for _, deadline, _ in pending.values())
+        if next_index < len(engines):
+            wake_at = min(wake_at, next_start)
+        # No deadline and nothing left to start: wait for an answer however long it takes
+        timeout = max(0.0, wake_at - now) if math.isfinite(wake_at) else None
+        done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            engine, _, _ = pending.pop(future)
+            next_start = time.monotonic()
+            try:
+                text = future.result()
+            except Exception as e:
+                logger.warning("%s extraction failed: %s", engine.name, e)
+                attempts[engine.name] = "error"
+                continue
+            if text and text.strip():
+                attempts[engine.name] = "won"
+                return finish(text, engine.name)
+            attempts[engine.name] = "empty"
+
+        now = time.monotonic()
+        for future, (engine, deadline, cancel) in list(pending.items()):
+            if now >= deadline and not future.done():
+                logger.warning("%s missed its %.1fs deadline", engine.name, policy.deadline(engine.name))
+                cancel.set()
+                future.cancel()
+                del pending[future]
+                attempts[engine.name] = "timeout"
+                next_start = now
+
+    return finish("", "none")
@@ -0,0 +1,151 @@
+"""Gemini Vision engine: model construction and upload normalization
+
+google.generativeai is slow to import, so it is only loaded when the first
+model is built, and the model is built once per process.
+"""
+import logging
+import os
+import threading
+from functools import lru_cache
+from io import BytesIO
+
+from PIL import Image
+
+from ink2deck.gemini_client import CircuitOpenError, get_gemini_client
+from ink2deck.tracing import span
+
+logger = logging.getLogger(__name__)
+
+GEMINI_MODEL_NAME = 'gemini-1.5-pro'
+# Long edge, in pixels, that images are shrunk to before upload; 0 disables resizing
+GEMINI_MAX_EDGE = int(os.getenv("INK2DECK_GEMINI_MAX_EDGE", "2048"))
+GEMINI_JPEG_QUALITY = int(os.getenv("INK2DECK_GEMINI_JPEG_QUALITY", "85"))
+# Base URL of a Gemini-compatible server (e.g. python -m ink2deck.gemini_stub); talks REST when set
+GEMINI_ENDPOINT = os.getenv("INK2DECK_GEMINI_ENDPOINT")
+
+
+def gemini_enabled():
+    return bool(os.getenv("GEMINI_API_KEY"))
+
+
+@lru_cache(maxsize=None)
+def _build_model(api_key, model_name, endpoint=None):
+    import google.generativeai as genai
+
+    if endpoint:
+        genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": endpoint})
+    else:
+        genai.configure(api_key=api_key)
+    return genai.GenerativeModel(model_name)
+
+
+def get_model():
+    """Process-wide Gemini model if an API key is configured, otherwise None"""
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        return None
+    return _build_model(api_key, GEMINI_MODEL_NAME, GEMINI_ENDPOINT)
+
+
+class UploadStats:
+    """Running totals of what is actually sent to Gemini"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.bytes_sent = 0
+        self.by_format = {}
+        self.last = None
+
+    def record(self, size, mime, original_size, sent_size):
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += size
+            self.by_format[mime] = self.by_format.get(mime, 0) + 1
+            self.last = {"bytes": size, "mime": mime, "original_size": original_size, "sent_size": sent_size}
+        logger.info("Gemini upload: %d bytes as %s (%sx%s -> %sx%s)", size, mime, *original_size, *sent_size)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "bytes_sent": self.bytes_sent,
+                "avg_bytes": self.bytes_sent // self.requests if self.requests else 0,
+                "by_format": dict(self.by_format),
+                "last": self.last,
+            }
+
+
+gemini_upload_stats = UploadStats()
+
+
+def _is_bilevel(image):
+    if image.mode == "1":
+        return True
+    if image.mode != "L":
+        return False
+    colors = image.getcolors(2)
+    return colors is not None and {value for _, value in colors} <= {0, 255}
+
+
+def normalize_for_upload(image, max_edge=GEMINI_MAX_EDGE, jpeg_quality=GEMINI_JPEG_QUALITY, bilevel=None):
+    """Shrink to max_edge and encode as compactly as OCR allows
+
+    Bilevel images (the usual OCR input) go out as 1-bit PNG,
+    which is both lossless and tiny. Anything else is tried as JPEG and WebP
+    and the smaller one wins. Returns (bytes, mime_type, sent_size).
+    """
+    if bilevel is None:
+        bilevel = _is_bilevel(image)
+    if max_edge and max(image.size) > max_edge:
+        image = image.copy()
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        if bilevel:
+            # Resampling introduces greys at stroke edges; snap back to black/white
+            image = image.convert("L").point(lambda p: 255 if p >= 128 else 0)
+
+    if bilevel:
+        stream = BytesIO()
+        image.convert("1").save(stream, format="PNG", optimize=True)
+        return stream.getvalue(), "image/png", image.size
+
+    rgb = image.convert("RGB") if image.mode not in ("RGB", "L") else image
+    candidates = []
+    for fmt, mime in (("JPEG", "image/jpeg"), ("WEBP", "image/webp")):
+        stream = BytesIO()
+        try:
+            rgb.save(stream, format=fmt, quality=jpeg_quality, optimize=True)
+        except (OSError, KeyError, ValueError):
+            # WebP support depends on how Pillow was built
+            continue
+        candidates.append((len(stream.getvalue()), stream.getvalue(), mime))
+    _, data, mime = min(candidates)
+    return data, mime, image.size
+
+
+def extract_text_with_gemini(pre, model, timeout=None, cancel=None):
+    """Use Gemini Vision for superior handwriting extraction"""
+    try:
+        image = pre.ocr_image()
+        img_bytes, mime_type, sent_size = normalize_for_upload(image, bilevel=True)
+
+        # The client applies the shared rate limit, retries and circuit breaker;
+        # timeout bounds the whole call so an abandoned one does not hold its thread
+        with span("gemini.generate", bytes_in=len(img_bytes), mime=mime_type) as request:
+            response = get_gemini_client().generate(model, [
+                "Extract all text from this whiteboard/image exactly as written, including equations. "
+                "Preserve line breaks and original language.",
+                {"mime_type": mime_type, "data": img_bytes}
+            ], timeout=timeout, cancel=cancel)
+            gemini_upload_stats.record(len(img_bytes), mime_type, image.size, sent_size)
+            text = response.text if hasattr(response, 'text') else ""
+            request.bytes_out = len(text.encode("utf-8"))
+        return text
+    except CircuitOpenError:
+        logger.info("Gemini circuit open; skipping to the next engine")
+        return ""
+    except Exception as e:
+        logger.warning("Gemini extraction failed: %s", e)
+        return ""
+
+
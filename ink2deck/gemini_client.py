@@ -0,0 +1,259 @@
+"""Shared Gemini call layer: rate limit, in-flight cap, retries and a circuit breaker
+
+Every Gemini request in the process goes through one GeminiClient, so a burst
+of uploads is spread out by the token bucket instead of tripping the quota,
+and when the API keeps failing the breaker rejects calls immediately and the
+engine policy moves straight on to Tesseract.
+"""
+import logging
+import math
+import os
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Requests per second and burst size of the token bucket; 0 disables rate limiting
+GEMINI_RATE = float(os.getenv("INK2DECK_GEMINI_RPS", "2"))
+GEMINI_BURST = int(os.getenv("INK2DECK_GEMINI_BURST", "4"))
+# Requests in flight at once, across every session and job
+GEMINI_CONCURRENCY = int(os.getenv("INK2DECK_GEMINI_CONCURRENCY", "4"))
+GEMINI_MAX_RETRIES = int(os.getenv("INK2DECK_GEMINI_MAX_RETRIES", "3"))
+GEMINI_BACKOFF_BASE = int(os.getenv("INK2DECK_GEMINI_BACKOFF_MS", "500")) / 1000
+GEMINI_BACKOFF_MAX = int(os.getenv("INK2DECK_GEMINI_BACKOFF_MAX_MS", "8000")) / 1000
+# Consecutive failed requests (retries included) that open the breaker, and how long it stays open
+BREAKER_FAILURES = int(os.getenv("INK2DECK_GEMINI_BREAKER_FAILURES", "5"))
+BREAKER_RESET = int(os.getenv("INK2DECK_GEMINI_BREAKER_RESET_MS", "30000")) / 1000
+
+# HTTP statuses (google.api_core exceptions carry them as .code) worth retrying
+RETRYABLE_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling Gemini while the breaker is open"""
+
+
+class CallCancelled(RuntimeError):
+    """The caller gave up (its engine lost or missed its deadline) before a request was sent"""
+
+
+def is_retryable(error):
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return getattr(error, "code", None) in RETRYABLE_CODES
+
+
+def is_throttled(error):
+    return getattr(error, "code", None) == 429
+
+
+class TokenBucket:
+    """Allows rate requests per second on average with bursts of up to burst"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        # Take a token if one is available, otherwise say how long until one is
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, cancel=None, deadline=None):
+        """Block until a token is taken; False if cancelled or deadline (monotonic) passes first"""
+        if self.rate <= 0:
+            return True
+        while True:
+            delay = self._reserve()
+            if delay == 0:
+                return True
+            if deadline is not None and time.monotonic() + delay > deadline:
+                return False
+            if _sleep(delay, cancel):
+                return False
+
+
+class CircuitBreaker:
+    """closed -> open after failure_threshold consecutive failures -> half-open probe after reset_after"""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, failure_threshold=BREAKER_FAILURES, reset_after=BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_after:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self):
+        """Whether a call may go out now; in half-open only one probe is let through"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_after:
+                    return False
+                self._state = self.HALF_OPEN
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("Gemini circuit closed")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning("Gemini circuit opened after %d failures", self._failures)
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def release(self):
+        # A probe that ended without a verdict (cancelled) frees the slot for the next caller
+        with self._lock:
+            self._probing = False
+
+
+class ClientStats:
+    """Request outcomes at the Gemini client layer"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"calls": 0, "ok": 0, "retries": 0, "throttled": 0, "failed": 0, "rejected": 0}
+
+    def add(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counts)
+
+
+class GeminiClient:
+    """Wraps model.generate_content with the limits shared by every caller"""
+
+    def __init__(self, rate=GEMINI_RATE, burst=GEMINI_BURST, concurrency=GEMINI_CONCURRENCY,
+                 max_retries=GEMINI_MAX_RETRIES, backoff_base=GEMINI_BACKOFF_BASE,
+                 backoff_max=GEMINI_BACKOFF_MAX, breaker=None):
+        self.limiter = TokenBucket(rate, burst)
+        self.in_flight = threading.BoundedSemaphore(max(1, concurrency))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.stats = ClientStats()
+
+    def backoff(self, attempt):
+        # Full jitter: callers that failed together do not come back together
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def generate(self, model, contents, timeout=None, cancel=None):
+        """model.generate_content(contents) with rate limiting, retries and the breaker
+
+        timeout bounds the whole call, retries and waits included. Raises
+        CircuitOpenError without calling the API while the breaker is open,
+        CallCancelled if cancel is set first, and the last error otherwise.
+        """
+        deadline = time.monotonic() + timeout if timeout and math.isfinite(timeout) else None
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self.stats.add("rejected")
+                raise CircuitOpenError("Gemini circuit is open")
+            try:
+                return self._attempt(model, contents, deadline, cancel)
+            except CallCancelled:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                retryable = is_retryable(e)
+                if is_throttled(e):
+                    self.stats.add("throttled")
+                if retryable:
+                    self.breaker.record_failure()
+                else:
+                    # The API answered; a bad request says nothing about its health
+                    self.breaker.release()
+                delay = self.backoff(attempt)
+                out_of_time = deadline is not None and time.monotonic() + delay >= deadline
+                if not retryable or attempt >= self.max_retries or out_of_time:
+                    self.stats.add("failed")
+                    raise
+                attempt += 1
+                self.stats.add("retries")
+                logger.info("Gemini attempt %d failed (%s); retrying in %.2fs", attempt, e, delay)
+                if _sleep(delay, cancel):
+                    raise CallCancelled("cancelled during backoff") from e
+
+    def _attempt(self, model, contents, deadline, cancel):
+        if not self.limiter.acquire(cancel, deadline):
+            raise CallCancelled("no rate-limit token before the deadline")
+        # Wait for a slot in short steps so a cancelled caller leaves the queue
+        while not self.in_flight.acquire(timeout=0.1):
+            if (cancel is not None and cancel.is_set()) or (deadline is not None and time.monotonic() >= deadline):
+                raise CallCancelled("no request slot before the deadline")
+        try:
+            self.stats.add("calls")
+            # The API library retries 5xx answers itself, past any timeout; retries are ours
+            request_options = {"retry": None}
+            if deadline is not None:
+                request_options["timeout"] = max(1.0, deadline - time.monotonic())
+            response = model.generate_content(contents, request_options=request_options)
+        finally:
+            self.in_flight.release()
+        self.breaker.record_success()
+        self.stats.add("ok")
+        return response
+
+    def snapshot(self):
+        return dict(self.stats.snapshot(), breaker=self.breaker.state)
+
+
+def _sleep(seconds, cancel):
+    """Sleep, waking early if cancel is set; True if cancelled"""
+    if cancel is None:
+        time.sleep(seconds)
+        return False
+    return cancel.wait(seconds)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_gemini_client():
+    """Process-wide GeminiClient so every session shares one quota and one breaker"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = GeminiClient()
+        return _client
@@ -0,0 +1,131 @@
+"""Local stand-in for the Gemini REST API with configurable latency and 429s
+
+    python -m ink2deck.gemini_stub --port 8765 --latency-ms 800 --throttle-rate 0.3
+    INK2DECK_GEMINI_ENDPOINT=http://127.0.0.1:8765 GEMINI_API_KEY=stub streamlit run app.py
+
+It answers generateContent with canned text, so the rate limiter, retries and
+circuit breaker can be exercised without a key or quota. FakeModel is the
+in-process, deterministic equivalent used by the benchmarks.
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+
+class StubConfig:
+    """Behaviour knobs; may be changed while the server runs (e.g. to simulate an outage)"""
+
+    def __init__(self, latency=0.5, jitter=0.2, throttle_rate=0.0, error_rate=0.0, text=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.text = text or "Stub transcription\n\nSecond block"
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.responses = {}
+
+    def count(self, status):
+        with self._lock:
+            self.requests += 1
+            self.responses[status] = self.responses.get(status, 0) + 1
+
+
+class FakeModel:
+    """Stands in for genai.GenerativeModel: fixed latency, text derived from the image bytes"""
+
+    def __init__(self, latency=0.05, blocks=3):
+        self.latency = latency
+        self.blocks = blocks
+
+    def generate_content(self, contents, request_options=None):
+        time.sleep(self.latency)
+        digest = hashlib.sha256(contents[-1]["data"]).hexdigest()
+        # Blank-line separated blocks, so decks get one slide per block
+        return SimpleNamespace(text="\n\n".join(
+            f"Block {i + 1}: {digest[i * 8:(i + 1) * 8]}\nf(x) = x^{i + 2} + {i}" for i in range(self.blocks)
+        ))
+
+
+def _handler(config):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            config.count(status)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if ":generateContent" not in self.path:
+                self._reply(404, {"error": {"code": 404, "message": "not found", "status": "NOT_FOUND"}})
+                return
+            time.sleep(max(0.0, config.latency + random.uniform(-config.jitter, config.jitter)))
+            roll = random.random()
+            if roll < config.throttle_rate:
+                self._reply(429, {"error": {
+                    "code": 429, "message": "Resource has been exhausted (e.g. check quota).",
+                    "status": "RESOURCE_EXHAUSTED",
+                }})
+            elif roll < config.throttle_rate + config.error_rate:
+                self._reply(503, {"error": {"code": 503, "message": "The model is overloaded.", "status": "UNAVAILABLE"}})
+            else:
+                self._reply(200, {
+                    "candidates": [{
+                        "content": {"parts": [{"text": config.text}], "role": "model"},
+                        "finishReason": "STOP",
+                        "index": 0,
+                    }],
+                })
+
+    return Handler
+
+
+def start_stub(config=None, host="127.0.0.1", port=0):
+    """Serve on a background thread; returns (server, endpoint URL). Stop with server.shutdown()"""
+    server = ThreadingHTTPServer((host, port), _handler(config or StubConfig()))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="gemini-stub").start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=int, default=500)
+    parser.add_argument("--jitter-ms", type=int, default=200)
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 503")
+    parser.add_argument("--text", help="transcription returned for every image")
+    args = parser.parse_args()
+
+    config = StubConfig(
+        args.latency_ms / 1000, args.jitter_ms / 1000, args.throttle_rate, args.error_rate, args.text
+    )
+    server = ThreadingHTTPServer((args.host, args.port), _handler(config))
+    print(f"Gemini stub on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"{config.requests} requests: {config.responses}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""Conversions shared through MongoDB: OCR text per image, decks in GridFS, per-user history
+
+    conversions         one document per image, _id = its OCR cache key (content hash of
+                        the image plus engine and preprocessing settings), holding the text
+    decks (GridFS)      deck bytes, filename = the deck's artifact key (content hash of its
+                        texts, images and build options)
+    conversion_history  the batches each user converted, newest first
+
+Any replica, and any user, that is sent the same board again gets its text
+and decks from here instead of reprocessing. Everything expires
+INK2DECK_HISTORY_TTL_DAYS after it was last used: TTL indexes remove
+documents, and a periodic sweep removes GridFS files (a TTL index on
+decks.files would orphan their chunks). A user's history is capped at
+INK2DECK_HISTORY_QUOTA_MB of text and decks and INK2DECK_HISTORY_MAX_ENTRIES
+batches, oldest dropped first.
+
+Only active when MongoDB is configured (MONGO_URI, or INK2DECK_MONGO_MOCK=1
+for mongomock). Store errors are logged and treated as misses, and the
+store is skipped for a while after one, so an outage never fails a
+conversion.
+"""
+import functools
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import gridfs
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import PyMongoError
+
+from ink2deck.db import get_db, mongo_configured
+from ink2deck.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# 0 disables the shared store even when MongoDB is configured
+HISTORY_ENABLED = os.getenv("INK2DECK_HISTORY", "1") != "0"
+# Days after its last use that a conversion, deck or history entry expires
+HISTORY_TTL = timedelta(days=float(os.getenv("INK2DECK_HISTORY_TTL_DAYS", "30")))
+# Per-user caps; 0 means no cap
+HISTORY_QUOTA_BYTES = int(float(os.getenv("INK2DECK_HISTORY_QUOTA_MB", "100")) * 1024 * 1024)
+HISTORY_MAX_ENTRIES = int(os.getenv("INK2DECK_HISTORY_MAX_ENTRIES", "200"))
+HISTORY_PAGE_SIZE = int(os.getenv("INK2DECK_HISTORY_PAGE_SIZE", "10"))
+# Seconds the store is skipped after an error, and between sweeps for expired decks
+RETRY_AFTER = 60
+SWEEP_INTERVAL = 600
+
+DECKS_BUCKET = "decks"
+
+_state_lock = threading.Lock()
+_down_until = 0.0
+_last_sweep = None
+
+
+def history_enabled():
+    """True when the shared store is configured and not backing off after an error"""
+    return HISTORY_ENABLED and time.monotonic() >= _down_until and mongo_configured()
+
+
+def _tolerant(default=None):
+    """Store errors are logged and return default; the store is skipped for RETRY_AFTER seconds"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            global _down_until
+            if not history_enabled():
+                return default
+            try:
+                return fn(*args, **kwargs)
+            except PyMongoError as e:
+                logger.warning("History store unavailable (%s): %s", fn.__name__, e)
+                with _state_lock:
+                    _down_until = time.monotonic() + RETRY_AFTER
+                return default
+        return wrapper
+    return decorator
+
+
+def _now():
+    # Mongo stores milliseconds; truncating here keeps cursors round-trippable
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+def _bucket(db):
+    return gridfs.GridFS(db, collection=DECKS_BUCKET)
+
+
+def ensure_history_indexes(db):
+    """TTL expiry, the per-user listing and the deck sweep"""
+    db["conversions"].create_index([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl")
+    history = db["conversion_history"]
+    history.create_index([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl")
+    history.create_index([("owner", ASCENDING), ("batch_key", ASCENDING)], unique=True, name="owner_batch_unique")
+    history.create_index(
+        [("owner", ASCENDING), ("converted_at", DESCENDING), ("_id", DESCENDING)], name="owner_recent"
+    )
+    db[f"{DECKS_BUCKET}.files"].create_index([("filename", ASCENDING)], name="filename")
+    db[f"{DECKS_BUCKET}.files"].create_index([("metadata.expires_at", ASCENDING)], name="expires_at")
+
+
+# ---------------------------------------------
+# Shared results
+# ---------------------------------------------
+
+@_tolerant()
+def find_text(key):
+    """Stored OCR text for an OCR cache key, or None; a hit extends its expiry"""
+    with span("mongo.find_text") as s:
+        now = _now()
+        doc = get_db()["conversions"].find_one_and_update(
+            {"_id": key},
+            {"$set": {"used_at": now, "expires_at": now + HISTORY_TTL}},
+            projection={"text": 1},
+        )
+        s.attrs["hit"] = doc is not None
+        if doc is None:
+            return None
+        s.bytes_out = len(doc["text"].encode("utf-8"))
+        return doc["text"]
+
+
+@_tolerant(default=False)
+def save_text(key, text, engine=None):
+    with span("mongo.save_text", bytes_in=len(text.encode("utf-8"))):
+        now = _now()
+        get_db()["conversions"].update_one(
+            {"_id": key},
+            {
+                "$set": {"text": text, "engine": engine, "used_at": now, "expires_at": now + HISTORY_TTL},
+                "$setOnInsert": {"created_at": now},
+            },
+            upsert=True,
+        )
+    return True
+
+
+@_tolerant()
+def load_deck(key):
+    """Stored deck bytes for a deck artifact key, or None; a hit extends its expiry"""
+    with span("mongo.load_deck") as s:
+        db = get_db()
+        doc = db[f"{DECKS_BUCKET}.files"].find_one_and_update(
+            {"filename": key},
+            {"$set": {"metadata.expires_at": _now() + HISTORY_TTL}},
+            projection={"_id": 1},
+        )
+        s.attrs["hit"] = doc is not None
+        if doc is None:
+            return None
+        data = _bucket(db).get(doc["_id"]).read()
+        s.bytes_out = len(data)
+    return data
+
+
+@_tolerant(default=False)
+def save_deck(key, kind, data):
+    """Store deck bytes under their artifact key unless another replica already did"""
+    db = get_db()
+    with span("mongo.save_deck", bytes_in=len(data), kind=kind) as s:
+        if db[f"{DECKS_BUCKET}.files"].find_one({"filename": key}, {"_id": 1}) is not None:
+            s.attrs["exists"] = True
+            return True
+        _bucket(db).put(data, filename=key, metadata={"kind": kind, "expires_at": _now() + HISTORY_TTL})
+    _maybe_sweep(db)
+    return True
+
+
+def _maybe_sweep(db):
+    global _last_sweep
+    with _state_lock:
+        if _last_sweep is not None and time.monotonic() - _last_sweep < SWEEP_INTERVAL:
+            return
+        _last_sweep = time.monotonic()
+    purge_expired_decks(db)
+
+
+def purge_expired_decks(db=None, limit=500):
+    """Delete GridFS decks past their expiry (files and chunks); returns how many"""
+    db = db if db is not None else get_db()
+    bucket = _bucket(db)
+    removed = 0
+    with span("mongo.purge_decks") as s:
+        expired = db[f"{DECKS_BUCKET}.files"].find(
+            {"metadata.expires_at": {"$lt": _now()}}, {"_id": 1}
+        ).limit(limit)
+        for doc in list(expired):
+            bucket.delete(doc["_id"])
+            removed += 1
+        s.attrs["removed"] = removed
+    if removed:
+        logger.info("Removed %d expired deck(s) from GridFS", removed)
+    return removed
+
+
+# ---------------------------------------------
+# Per-user history
+# ---------------------------------------------
+
+def _entry_bytes(entry):
+    return entry.get("text_bytes", 0) + sum(deck.get("bytes", 0) for deck in entry.get("decks", {}).values())
+
+
+@_tolerant(default=False)
+def record_conversion(owner, batch_key, names, conversion_keys, texts):
+    """Add (or move to the top) a user's converted batch"""
+    if not owner:
+        return False
+    with span("mongo.record_conversion", images=len(names)):
+        now = _now()
+        get_db()["conversion_history"].update_one(
+            {"owner": owner, "batch_key": batch_key},
+            {
+                "$set": {
+                    "names": list(names),
+                    "conversion_ids": list(conversion_keys),
+                    "text_bytes": sum(len(text.encode("utf-8")) for text in texts),
+                    "converted_at": now,
+                    "expires_at": now + HISTORY_TTL,
+                },
+                "$setOnInsert": {"decks": {}},
+            },
+            upsert=True,
+        )
+        _enforce_quota(owner)
+    return True
+
+
+@_tolerant(default=False)
+def record_deck(owner, batch_key, kind, key, size):
+    """Point a history entry at its latest deck of one kind
+
+    The deck it replaces (an earlier build, before a text edit) is deleted
+    unless another entry still points at it, so edits do not pile up decks
+    outside the quota.
+    """
+    if not owner:
+        return False
+    with span("mongo.record_deck", kind=kind):
+        previous = get_db()["conversion_history"].find_one_and_update(
+            {"owner": owner, "batch_key": batch_key},
+            {"$set": {f"decks.{kind}": {"key": key, "bytes": size}, "expires_at": _now() + HISTORY_TTL}},
+            projection={f"decks.{kind}": 1},
+            return_document=ReturnDocument.BEFORE,
+        )
+        old = (previous or {}).get("decks", {}).get(kind)
+        if old is not None and old["key"] != key:
+            _drop_unreferenced_decks([old["key"]])
+        _enforce_quota(owner)
+    return True
+
+
+def _enforce_quota(owner):
+    """Drop a user's oldest entries past HISTORY_MAX_ENTRIES or HISTORY_QUOTA_BYTES; the newest always stays"""
+    history = get_db()["conversion_history"]
+    entries = history.find(
+        {"owner": owner}, {"text_bytes": 1, "decks": 1}
+    ).sort([("converted_at", DESCENDING), ("_id", DESCENDING)])
+    total = 0
+    evicted = []
+    for index, entry in enumerate(entries):
+        total += _entry_bytes(entry)
+        over_count = HISTORY_MAX_ENTRIES and index >= HISTORY_MAX_ENTRIES
+        over_size = HISTORY_QUOTA_BYTES and total > HISTORY_QUOTA_BYTES
+        if index and (over_count or over_size):
+            evicted.append(entry)
+    if not evicted:
+        return
+    history.delete_many({"_id": {"$in": [entry["_id"] for entry in evicted]}})
+    _drop_unreferenced_decks([deck["key"] for entry in evicted for deck in entry.get("decks", {}).values()])
+    logger.info("History quota for %s: dropped %d oldest entr(y/ies)", owner, len(evicted))
+
+
+def _drop_unreferenced_decks(keys):
+    """Delete decks no remaining history entry points at; shared conversions are left to expire"""
+    db = get_db()
+    history = db["conversion_history"]
+    bucket = _bucket(db)
+    for key in set(keys):
+        referenced = history.find_one(
+            {"$or": [{f"decks.{kind}.key": key} for kind in ("pdf", "pptx")]}, {"_id": 1}
+        )
+        if referenced is None:
+            for doc in db[f"{DECKS_BUCKET}.files"].find({"filename": key}, {"_id": 1}):
+                bucket.delete(doc["_id"])
+
+
+def _encode_cursor(entry):
+    return f"{entry['converted_at'].isoformat()}_{entry['_id']}"
+
+
+def _decode_cursor(cursor):
+    converted_at, entry_id = cursor.rsplit("_", 1)
+    return datetime.fromisoformat(converted_at), ObjectId(entry_id)
+
+
+@_tolerant(default=([], None))
+def history_page(owner, cursor=None, limit=HISTORY_PAGE_SIZE):
+    """(entries, next cursor or None): one page of a user's history, newest first
+
+    The cursor is the (converted_at, _id) of the page's last entry, so pages
+    stay consistent while entries are added and are served from the
+    owner_recent index without skipping.
+    """
+    query = {"owner": owner}
+    if cursor:
+        converted_at, entry_id = _decode_cursor(cursor)
+        query["$or"] = [
+            {"converted_at": {"$lt": converted_at}},
+            {"converted_at": converted_at, "_id": {"$lt": entry_id}},
+        ]
+    with span("mongo.history_page") as s:
+        entries = list(
+            get_db()["conversion_history"].find(query, {"conversion_ids": 0})
+            .sort([("converted_at", DESCENDING), ("_id", DESCENDING)])
+            .limit(limit + 1)
+        )
+        s.attrs["entries"] = len(entries)
+    more = len(entries) > limit
+    entries = entries[:limit]
+    for entry in entries:
+        entry["bytes"] = _entry_bytes(entry)
+    return entries, _encode_cursor(entries[-1]) if more else None
+
+
+@_tolerant(default=False)
+def delete_entry(owner, entry_id):
+    with span("mongo.delete_entry"):
+        history = get_db()["conversion_history"]
+        entry = history.find_one_and_delete({"_id": ObjectId(entry_id), "owner": owner}, {"decks": 1})
+        if entry is None:
+            return False
+        _drop_unreferenced_decks([deck["key"] for deck in entry.get("decks", {}).values()])
+    return True
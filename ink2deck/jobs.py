@@ -0,0 +1,304 @@
+"""Background job queue so OCR and deck builds run outside the Streamlit script
+
+Jobs are registered handlers run on a bounded thread pool. A handler gets its
+payload and a report(progress, message) callback and returns a result. The
+page submits a job, keeps the ID in session state and polls for status.
+
+By default jobs live in memory. Setting INK2DECK_JOB_DB to a file path
+persists them in SQLite; jobs that were queued or running when the process
+stopped are picked up again on start-up.
+
+A job's payload is dropped once it finishes. Finished jobs stay in memory
+while they are among the newest 500, younger than INK2DECK_JOB_MAX_AGE_HOURS
+and their results fit in INK2DECK_JOB_RESULT_MB; the store keeps the newest
+500 within the same age, and older rows are deleted at start-up and whenever
+a job finishes.
+"""
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from ink2deck.tracing import trace
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+# Finished jobs older than this are deleted from INK2DECK_JOB_DB
+JOB_MAX_AGE = float(os.getenv("INK2DECK_JOB_MAX_AGE_HOURS", "24")) * 3600
+# Finished results kept in memory beyond this are only served from INK2DECK_JOB_DB
+JOB_RESULT_BYTES = int(float(os.getenv("INK2DECK_JOB_RESULT_MB", "256")) * 1024 * 1024)
+
+_handlers = {}
+
+
+def register(kind):
+    """Decorator registering fn(payload, report) as the handler for a job kind"""
+    def decorator(fn):
+        _handlers[kind] = fn
+        return fn
+    return decorator
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    payload: object
+    key: str = None
+    owner: str = None
+    status: str = QUEUED
+    progress: float = 0.0
+    message: str = ""
+    result: object = None
+    error: str = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    # Approximate size of result in bytes, set when the job finishes
+    size: int = 0
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+
+class SqliteJobStore:
+    """Write-through persistence for jobs"""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY, kind TEXT, key TEXT, owner TEXT, status TEXT,
+                progress REAL, message TEXT, payload BLOB, result BLOB, error TEXT,
+                created_at REAL, updated_at REAL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (status, updated_at)")
+        self._conn.commit()
+
+    def save(self, job, with_payload=False):
+        with self._lock:
+            if with_payload:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job.id, job.kind, job.key, job.owner, job.status, job.progress, job.message,
+                     pickle.dumps(job.payload), pickle.dumps(job.result), job.error,
+                     job.created_at, job.updated_at),
+                )
+            elif job.finished:
+                # Finished jobs no longer carry their payload
+                self._conn.execute(
+                    "UPDATE jobs SET status=?, progress=?, message=?, payload=?, result=?, error=?, updated_at=? WHERE id=?",
+                    (job.status, job.progress, job.message, pickle.dumps(None), pickle.dumps(job.result),
+                     job.error, job.updated_at, job.id),
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE jobs SET status=?, progress=?, message=?, result=?, error=?, updated_at=? WHERE id=?",
+                    (job.status, job.progress, job.message, pickle.dumps(job.result), job.error,
+                     job.updated_at, job.id),
+                )
+            self._conn.commit()
+
+    def load(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id=?", (job_id,)).fetchone()
+        return self._to_job(row) if row else None
+
+    def unfinished(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING)
+            ).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    def prune(self, keep, max_age=JOB_MAX_AGE):
+        """Delete finished jobs beyond the newest keep or older than max_age seconds; returns how many"""
+        with self._lock:
+            cursor = self._conn.execute(
+                """DELETE FROM jobs WHERE status IN (?, ?) AND (updated_at < ? OR id NOT IN (
+                    SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY updated_at DESC LIMIT ?
+                ))""",
+                (DONE, FAILED, time.time() - max_age, DONE, FAILED, keep),
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    @staticmethod
+    def _to_job(row):
+        (job_id, kind, key, owner, status, progress, message, payload, result, error,
+         created_at, updated_at) = row
+        return Job(
+            id=job_id, kind=kind, key=key, owner=owner, status=status, progress=progress,
+            message=message, payload=pickle.loads(payload), result=pickle.loads(result),
+            error=error, created_at=created_at, updated_at=updated_at,
+        )
+
+
+class JobQueue:
+    """Bounded-concurrency background executor with job status tracking"""
+
+    def __init__(self, max_workers=2, store=None, history=500, max_result_bytes=JOB_RESULT_BYTES,
+                 max_age=JOB_MAX_AGE):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ink2deck-job")
+        self._store = store
+        self._history = history
+        self._max_result_bytes = max_result_bytes
+        self._max_age = max_age
+        self._jobs = OrderedDict()
+        self._by_key = {}
+        self._lock = threading.Lock()
+        # Notified whenever a job finishes, for wait()
+        self._finished = threading.Condition(self._lock)
+        if store is not None:
+            removed = store.prune(history, max_age)
+            if removed:
+                logger.info("Removed %d finished job(s) from the job store", removed)
+            for job in store.unfinished():
+                logger.info("Resuming %s job %s after restart", job.kind, job.id)
+                job.status, job.progress = QUEUED, 0.0
+                self._track(job)
+                self._executor.submit(self._run, job)
+
+    def submit(self, kind, payload, key=None, owner=None):
+        """Queue a job and return its ID; a live or finished job with the same key is reused"""
+        if kind not in _handlers:
+            raise ValueError(f"No handler registered for job kind {kind!r}")
+        with self._lock:
+            if key is not None and key in self._by_key:
+                existing = self._jobs.get(self._by_key[key])
+                if existing is not None and existing.status != FAILED:
+                    return existing.id
+            job = Job(id=uuid.uuid4().hex, kind=kind, payload=payload, key=key, owner=owner)
+            self._track(job)
+        if self._store is not None:
+            self._store.save(job, with_payload=True)
+        self._executor.submit(self._run, job)
+        return job.id
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self._store is not None:
+            job = self._store.load(job_id)
+        return job
+
+    def wait(self, job_id, timeout=None):
+        """Block until the job finishes or timeout passes; returns the job (None if unknown)"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._finished:
+            while True:
+                job = self._jobs.get(job_id)
+                if job is None or job.finished:
+                    break
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    break
+                self._finished.wait(remaining)
+        return job if job is not None else self.get(job_id)
+
+    def _track(self, job):
+        # Caller holds the lock (or is the constructor)
+        self._jobs[job.id] = job
+        if job.key is not None:
+            self._by_key[job.key] = job.id
+        self._evict()
+
+    def _evict(self):
+        """Forget finished jobs past the count, result-size and age limits, oldest first
+
+        The most recently finished job is always kept, so whoever is waiting
+        for it can read its result even without a store. Caller holds the lock.
+        """
+        finished = sorted((job for job in self._jobs.values() if job.finished), key=lambda job: job.updated_at)
+        total = sum(job.size for job in finished)
+        cutoff = time.time() - self._max_age
+        for index, old in enumerate(finished[:-1]):
+            if (len(finished) - index <= self._history and total <= self._max_result_bytes
+                    and old.updated_at >= cutoff):
+                break
+            total -= old.size
+            del self._jobs[old.id]
+            if self._by_key.get(old.key) == old.id:
+                del self._by_key[old.key]
+
+    def _update(self, job, **changes):
+        for name, value in changes.items():
+            setattr(job, name, value)
+        job.updated_at = time.time()
+        if job.finished:
+            job.payload = None
+            job.size = _size(job.result)
+        if self._store is not None:
+            try:
+                self._store.save(job)
+                if job.finished:
+                    self._store.prune(self._history, self._max_age)
+            except Exception as e:
+                logger.warning("Could not persist job %s: %s", job.id, e)
+        if job.finished:
+            with self._finished:
+                self._evict()
+                self._finished.notify_all()
+
+    def _run(self, job):
+        self._update(job, status=RUNNING, message="Started")
+
+        def report(progress, message=""):
+            self._update(job, progress=progress, message=message)
+
+        try:
+            # The job ID doubles as its trace ID, so the page can look its stages up
+            with trace(f"job.{job.kind}", trace_id=job.id, owner=job.owner):
+                result = _handlers[job.kind](job.payload, report)
+        except Exception as e:
+            logger.exception("%s job %s failed", job.kind, job.id)
+            self._update(job, status=FAILED, error=str(e), message="Failed")
+            return
+        # status last: pollers and wait() treat DONE as "result is ready"
+        self._update(job, progress=1.0, result=result, message="Done", status=DONE)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+def _size(value):
+    """Rough in-memory size of a job result: the bytes and text it holds"""
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(_size(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_size(item) for item in value)
+    return 0
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Process-wide queue, shared by every session"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            # Handlers must be registered before resumed jobs are scheduled
+            import ink2deck.tasks  # noqa: F401
+
+            db_path = os.getenv("INK2DECK_JOB_DB")
+            _queue = JobQueue(
+                max_workers=int(os.getenv("INK2DECK_JOB_WORKERS", "2")),
+                store=SqliteJobStore(db_path) if db_path else None,
+            )
+        return _queue
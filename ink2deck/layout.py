@@ -0,0 +1,269 @@
+"""Page layout: slide-sized text regions from one Tesseract pass, and figure crops
+
+Tesseract's word boxes (image_to_data) are grouped into paragraphs and then
+merged, in reading order, into regions of at most INK2DECK_LAYOUT_MAX_LINES
+lines, so one recognition pass yields the slide breaks as well as the text.
+
+Figures are ink blocks made mostly of strokes that are too tall or too long
+to be handwriting (boxes, arrows, axes, sketches). They are found on the
+binarized page without any OCR, so decks get them whichever engine read the
+text; their words are left out of the Tesseract text and the block is
+embedded as a small cropped image next to its slide instead. Each upload is
+scanned once, on its OCR input (see figure_boxes), and the deck builders
+crop the same boxes. With INK2DECK_LAYOUT_FIGURES=0 nothing is scanned and
+every word stays in the text.
+"""
+import logging
+import os
+from collections import namedtuple
+from dataclasses import dataclass, field
+from io import BytesIO
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from ink2deck.cache import cache_key, get_cache
+from ink2deck.preprocess import PreprocessedImage, default_config, load_image
+from ink2deck.regions import detect_text_regions, sort_reading_order
+
+logger = logging.getLogger(__name__)
+
+# Lines of text per region (slide) before a new one is started
+LAYOUT_MAX_LINES = int(os.getenv("INK2DECK_LAYOUT_MAX_LINES", "12"))
+# Words Tesseract is less sure of than this (0-100) are dropped as noise
+LAYOUT_MIN_CONFIDENCE = float(os.getenv("INK2DECK_LAYOUT_MIN_CONFIDENCE", "30"))
+# Embed figure crops in decks; 0 keeps text-only slides
+LAYOUT_FIGURES = os.getenv("INK2DECK_LAYOUT_FIGURES", "1") != "0"
+# A block is a figure when less than this share of its ink is handwriting-sized strokes
+FIGURE_MAX_TEXT_SHARE = float(os.getenv("INK2DECK_FIGURE_MAX_TEXT_SHARE", "0.4"))
+# Smallest and largest figure, as fractions of the page area (the photo slide already
+# shows the whole page), and most figures per page
+FIGURE_MIN_AREA = float(os.getenv("INK2DECK_FIGURE_MIN_AREA", "0.01"))
+FIGURE_MAX_AREA = float(os.getenv("INK2DECK_FIGURE_MAX_AREA", "0.5"))
+FIGURE_LIMIT = int(os.getenv("INK2DECK_FIGURE_LIMIT", "4"))
+# Long edge and JPEG quality of embedded figure crops
+FIGURE_MAX_EDGE = int(os.getenv("INK2DECK_FIGURE_MAX_EDGE", "800"))
+FIGURE_JPEG_QUALITY = int(os.getenv("INK2DECK_FIGURE_JPEG_QUALITY", "80"))
+
+Word = namedtuple("Word", "text conf x y w h block par line")
+
+
+@dataclass
+class Region:
+    """A text or figure block of a page, in the binarized image's pixel coordinates"""
+    kind: str  # "text" or "figure"
+    box: tuple  # (x, y, w, h)
+    lines: list = field(default_factory=list)
+
+    @property
+    def text(self):
+        return "\n".join(self.lines)
+
+
+@dataclass
+class PageLayout:
+    regions: list
+
+    @property
+    def text(self):
+        """Text regions separated by blank lines, which the deck builders treat as slide breaks"""
+        return "\n\n".join(region.text for region in self.regions if region.kind == "text" and region.lines)
+
+    @property
+    def figures(self):
+        return [region for region in self.regions if region.kind == "figure"]
+
+
+def _union(boxes):
+    x0 = min(b[0] for b in boxes)
+    y0 = min(b[1] for b in boxes)
+    x1 = max(b[0] + b[2] for b in boxes)
+    y1 = max(b[1] + b[3] for b in boxes)
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+def _inside(box, outer):
+    # A word belongs to a figure when its centre does
+    cx, cy = box[0] + box[2] / 2, box[1] + box[3] / 2
+    x, y, w, h = outer
+    return x <= cx <= x + w and y <= cy <= y + h
+
+
+def paragraphs(words, min_confidence=LAYOUT_MIN_CONFIDENCE):
+    """[(box, [line text, ...])] per Tesseract paragraph, words in line order"""
+    grouped = {}
+    for word in words:
+        if word.conf < min_confidence:
+            continue
+        grouped.setdefault((word.block, word.par), {}).setdefault(word.line, []).append(word)
+    result = []
+    for lines in grouped.values():
+        texts, boxes = [], []
+        for _, line_words in sorted(lines.items()):
+            line_words.sort(key=lambda w: w.x)
+            texts.append(" ".join(w.text.strip() for w in line_words))
+            boxes.extend((w.x, w.y, w.w, w.h) for w in line_words)
+        result.append((_union(boxes), texts))
+    return result
+
+
+def cluster_regions(words, max_lines=LAYOUT_MAX_LINES):
+    """Text regions in reading order, each at most max_lines lines
+
+    Consecutive paragraphs are merged while they sit in the same column, less
+    than two line heights apart, and the region still fits on a slide.
+    """
+    paras = paragraphs(words)
+    if not paras:
+        return []
+    line_height = float(np.median([w.h for w in words])) if words else 0.0
+    by_box = {}
+    for box, texts in paras:
+        by_box.setdefault(box, []).extend(texts)
+
+    regions = []
+    for box in sort_reading_order(list(by_box)):
+        texts = by_box[box]
+        current = regions[-1] if regions else None
+        if current is not None:
+            x, y, w, h = current.box
+            gap = box[1] - (y + h)
+            same_column = box[0] < x + w and x < box[0] + box[2]
+            if same_column and gap < 2 * line_height and len(current.lines) + len(texts) <= max_lines:
+                current.box = _union([current.box, box])
+                current.lines.extend(texts)
+                continue
+        # A paragraph longer than a slide is split into slide-sized regions
+        for start in range(0, len(texts), max_lines):
+            regions.append(Region("text", box, list(texts[start:start + max_lines])))
+    return regions
+
+
+def find_figures(binary, min_area=FIGURE_MIN_AREA, max_area=FIGURE_MAX_AREA, max_text_share=FIGURE_MAX_TEXT_SHARE,
+                 limit=FIGURE_LIMIT):
+    """Figure regions of a binarized page (white background, dark ink), largest first up to limit
+
+    Handwriting breaks into many small connected strokes of about the same
+    height; diagrams are dominated by a few strokes that are much taller or
+    longer. Each ink block is scored by the share of its ink in glyph-sized
+    components.
+    """
+    ink = (binary == 0).astype(np.uint8)
+    count, _, stats, centroids = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    if count <= 1:
+        return []
+    stats, centroids = stats[1:], centroids[1:]
+    areas = stats[:, cv2.CC_STAT_AREA]
+    widths, heights = stats[:, cv2.CC_STAT_WIDTH], stats[:, cv2.CC_STAT_HEIGHT]
+    significant = areas >= 10
+    if not significant.any():
+        return []
+    glyph_height = float(np.median(heights[significant]))
+    glyph_like = significant & (heights <= 2.5 * glyph_height) & (widths <= 20 * glyph_height)
+
+    page_area = binary.shape[0] * binary.shape[1]
+    figures = []
+    for box in detect_text_regions(binary):
+        x, y, w, h = box
+        if not min_area * page_area <= w * h <= max_area * page_area:
+            continue
+        members = (
+            significant
+            & (centroids[:, 0] >= x) & (centroids[:, 0] < x + w)
+            & (centroids[:, 1] >= y) & (centroids[:, 1] < y + h)
+        )
+        total = int(areas[members].sum())
+        if not total:
+            continue
+        text_share = int(areas[members & glyph_like].sum()) / total
+        if text_share < max_text_share:
+            figures.append(Region("figure", box))
+    figures.sort(key=lambda region: region.box[2] * region.box[3], reverse=True)
+    return figures[:limit]
+
+
+def analyze(binary, words, figures=None):
+    """PageLayout of a binarized page from its Tesseract words; words inside figures are dropped
+
+    figures are the page's figure boxes when the caller already has them
+    (see figure_boxes); otherwise they are found here, unless
+    LAYOUT_FIGURES is off.
+    """
+    if figures is None:
+        figures = find_figures(binary) if LAYOUT_FIGURES else []
+    else:
+        figures = [Region("figure", tuple(box)) for box in figures]
+    words = [
+        word for word in words
+        if not any(_inside((word.x, word.y, word.w, word.h), figure.box) for figure in figures)
+    ]
+    regions = cluster_regions(words) + figures
+    order = {box: i for i, box in enumerate(sort_reading_order([region.box for region in regions]))}
+    regions.sort(key=lambda region: order[region.box])
+    return PageLayout(regions)
+
+
+def _encode_crop(image, box, max_edge, quality):
+    x, y, w, h = box
+    crop = image.crop((x, y, x + w, y + h))
+    crop.thumbnail((max_edge, max_edge))
+    stream = BytesIO()
+    # Crops of a photo: JPEG is a fraction of the PNG size
+    crop.save(stream, format="JPEG", quality=quality)
+    return stream.getvalue()
+
+
+def figure_boxes(image_bytes, config=None, pre=None):
+    """(deskew angle, [figure box]) of one upload, found on its OCR input
+
+    OCR passes the PreprocessedImage it already has (pre); the deck builders
+    then get the cached result instead of decoding and binarizing again.
+    """
+    config = config or default_config()
+    key = cache_key(
+        "figure_boxes", image_bytes, config.params(), FIGURE_MAX_TEXT_SHARE, FIGURE_MIN_AREA, FIGURE_MAX_AREA,
+        FIGURE_LIMIT
+    )
+
+    def compute():
+        page = pre if pre is not None else PreprocessedImage.from_bytes(image_bytes, config)
+        binary = page.ocr_input
+        angle = page.skew_angle if config.deskew and abs(page.skew_angle) >= 0.1 else 0.0
+        boxes = [region.box for region in find_figures(binary)]
+        logger.info("Found %d figure(s) in %dx%d page", len(boxes), binary.shape[1], binary.shape[0])
+        return angle, boxes
+
+    return get_cache("figure_boxes", max_items=256).get_or_compute(key, compute, should_store=lambda found: True)
+
+
+def page_figures(image_bytes, config=None):
+    """[(JPEG bytes, (x, y) centre as a fraction of the page)] for the figures in one upload, top to bottom
+
+    Cached per upload, so every deck build and rebuild reuses the crops.
+    """
+    config = config or default_config()
+    key = cache_key(
+        "figures", image_bytes, config.params(), FIGURE_MAX_TEXT_SHARE, FIGURE_MIN_AREA, FIGURE_MAX_AREA,
+        FIGURE_LIMIT, FIGURE_MAX_EDGE, FIGURE_JPEG_QUALITY
+    )
+
+    def compute():
+        angle, boxes = figure_boxes(image_bytes, config)
+        if not boxes:
+            return []
+        # Colour decode at the OCR size, turned like the OCR input, so boxes and pixels line up
+        image = load_image(image_bytes, config.max_edge, gray=False)
+        image = image.convert("RGB") if image.mode not in ("RGB", "L") else image
+        if angle:
+            image = image.rotate(angle, resample=Image.BILINEAR, fillcolor="white")
+        width, height = image.size
+        figures = []
+        for box in sorted(boxes, key=lambda box: box[1]):
+            x, y, w, h = box
+            center = ((x + w / 2) / width, (y + h / 2) / height)
+            figures.append((_encode_crop(image, box, FIGURE_MAX_EDGE, FIGURE_JPEG_QUALITY), center))
+        return figures
+
+    # Empty lists are cached too, so text-only pages are not scanned again
+    return get_cache("figures", max_items=64).get_or_compute(key, compute, should_store=lambda figures: True)
@@ -0,0 +1,200 @@
+"""Images for decks: deduplicated, downsampled to their rendered size, compactly encoded
+
+Both deck builders register every placement (image bytes plus the box it is
+drawn in, in inches) before building, then embed what fit() prepared:
+
+    media = MediaLayer()
+    media.want(photo, 6, 4.5)
+    media.fit()
+    data = media.get(photo, 6, 4.5)
+
+Each distinct (image, box) is encoded once per deck, and encodings are kept
+per process so a rebuild after a text edit reuses them. Images are scaled to
+INK2DECK_MEDIA_DPI at their rendered size and saved as PNG when they have few
+colours or transparency, JPEG otherwise. With INK2DECK_DECK_MAX_MB set, lower
+JPEG qualities and resolutions are tried until the deck's images fit.
+"""
+import hashlib
+import logging
+import math
+import os
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+from ink2deck.cache import cache_key, get_cache
+
+logger = logging.getLogger(__name__)
+
+# Pixels per inch of the rendered size; slides are viewed on screens and projectors
+MEDIA_DPI = int(os.getenv("INK2DECK_MEDIA_DPI", "150"))
+MEDIA_JPEG_QUALITY = int(os.getenv("INK2DECK_MEDIA_JPEG_QUALITY", "85"))
+# Budget for a deck's images, in MB; 0 means no budget
+DECK_MAX_BYTES = int(float(os.getenv("INK2DECK_DECK_MAX_MB", "0")) * 1024 * 1024)
+# (JPEG quality, share of MEDIA_DPI) tried in order until the images fit the budget
+BUDGET_STEPS = ((MEDIA_JPEG_QUALITY, 1.0), (75, 1.0), (70, 0.75), (60, 0.6), (50, 0.5), (40, 0.35))
+# Images with at most this many colours (diagrams, binarized scans, screenshots) are saved as PNG
+PNG_MAX_COLORS = 64
+# Uploads at most this much larger than their box are embedded as they are at full quality:
+# shrinking them saves little and re-encoding often makes a well-compressed JPEG bigger
+KEEP_MAX_OVERSIZE = 1.25
+
+# EXIF orientations that swap width and height
+_TRANSPOSED = {5, 6, 7, 8}
+
+
+def _orientation(image):
+    try:
+        return image.getexif().get(0x0112, 1)
+    except Exception:
+        return 1
+
+
+def _is_flat(image):
+    """Transparency or few colours: lossless PNG is both smaller and sharper than JPEG"""
+    if image.mode in ("1", "P", "RGBA", "LA", "PA") or "transparency" in image.info:
+        return True
+    # Nearest-neighbour sampling adds no colours, unlike a filtered thumbnail
+    sample = image.resize((min(128, image.width), min(128, image.height)), Image.NEAREST)
+    return sample.getcolors(maxcolors=PNG_MAX_COLORS) is not None
+
+
+def prepare_image(data, max_width, max_height, quality=MEDIA_JPEG_QUALITY):
+    """(bytes, format) of data at most max_width x max_height pixels, upright
+
+    An upright JPEG or PNG is kept byte for byte when it is at most
+    KEEP_MAX_OVERSIZE times its box at full quality (without decoding it), or
+    when re-encoding does not make it smaller.
+    """
+    with Image.open(BytesIO(data)) as probe:
+        source_format = probe.format
+        orientation = _orientation(probe)
+        width, height = probe.size
+    if orientation in _TRANSPOSED:
+        width, height = height, width
+    scale = min(1.0, max_width / width, max_height / height)
+    target = (max(1, round(width * scale)), max(1, round(height * scale)))
+    upright = source_format in ("JPEG", "PNG") and orientation == 1
+    if upright and quality >= MEDIA_JPEG_QUALITY and scale * KEEP_MAX_OVERSIZE >= 1:
+        return bytes(data), source_format
+
+    image = Image.open(BytesIO(data))
+    if image.format == "JPEG" and scale < 1:
+        # libjpeg scales by 1/2, 1/4 or 1/8 while decoding; draft() never goes below the request
+        request = target if orientation not in _TRANSPOSED else target[::-1]
+        image.draft(None, request)
+    image.load()
+    ImageOps.exif_transpose(image, in_place=True)
+    if image.size != target:
+        image = image.resize(target, Image.LANCZOS, reducing_gap=2.0)
+
+    stream = BytesIO()
+    if _is_flat(image):
+        image_format = "PNG"
+        if image.mode not in ("1", "L", "P", "RGB", "RGBA", "LA"):
+            image = image.convert("RGBA")
+        image.save(stream, format="PNG", optimize=True)
+    else:
+        image_format = "JPEG"
+        if image.mode not in ("L", "RGB"):
+            image = image.convert("RGB")
+        image.save(stream, format="JPEG", quality=quality, optimize=True)
+    encoded = stream.getvalue()
+
+    if upright and len(data) <= len(encoded):
+        return bytes(data), source_format
+    return encoded, image_format
+
+
+def _media_cache():
+    # Encodings are cheap to redo after a restart, so keep them in memory only
+    return get_cache("media", max_items=64, disk=False)
+
+
+class MediaLayer:
+    """One deck's images: every placement registered, each distinct (image, box) prepared once"""
+
+    def __init__(self, dpi=MEDIA_DPI, budget=DECK_MAX_BYTES, steps=BUDGET_STEPS):
+        self.dpi = dpi
+        self.budget = budget
+        self.steps = steps
+        self.step = steps[0]
+        self.placements = 0
+        self._sources = {}
+        self._prepared = {}
+        # id(data) -> (data, digest): the same bytes object is placed and looked up more than once
+        self._digests = {}
+
+    def _key(self, data, width_in, height_in):
+        known = self._digests.get(id(data))
+        if known is None or known[0] is not data:
+            known = self._digests[id(data)] = (data, hashlib.sha256(data).hexdigest())
+        return known[1], round(width_in, 2), round(height_in, 2) if height_in else None
+
+    def want(self, data, width_in, height_in=None):
+        """Register a placement of data in a width_in x height_in inch box (height None: width only)"""
+        key = self._key(data, width_in, height_in)
+        self._sources.setdefault(key, data)
+        self.placements += 1
+        return key
+
+    def _prepare(self, key, step):
+        digest, width_in, height_in = key
+        quality, share = step
+        dpi = self.dpi * share
+        max_width = math.ceil(width_in * dpi)
+        max_height = math.ceil(height_in * dpi) if height_in else 1 << 30
+        return _media_cache().get_or_compute(
+            cache_key("media", digest, max_width, max_height, quality),
+            lambda: prepare_image(self._sources[key], max_width, max_height, quality),
+        )
+
+    def fit(self):
+        """Prepare every registered image at the first budget step whose total fits"""
+        for step in self.steps:
+            self.step = step
+            self._prepared = {key: self._prepare(key, step) for key in self._sources}
+            if not self.budget or self.embedded_bytes <= self.budget:
+                break
+        else:
+            logger.warning(
+                "Deck images need %d bytes, over the %d byte budget even at quality %d and %.0f dpi",
+                self.embedded_bytes, self.budget, self.step[0], self.dpi * self.step[1]
+            )
+        return self
+
+    def get(self, data, width_in, height_in=None):
+        """The bytes to embed for a placement registered with want()"""
+        key = self._key(data, width_in, height_in)
+        if key not in self._prepared:
+            # Not registered before fit(): prepared on its own, outside the budget
+            self._sources.setdefault(key, data)
+            self._prepared[key] = self._prepare(key, self.step)
+        return self._prepared[key][0]
+
+    @property
+    def source_bytes(self):
+        # Distinct source images, each counted once however many boxes it is placed in
+        return sum(len(data) for data in {key[0]: data for key, data in self._sources.items()}.values())
+
+    @property
+    def embedded_bytes(self):
+        # Two boxes that come out at the same pixels embed one picture
+        return sum(len(data) for data in {data for data, _ in self._prepared.values()})
+
+    def report(self):
+        """Sizes before and after, for build stats and the debug panel"""
+        formats = {}
+        for _, image_format in self._prepared.values():
+            formats[image_format] = formats.get(image_format, 0) + 1
+        return {
+            "images": self.placements,
+            "unique": len(self._prepared),
+            "source_bytes": self.source_bytes,
+            "embedded_bytes": self.embedded_bytes,
+            "formats": formats,
+            "jpeg_quality": self.step[0],
+            "dpi": round(self.dpi * self.step[1]),
+            "budget_bytes": self.budget or None,
+            "within_budget": not self.budget or self.embedded_bytes <= self.budget,
+        }
@@ -0,0 +1,212 @@
+"""OCR engines and parallel batch extraction"""
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from ink2deck.cache import cache_key, get_ocr_cache
+from ink2deck.engines import Engine, default_policy, run_engines
+from ink2deck.gemini import (
+    GEMINI_JPEG_QUALITY, GEMINI_MAX_EDGE, GEMINI_MODEL_NAME, extract_text_with_gemini, gemini_enabled
+)
+from ink2deck.gemini_client import GEMINI_CONCURRENCY
+from ink2deck.layout import (
+    FIGURE_LIMIT, FIGURE_MAX_AREA, FIGURE_MAX_TEXT_SHARE, FIGURE_MIN_AREA, LAYOUT_FIGURES, LAYOUT_MAX_LINES,
+    LAYOUT_MIN_CONFIDENCE, figure_boxes
+)
+from ink2deck.preprocess import PreprocessedImage, default_config
+from ink2deck.regions import crop, detect_text_regions
+from ink2deck.tesseract_pool import TESSERACT_WORKERS, get_tesseract_pool
+from ink2deck.tracing import bind_context, span
+
+logger = logging.getLogger(__name__)
+
+# Images smaller than this are OCR'd whole; splitting them costs more than it saves
+TILE_MIN_PIXELS = int(os.getenv("INK2DECK_TILE_MIN_PIXELS", "2000000"))
+# White margin crop() adds around each block, subtracted again from word boxes
+CROP_BORDER = 10
+
+
+def extract_text_with_tesseract(binary, cancel=None):
+    """Extract text using Tesseract OCR from an already binarized array"""
+    # pytesseract drags in pandas when it is installed; only pay for it when used
+    import pytesseract
+
+    try:
+        return pytesseract.image_to_string(binary, config='--psm 6')
+    except Exception as e:
+        logger.warning("Tesseract extraction failed: %s", e)
+        return ""
+
+
+def extract_text_with_ocr(pre, model=None, tesseract=extract_text_with_tesseract, policy=None):
+    """Text extraction under the configured engine policy (Gemini preferred, Tesseract fallback)"""
+    policy = policy or default_policy()
+    engines = []
+    # Gemini goes first if API key exists
+    if model is not None and gemini_enabled():
+        engines.append(Engine(
+            "gemini", lambda cancel: extract_text_with_gemini(pre, model, policy.deadline("gemini"), cancel)
+        ))
+    # Tesseract reads the same binarized array Gemini got
+    engines.append(Engine("tesseract", lambda cancel: tesseract(pre.ocr_input, cancel=cancel)))
+    try:
+        result = run_engines(engines, policy)
+    except Exception as e:
+        logger.warning("OCR failed: %s", e)
+        return ""
+    logger.info("OCR engine %s won in %.0f ms (%s)", result.engine, result.latency * 1000, result.attempts)
+    return result.text
+
+
+def ocr_engine_name(use_gemini=None):
+    if use_gemini is None:
+        use_gemini = gemini_enabled()
+    return f"{GEMINI_MODEL_NAME}+tesseract" if use_gemini else "tesseract"
+
+
+def ocr_cache_key(image_bytes, use_gemini=None, config=None):
+    """Cache key for one upload: its bytes, the engine chain, preprocessing and layout parameters"""
+    config = config or default_config()
+    return cache_key(
+        image_bytes, ocr_engine_name(use_gemini), config.params(),
+        {
+            "max_edge": GEMINI_MAX_EDGE, "jpeg_quality": GEMINI_JPEG_QUALITY,
+            "layout_max_lines": LAYOUT_MAX_LINES, "tile_min_pixels": TILE_MIN_PIXELS,
+            "layout_min_confidence": LAYOUT_MIN_CONFIDENCE, "layout_figures": LAYOUT_FIGURES,
+            "figure_max_text_share": FIGURE_MAX_TEXT_SHARE, "figure_min_area": FIGURE_MIN_AREA,
+            "figure_max_area": FIGURE_MAX_AREA, "figure_limit": FIGURE_LIMIT,
+        }
+    )
+
+
+def cached_ocr(image_bytes, model=None, tesseract=None, config=None):
+    """Preprocess + OCR one upload, going through the shared result cache
+
+    Without a tesseract callable the layout pass runs, with the upload's
+    figure boxes found once and kept for the deck builders.
+    """
+    config = config or default_config()
+
+    use_gemini = model is not None and gemini_enabled()
+    key = ocr_cache_key(image_bytes, use_gemini, config)
+
+    with span("ocr.image", bytes_in=len(image_bytes), cached=True) as image_span:
+        def compute():
+            # Shared with every replica through MongoDB when it is configured
+            from ink2deck.history import find_text, save_text
+
+            text = find_text(key)
+            if text is not None:
+                return text
+            image_span.attrs["cached"] = False
+            pre = PreprocessedImage.from_bytes(image_bytes, config)
+
+            def layout_tesseract(binary, cancel=None):
+                figures = figure_boxes(image_bytes, config, pre)[1] if LAYOUT_FIGURES else []
+                return extract_text_layout(binary, cancel=cancel, figures=figures)
+
+            text = extract_text_with_ocr(pre, model, tesseract or layout_tesseract)
+            logger.info(
+                "Preprocessing stages: %s",
+                ", ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in pre.timings.items())
+            )
+            if text.strip():
+                save_text(key, text, ocr_engine_name(use_gemini))
+            return text
+
+        text = get_ocr_cache().get_or_compute(
+            key,
+            compute,
+            should_store=lambda text: bool(text.strip())
+        )
+        image_span.bytes_out = len(text.encode("utf-8"))
+    return text
+
+
+def extract_text_layout(binary, min_pixels=None, cancel=None, figures=None):
+    """Tesseract text from word-box passes, split into slide-sized regions
+
+    Boards of at least min_pixels (INK2DECK_TILE_MIN_PIXELS) with several
+    detected text blocks get one pass per block, in parallel on the Tesseract
+    pool, with word boxes mapped back to page coordinates; only the cropped
+    arrays cross the process boundary. Words inside figures (see
+    layout.find_figures, or the boxes passed as figures) are left out; decks
+    embed those blocks as images instead.
+    """
+    from ink2deck.layout import Word, analyze
+
+    min_pixels = TILE_MIN_PIXELS if min_pixels is None else min_pixels
+    pool = get_tesseract_pool()
+    boxes = detect_text_regions(binary) if binary.size >= min_pixels else []
+    if len(boxes) <= 1:
+        futures = [(pool.submit_data(binary), 0, 0)]
+    else:
+        futures = [
+            (pool.submit_data(crop(binary, box, CROP_BORDER)), box[0] - CROP_BORDER, box[1] - CROP_BORDER)
+            for box in boxes
+        ]
+
+    # Poll so a losing engine gives its queued blocks back to the pool
+    outstanding = {future for future, _, _ in futures}
+    while outstanding:
+        if cancel is not None and cancel.is_set():
+            for future in outstanding:
+                future.cancel()
+            return ""
+        _, outstanding = wait(outstanding, timeout=0.1, return_when=FIRST_COMPLETED)
+
+    with span("layout", words=0, blocks=len(futures)) as layout_span:
+        words = []
+        for number, (future, dx, dy) in enumerate(futures):
+            for text, conf, x, y, w, h, block, par, line in future.result():
+                # Tesseract numbers blocks per call; keep each crop's paragraphs apart
+                words.append(Word(text, conf, x + dx, y + dy, w, h, number * 1000 + block, par, line))
+        layout = analyze(binary, words, figures)
+        layout_span.attrs.update(words=len(words), regions=len(layout.regions), figures=len(layout.figures))
+    return layout.text
+
+
+def ocr_batch(images_bytes, model=None, on_progress=None):
+    """OCR several uploads concurrently, returning texts in upload order
+
+    Gemini calls run on a bounded thread pool; Tesseract fallbacks are handed
+    to the warm Tesseract worker pool. on_progress(done, total, index) is called from the
+    calling thread as each image finishes.
+
+    images_bytes may also be a lazy iterable such as documents.Pages (total is
+    then None): each image is submitted as soon as it is produced, and
+    production pauses while two per worker are waiting, so rendering or
+    video decoding never runs far ahead of OCR.
+    """
+    total = len(images_bytes) if hasattr(images_bytes, "__len__") else None
+    results = []
+    if total == 0:
+        return results
+
+    # Threads only wait on Gemini or the Tesseract pool, so size them to whichever is in use
+    workers = GEMINI_CONCURRENCY if model is not None and gemini_enabled() else TESSERACT_WORKERS
+    workers = min(workers, total) if total else workers
+    pending = {}
+    done = 0
+
+    def collect(finished):
+        nonlocal done
+        for future in finished:
+            index = pending.pop(future)
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                logger.warning("OCR failed for image %d: %s", index + 1, e)
+            done += 1
+            if on_progress:
+                on_progress(done, total, index)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for index, image_bytes in enumerate(images_bytes):
+            results.append("")
+            pending[executor.submit(bind_context(cached_ocr), image_bytes, model)] = index
+            while len(pending) >= 2 * workers:
+                collect(wait(pending, return_when=FIRST_COMPLETED)[0])
+        while pending:
+            collect(wait(pending, return_when=FIRST_COMPLETED)[0])
+    return results
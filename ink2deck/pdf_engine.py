@@ -0,0 +1,222 @@
+"""PDF renderer with a per-process font cache and one page per slide
+
+fpdf2 parses the TTF (and walks its whole cmap to build glyph widths) every
+time add_font() runs. Here that happens once per process: the parsed metrics
+are kept on a template font object and each document gets a cheap clone with
+its own fontTools handle over the cached file bytes, because fpdf2 subsets
+that handle in place when the document is written.
+
+Embedded images get the same treatment: fpdf2's parsed image (for PNGs a full
+decode and re-compression) is kept per image, so rebuilding a deck after a
+text edit only lays out text.
+"""
+import copy
+import hashlib
+import importlib.util
+import logging
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from io import BytesIO
+
+from fontTools import ttLib
+from fpdf import FPDF
+from fpdf.enums import XPos, YPos
+from fpdf.fonts import SubsetMap
+
+from ink2deck.media import MediaLayer
+
+logger = logging.getLogger(__name__)
+
+# Directory holding app.py and the bundled assets
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FONT_FAMILY = "Ink2DeckSans"
+# Parsed images kept for reuse by later documents
+PARSED_IMAGES = 16
+MM_PER_INCH = 25.4
+
+_parsed_images = OrderedDict()
+_parsed_lock = threading.Lock()
+
+
+def _font_candidates():
+    configured = os.getenv("INK2DECK_PDF_FONT")
+    if configured:
+        yield configured
+    for name in ("DejaVuSansCondensed.ttf", "DejaVuSans.ttf"):
+        yield name
+        yield os.path.join(APP_DIR, name)
+    yield "/usr/share/fonts/truetype/dejavu/DejaVuSansCondensed.ttf"
+    yield "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+    yield "/usr/share/fonts/TTF/DejaVuSans.ttf"
+    # matplotlib (in requirements.txt) ships DejaVu Sans; find it without importing matplotlib
+    spec = importlib.util.find_spec("matplotlib")
+    if spec and spec.submodule_search_locations:
+        for location in spec.submodule_search_locations:
+            yield os.path.join(location, "mpl-data", "fonts", "ttf", "DejaVuSans.ttf")
+    yield "arial.ttf"
+
+
+@lru_cache(maxsize=None)
+def unicode_font():
+    """(template TTFFont, font file bytes) parsed once, or None if no TTF is available"""
+    for path in _font_candidates():
+        if not os.path.isfile(path):
+            continue
+        try:
+            with open(path, "rb") as f:
+                font_bytes = f.read()
+            prototype = FPDF()
+            prototype.add_font(FONT_FAMILY, "", path)
+            template = prototype.fonts[FONT_FAMILY.lower()]
+            logger.info("PDF font loaded from %s", path)
+            return template, font_bytes
+        except Exception as e:
+            logger.warning("Could not load PDF font %s: %s", path, e)
+    logger.warning("No Unicode TTF found; PDFs fall back to Latin-1 core fonts")
+    return None
+
+
+def _attach_font(pdf):
+    """Register the cached font on pdf; returns the family to use, or None"""
+    cached = unicode_font()
+    if cached is None:
+        return None
+    template, font_bytes = cached
+    font = copy.copy(template)
+    font.i = len(pdf.fonts) + 1
+    # Per-document state: fresh fontTools handle (subset in place on output),
+    # glyph subset and missing-glyph list; the width tables are shared
+    font.ttfont = ttLib.TTFont(BytesIO(font_bytes), recalcTimestamp=False, fontNumber=0, lazy=True)
+    font.missing_glyphs = []
+    if hasattr(template, "hbfont"):
+        del font.hbfont
+    sbarr = "\x00 \r\n"
+    if pdf.str_alias_nb_pages:
+        sbarr += "0123456789" + pdf.str_alias_nb_pages
+    font.subset = SubsetMap(font, [ord(char) for char in sbarr])
+    pdf.fonts[FONT_FAMILY.lower()] = font
+    return FONT_FAMILY
+
+
+def _latin1(text):
+    # Core fonts only cover Latin-1; replace the rest instead of failing
+    return text.encode("latin-1", errors="replace").decode("latin-1")
+
+
+def _attach_image(pdf, data):
+    """Seed pdf's image cache with an earlier parse of data; returns fpdf2's name for it"""
+    # Same key fpdf2 derives for in-memory images
+    name = hashlib.new("md5", data.strip(), usedforsecurity=False).hexdigest()
+    with _parsed_lock:
+        parsed = _parsed_images.get(name)
+        if parsed is not None:
+            _parsed_images.move_to_end(name)
+    images = pdf.image_cache.images
+    if parsed is not None and name not in images:
+        # A copy of fpdf2's RasterImageInfo (a dict subclass) with this document's numbering
+        info = copy.copy(parsed)
+        info.update(i=len(images) + 1, usages=0)
+        images[name] = info
+    return name
+
+
+def _keep_image(pdf, name):
+    info = pdf.image_cache.images.get(name)
+    # ICC profiles are numbered per document, so those parses cannot move between documents
+    if info is None or info.get("iccp_i") is not None:
+        return
+    with _parsed_lock:
+        _parsed_images[name] = copy.copy(info)
+        _parsed_images.move_to_end(name)
+        while len(_parsed_images) > PARSED_IMAGES:
+            _parsed_images.popitem(last=False)
+
+
+def image_size(data):
+    from PIL import Image
+
+    with Image.open(BytesIO(data)) as image:
+        return image.size
+
+
+def render_pdf(sections, font_size=12, line_height=10, title_size=20, media=None):
+    """PDF bytes for [(text, image_bytes or None), ...]
+
+    Each section gets a page with its source image (when given) followed by
+    one landscape page per slide, using the same blank-line split and figure
+    placement as the PowerPoint builder. Images go through media (a
+    MediaLayer; pass one in to read its size report afterwards).
+    """
+    from ink2deck.decks import slide_blocks
+
+    pdf = FPDF(orientation="landscape", unit="mm", format="A4")
+    pdf.set_auto_page_break(auto=True, margin=15)
+    family = _attach_font(pdf)
+    clean = (lambda text: text) if family else _latin1
+    family = family or "helvetica"
+
+    # Register every image with its box before the first page, so the budget sees them all
+    media = media if media is not None else MediaLayer()
+    body_top = pdf.t_margin + title_size * 0.5 + 4
+    photo_box = (pdf.epw / MM_PER_INCH, (pdf.h - body_top - pdf.b_margin) / MM_PER_INCH)
+
+    def figure_box(count):
+        cell = (pdf.h - body_top - pdf.b_margin - 5 * (count - 1)) / count
+        return (pdf.epw * 0.4 - 5) / MM_PER_INCH, cell / MM_PER_INCH
+
+    planned = []
+    for text, image in sections:
+        blocks = slide_blocks(text, image)
+        if image:
+            media.want(image, *photo_box)
+        for _, figures in blocks:
+            for data in figures:
+                media.want(data, *figure_box(len(figures)))
+        planned.append((image, blocks))
+    media.fit()
+
+    def heading(text):
+        pdf.set_font(family, "", title_size)
+        pdf.multi_cell(0, title_size * 0.5, text=clean(text), new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.ln(4)
+        pdf.set_font(family, "", font_size)
+
+    slide_number = 1
+    for section_number, (image, blocks) in enumerate(planned, 1):
+        if image:
+            image = media.get(image, *photo_box)
+            pdf.add_page()
+            heading(f"Image {section_number}" if len(sections) > 1 else "Whiteboard Content")
+            # Fit inside the remaining page area, keeping the aspect ratio
+            width, height = image_size(image)
+            max_w = pdf.epw
+            max_h = pdf.h - pdf.get_y() - pdf.b_margin
+            scale = min(max_w / width, max_h / height)
+            w, h = width * scale, height * scale
+            name = _attach_image(pdf, image)
+            pdf.image(BytesIO(image), x=pdf.l_margin + (max_w - w) / 2, y=pdf.get_y(), w=w, h=h)
+            _keep_image(pdf, name)
+
+        for content, figures in blocks:
+            figures = [media.get(data, *figure_box(len(figures))) for data in figures]
+            pdf.add_page()
+            heading(f"Slide {slide_number}")
+            top = pdf.get_y()
+            # With figures the text takes the left 60% and the figures are stacked on the right
+            text_width = pdf.epw * 0.6 if figures else 0
+            pdf.multi_cell(text_width, line_height * 0.7, text=clean(content), new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+            if figures:
+                column = pdf.epw * 0.4 - 5
+                cell = (pdf.h - top - pdf.b_margin - 5 * (len(figures) - 1)) / len(figures)
+                for data in figures:
+                    width, height = image_size(data)
+                    scale = min(column / width, cell / height)
+                    pdf.image(BytesIO(data), x=pdf.l_margin + pdf.epw - column, y=top, w=width * scale, h=height * scale)
+                    top += cell + 5
+            slide_number += 1
+
+    if pdf.page == 0:
+        pdf.add_page()
+    return bytes(pdf.output())
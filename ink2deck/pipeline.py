@@ -0,0 +1,62 @@
+"""Image-to-deck pipeline, usable without Streamlit"""
+import time
+from dataclasses import dataclass, field
+
+from ink2deck.decks import create_pdf_for_sections, create_ppt_for_sections, get_pdf_bytes, get_pptx_bytes
+from ink2deck.documents import Pages
+from ink2deck.ocr import ocr_batch
+
+FORMATS = ("pptx", "pdf")
+
+
+@dataclass
+class Conversion:
+    texts: list
+    outputs: dict = field(default_factory=dict)
+    ocr_seconds: float = 0.0
+    build_seconds: float = 0.0
+    # Indexes of the inputs that could not be read (see documents.Pages)
+    unreadable: list = field(default_factory=list)
+
+
+def extract_texts(images_bytes, model=None, on_progress=None):
+    """OCR every image (cached, in parallel), texts in input order"""
+    return ocr_batch(images_bytes, model, on_progress=on_progress)
+
+
+def build_outputs(texts, images_bytes, formats=FORMATS, memoize=True):
+    """Deck bytes per format for [(text, image)] sections
+
+    memoize=False skips the in-memory artifact cache, which only pays off
+    when the same deck is requested again (the web app, not bulk runs).
+    """
+    outputs = {}
+    for fmt in formats:
+        if fmt == "pdf":
+            sections = list(zip(texts, images_bytes))
+            outputs[fmt] = get_pdf_bytes(sections) if memoize else create_pdf_for_sections(sections)
+        elif fmt == "pptx":
+            if memoize:
+                outputs[fmt] = get_pptx_bytes(list(zip(texts, images_bytes)))
+            else:
+                with create_ppt_for_sections(list(zip(texts, images_bytes))) as deck:
+                    outputs[fmt] = deck.read()
+        else:
+            raise ValueError(f"Unknown output format: {fmt}")
+    return outputs
+
+
+def convert(images_bytes, formats=FORMATS, model=None, memoize=True, on_progress=None):
+    """OCR images and build one deck per format with a section per image, and per page of each PDF"""
+    start = time.perf_counter()
+    pages = Pages(images_bytes)
+    texts = extract_texts(pages, model, on_progress)
+    ocr_done = time.perf_counter()
+    outputs = build_outputs(texts, pages.images, formats, memoize) if any(t.strip() for t in texts) else {}
+    return Conversion(
+        texts=texts,
+        outputs=outputs,
+        ocr_seconds=ocr_done - start,
+        build_seconds=time.perf_counter() - ocr_done,
+        unreadable=pages.unreadable_uploads,
+    )
@@ -0,0 +1,195 @@
+"""Shared preprocessing graph: every intermediate is computed at most once per image"""
+import os
+import time
+from dataclasses import asdict, dataclass
+from functools import wraps
+from io import BytesIO
+
+import cv2
+import numpy as np
+from PIL import Image, ImageOps
+
+from ink2deck.tracing import span
+
+
+@dataclass(frozen=True)
+class PreprocessConfig:
+    """Which stages run and with what parameters (also part of the OCR cache key)"""
+    binarization: str = "fixed"  # "fixed", "otsu" or "adaptive"
+    threshold: int = 150
+    adaptive_block_size: int = 31
+    adaptive_c: int = 10
+    deskew: bool = False
+    max_skew: float = 15.0
+    # Long edge uploads are decoded down to (Gemini's upload size); 0 keeps full resolution
+    max_edge: int = 2048
+
+    def params(self):
+        return asdict(self)
+
+
+def default_config():
+    return PreprocessConfig(
+        binarization=os.getenv("INK2DECK_BINARIZATION", "fixed"),
+        threshold=int(os.getenv("INK2DECK_THRESHOLD", "150")),
+        deskew=os.getenv("INK2DECK_DESKEW", "0") == "1",
+        max_edge=int(os.getenv("INK2DECK_DECODE_MAX_EDGE", "2048")),
+    )
+
+
+def load_image(data, max_edge=0, gray=True):
+    """Decode upload bytes at (about) the size OCR needs, upright, in as few passes as possible
+
+    JPEGs are decoded by libjpeg at 1/2, 1/4 or 1/8 scale and, with
+    gray=True, straight to luma, so a large photo never exists at full size in
+    memory. The scale is the smallest that keeps at least 3/4 of max_edge:
+    insisting on the full max_edge would often mean no reduction at all, and
+    OCR reads a 1536 px board as well as a 2048 px one. Anything still larger
+    than max_edge (and every non-JPEG) is then shrunk to it. EXIF orientation
+    is applied last, on the small image.
+    """
+    image = Image.open(BytesIO(data))
+    if image.format == "JPEG":
+        mode = "L" if gray and image.mode in ("RGB", "YCbCr", "L") else None
+        # draft() wants both sides covered, so scale the request to the photo's aspect ratio
+        scale = min(1.0, max_edge * 3 / 4 / max(image.size)) if max_edge else 1.0
+        image.draft(mode, (int(image.width * scale), int(image.height * scale)))
+    image.load()
+    if max_edge and max(image.size) > max_edge:
+        # Area averaging: the fastest filter that does not alias thin strokes away
+        image.thumbnail((max_edge, max_edge), Image.BOX, reducing_gap=None)
+    ImageOps.exif_transpose(image, in_place=True)
+    return image
+
+
+def _stage(func):
+    """Memoize a stage on the instance and record how long it took
+
+    Timings are inclusive: a stage that triggers another one also counts its time.
+    """
+    name = func.__name__
+
+    @wraps(func)
+    def wrapper(self):
+        if name not in self._results:
+            start = time.perf_counter()
+            with span(f"preprocess.{name}"):
+                self._results[name] = func(self)
+            self.timings[name] = time.perf_counter() - start
+        return self._results[name]
+
+    return property(wrapper)
+
+
+class PreprocessedImage:
+    """A decoded image plus lazily computed grayscale/binary/deskewed arrays
+
+    Arrays are shared, not copied: OCR engines and deck builders read the same
+    ndarray objects, so treat them as read-only.
+    """
+
+    def __init__(self, image, config=None):
+        self.image = image
+        self.config = config or default_config()
+        self.timings = {}
+        self._results = {}
+
+    @classmethod
+    def from_bytes(cls, data, config=None):
+        config = config or default_config()
+        start = time.perf_counter()
+        with span("decode", bytes_in=len(data)) as decode:
+            image = load_image(data, config.max_edge)
+            decode.attrs.update(format=image.format, size=image.size, mode=image.mode)
+        instance = cls(image, config)
+        instance.timings["decode"] = time.perf_counter() - start
+        return instance
+
+    @_stage
+    def rgb(self):
+        """H x W x 3 uint8, whatever the source mode (alpha is flattened onto white)"""
+        image = self.image
+        if image.mode in ("I", "I;16", "I;16B", "I;16L", "F"):
+            return cv2.cvtColor(self._scaled_to_uint8(image), cv2.COLOR_GRAY2RGB)
+        if image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info):
+            background = Image.new("RGBA", image.size, (255, 255, 255, 255))
+            background.alpha_composite(image.convert("RGBA"))
+            image = background
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        return np.asarray(image)
+
+    @_stage
+    def gray(self):
+        image = self.image
+        if image.mode == "L":
+            return np.asarray(image)
+        if image.mode == "1":
+            return np.asarray(image.convert("L"))
+        if image.mode in ("I", "I;16", "I;16B", "I;16L", "F"):
+            return self._scaled_to_uint8(image)
+        return cv2.cvtColor(self.rgb, cv2.COLOR_RGB2GRAY)
+
+    @_stage
+    def fixed(self):
+        return cv2.threshold(self.gray, self.config.threshold, 255, cv2.THRESH_BINARY)[1]
+
+    @_stage
+    def otsu(self):
+        return cv2.threshold(self.gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)[1]
+
+    @_stage
+    def adaptive(self):
+        # Copes with uneven lighting and glare across a whiteboard
+        return cv2.adaptiveThreshold(
+            self.gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY,
+            self.config.adaptive_block_size, self.config.adaptive_c
+        )
+
+    @property
+    def binary(self):
+        """Binarized image selected by config.binarization (white background, dark ink)"""
+        if self.config.binarization not in ("fixed", "otsu", "adaptive"):
+            raise ValueError(f"Unknown binarization: {self.config.binarization}")
+        return getattr(self, self.config.binarization)
+
+    @_stage
+    def skew_angle(self):
+        """Dominant text angle in degrees, 0 when it cannot be estimated"""
+        ink = cv2.findNonZero(255 - self.binary)
+        if ink is None or len(ink) < 50:
+            return 0.0
+        angle = cv2.minAreaRect(ink)[-1]
+        if angle > 45:
+            angle -= 90
+        if abs(angle) > self.config.max_skew:
+            return 0.0
+        return float(angle)
+
+    @_stage
+    def deskewed(self):
+        if not self.config.deskew or abs(self.skew_angle) < 0.1:
+            return self.binary
+        h, w = self.binary.shape
+        matrix = cv2.getRotationMatrix2D((w / 2, h / 2), self.skew_angle, 1.0)
+        return cv2.warpAffine(
+            self.binary, matrix, (w, h), flags=cv2.INTER_NEAREST,
+            borderMode=cv2.BORDER_CONSTANT, borderValue=255
+        )
+
+    @property
+    def ocr_input(self):
+        """The array every OCR engine should read"""
+        return self.deskewed
+
+    def ocr_image(self):
+        """ocr_input as a PIL image (for encoders that want one)"""
+        return Image.fromarray(self.ocr_input)
+
+    @staticmethod
+    def _scaled_to_uint8(image):
+        array = np.asarray(image, dtype=np.float32)
+        low, high = float(array.min()), float(array.max())
+        if high <= low:
+            return np.zeros(array.shape, dtype=np.uint8)
+        return ((array - low) * (255.0 / (high - low))).astype(np.uint8)
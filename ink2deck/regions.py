@@ -0,0 +1,56 @@
+"""Text-region detection on binarized whiteboard images"""
+import cv2
+
+
+def detect_text_regions(binary, min_area_ratio=0.0005, padding=8):
+    """Bounding boxes (x, y, w, h) of ink blocks, in reading order
+
+    Ink is dilated with a wide, short kernel so characters merge into words and
+    lines, and nearby lines merge into blocks; each external contour of the
+    result is one block.
+    """
+    h, w = binary.shape[:2]
+    ink = cv2.bitwise_not(binary)
+    # Kernel scales with the photo so the same board gives the same blocks at any resolution
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(9, w // 40), max(5, h // 50)))
+    blocks = cv2.dilate(ink, kernel, iterations=1)
+    contours, _ = cv2.findContours(blocks, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    min_area = min_area_ratio * h * w
+    boxes = []
+    for contour in contours:
+        x, y, bw, bh = cv2.boundingRect(contour)
+        if bw * bh < min_area:
+            continue
+        x0, y0 = max(0, x - padding), max(0, y - padding)
+        x1, y1 = min(w, x + bw + padding), min(h, y + bh + padding)
+        boxes.append((x0, y0, x1 - x0, y1 - y0))
+    return sort_reading_order(boxes)
+
+
+def sort_reading_order(boxes):
+    """Top-to-bottom rows, left-to-right within a row"""
+    rows = []
+    for box in sorted(boxes, key=lambda b: b[1]):
+        x, y, w, h = box
+        center = y + h / 2
+        for row in rows:
+            # Same row if the box's vertical centre falls inside the row's span
+            if row["top"] <= center <= row["bottom"]:
+                row["boxes"].append(box)
+                row["top"] = min(row["top"], y)
+                row["bottom"] = max(row["bottom"], y + h)
+                break
+        else:
+            rows.append({"top": y, "bottom": y + h, "boxes": [box]})
+    ordered = []
+    for row in sorted(rows, key=lambda r: r["top"]):
+        ordered.extend(sorted(row["boxes"], key=lambda b: b[0]))
+    return ordered
+
+
+def crop(binary, box, border=10):
+    """Crop a region with a white margin (Tesseract misses glyphs touching the edge)"""
+    x, y, w, h = box
+    region = binary[y:y + h, x:x + w]
+    return cv2.copyMakeBorder(region, border, border, border, border, cv2.BORDER_CONSTANT, value=255)
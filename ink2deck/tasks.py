@@ -0,0 +1,55 @@
+"""Job handlers for the background queue
+
+Heavy modules are imported inside the handlers so that creating the queue
+(on the first upload page render) does not load OCR or deck libraries.
+Jobs are keyed by content and shared by every user who uploads the same
+boards, so results carry nothing user-specific; the page records history.
+"""
+from ink2deck.jobs import register
+
+
+@register("ocr")
+def ocr_job(payload, report):
+    """{"texts", "images", "keys", "sources", "skipped", "unreadable"}: one entry per photo, PDF page and video keyframe
+
+    sources are (upload index, label suffix) pairs; skipped and unreadable
+    (the skipped PDFs and videos that could not be opened) are upload
+    indexes, so each session names pages after its own file names.
+    """
+    from ink2deck.documents import Pages
+    from ink2deck.gemini import gemini_enabled, get_model
+    from ink2deck.ocr import ocr_batch, ocr_cache_key
+
+    pages = Pages(payload["images"])
+    report(0.0, f"Extracting text from {len(payload['images'])} file(s)...")
+
+    def on_progress(done, total, index):
+        # How many pages there are is only known once every upload has been read
+        report(pages.position * done / len(pages.images), f"Extracted text from {done} page(s)")
+
+    model = get_model()
+    texts = ocr_batch(pages, model, on_progress=on_progress)
+    use_gemini = model is not None and gemini_enabled()
+    return {
+        "texts": texts,
+        "images": pages.images,
+        # Conversion history IDs, which depend on the engine this job used
+        "keys": [ocr_cache_key(image, use_gemini) for image in pages.images],
+        "sources": pages.sources,
+        "skipped": pages.skipped_uploads,
+        "unreadable": pages.unreadable_uploads,
+    }
+
+
+@register("pdf")
+def pdf_job(payload, report):
+    from ink2deck.decks import get_pdf_bytes
+
+    return get_pdf_bytes(payload["sections"])
+
+
+@register("pptx")
+def pptx_job(payload, report):
+    from ink2deck.decks import get_pptx_bytes
+
+    return get_pptx_bytes(payload["sections"])
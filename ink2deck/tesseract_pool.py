@@ -0,0 +1,236 @@
+"""Long-lived Tesseract workers that keep the engine and traineddata loaded
+
+With tesserocr installed each worker process initializes one TessBaseAPI at
+start-up and reuses it for every image, handed over in memory. Without it the
+workers fall back to pytesseract, which still spawns a tesseract process and
+writes temp files per call; the pool logs a warning when it starts that way.
+
+A worker that dies (OOM, a crash in libtesseract) breaks the whole pool; it is
+replaced as soon as a submission or a result reports it, and a background
+health check every INK2DECK_TESSERACT_HEALTH_INTERVAL seconds catches a
+broken pool between conversions.
+"""
+import importlib.util
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+TESSERACT_WORKERS = int(os.getenv("INK2DECK_TESSERACT_WORKERS", str(os.cpu_count() or 1)))
+TESSERACT_LANG = os.getenv("INK2DECK_TESSERACT_LANG", "eng")
+# "auto" uses tesserocr when it is importable, otherwise pytesseract
+TESSERACT_BACKEND = os.getenv("INK2DECK_TESSERACT_BACKEND", "auto")
+TESSERACT_PSM = 6
+# Seconds between background health checks; 0 turns them off
+TESSERACT_HEALTH_INTERVAL = float(os.getenv("INK2DECK_TESSERACT_HEALTH_INTERVAL", "60"))
+
+# Per worker process state, set by _init_worker
+_api = None
+_backend = None
+_lang = TESSERACT_LANG
+_psm = TESSERACT_PSM
+
+
+def _init_worker(backend, lang, psm):
+    global _api, _backend, _lang, _psm
+    _lang, _psm = lang, psm
+    if backend in ("auto", "tesserocr"):
+        try:
+            import tesserocr
+
+            _api = tesserocr.PyTessBaseAPI(lang=lang, psm=tesserocr.PSM(psm))
+            _backend = "tesserocr"
+            return
+        except Exception as e:
+            if backend == "tesserocr":
+                raise
+            # Not installed at all is already reported once, when the pool starts
+            missing = isinstance(e, ModuleNotFoundError) and e.name == "tesserocr"
+            logger.log(logging.INFO if missing else logging.WARNING,
+                       "tesserocr could not be loaded (%s), using pytesseract", e)
+    _backend = "pytesseract"
+
+
+def _ocr(binary):
+    try:
+        if _api is not None:
+            _api.SetImage(Image.fromarray(np.ascontiguousarray(binary)))
+            return _api.GetUTF8Text()
+
+        import pytesseract
+
+        return pytesseract.image_to_string(binary, lang=_lang, config=f'--psm {_psm}')
+    except Exception as e:
+        logger.warning("Tesseract extraction failed: %s", e)
+        return ""
+
+
+def _ocr_data(binary):
+    """Recognized words as (text, conf, x, y, w, h, block, par, line) tuples, from one pass"""
+    try:
+        if _api is not None:
+            import tesserocr
+
+            _api.SetImage(Image.fromarray(np.ascontiguousarray(binary)))
+            _api.Recognize()
+            words = []
+            block = par = line = 0
+            iterator = _api.GetIterator()
+            level = tesserocr.RIL.WORD
+            for word in tesserocr.iterate_level(iterator, level):
+                # Numbered like image_to_data: a new block restarts paragraph and line counts
+                if word.IsAtBeginningOf(tesserocr.RIL.BLOCK):
+                    block, par, line = block + 1, 0, 0
+                if word.IsAtBeginningOf(tesserocr.RIL.PARA):
+                    par, line = par + 1, 0
+                if word.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+                    line += 1
+                text = word.GetUTF8Text(level)
+                box = word.BoundingBox(level)
+                if text and text.strip() and box:
+                    x0, y0, x1, y1 = box
+                    words.append((text, word.Confidence(level), x0, y0, x1 - x0, y1 - y0, block, par, line))
+            return words
+
+        import pytesseract
+
+        data = pytesseract.image_to_data(
+            binary, lang=_lang, config=f'--psm {_psm}', output_type=pytesseract.Output.DICT
+        )
+        return [
+            (text, float(conf), x, y, w, h, block, par, line)
+            for text, conf, x, y, w, h, block, par, line in zip(
+                data["text"], data["conf"], data["left"], data["top"], data["width"], data["height"],
+                data["block_num"], data["par_num"], data["line_num"],
+            )
+            if text and text.strip()
+        ]
+    except Exception as e:
+        logger.warning("Tesseract layout extraction failed: %s", e)
+        return []
+
+
+def _ping():
+    # Exercises the loaded engine, not just the process
+    _ocr(np.full((32, 32), 255, dtype=np.uint8))
+    return {"pid": os.getpid(), "backend": _backend}
+
+
+class TesseractPool:
+    """Bounded process pool of warm Tesseract workers"""
+
+    def __init__(self, workers=TESSERACT_WORKERS, backend=TESSERACT_BACKEND, lang=TESSERACT_LANG, psm=TESSERACT_PSM,
+                 health_interval=0):
+        self.workers = max(1, workers)
+        self.backend = backend
+        self.lang = lang
+        self.psm = psm
+        self.restarts = 0
+        self._lock = threading.Lock()
+        if backend == "auto" and importlib.util.find_spec("tesserocr") is None:
+            logger.warning(
+                "tesserocr is not installed; Tesseract workers use pytesseract, which starts a "
+                "tesseract process per image (see Installation in the README)"
+            )
+        self._executor = self._start()
+        self._stopped = threading.Event()
+        if health_interval > 0:
+            threading.Thread(
+                target=self._monitor, args=(health_interval,), name="ink2deck-tesseract-health", daemon=True
+            ).start()
+
+    def _start(self):
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.backend, self.lang, self.psm),
+        )
+
+    def _restart(self, broken):
+        with self._lock:
+            # Another thread may already have replaced the broken executor
+            if self._executor is broken:
+                logger.warning("Restarting Tesseract worker pool")
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._start()
+                self.restarts += 1
+            return self._executor
+
+    def _submit(self, fn, binary):
+        executor = self._executor
+        try:
+            future = executor.submit(fn, binary)
+        except BrokenProcessPool:
+            executor = self._restart(executor)
+            future = executor.submit(fn, binary)
+
+        def check(done):
+            # A worker died while this call was queued or running; later calls get a fresh pool
+            if not done.cancelled() and isinstance(done.exception(), BrokenProcessPool):
+                self._restart(executor)
+
+        future.add_done_callback(check)
+        return future
+
+    def submit(self, binary):
+        """Future resolving to the text in a binarized uint8 array"""
+        return self._submit(_ocr, binary)
+
+    def submit_data(self, binary):
+        """Future resolving to the words in a binarized uint8 array, with their boxes"""
+        return self._submit(_ocr_data, binary)
+
+    def ocr(self, binary):
+        executor = self._executor
+        try:
+            return executor.submit(_ocr, binary).result()
+        except BrokenProcessPool:
+            # A worker died (OOM, crash in libtesseract); retry once on a fresh pool
+            return self._restart(executor).submit(_ocr, binary).result()
+
+    def health_check(self, timeout=10.0):
+        """Round-trip a probe through a worker; restarts the pool if it is broken
+
+        A probe that times out is queued behind real work, so a busy pool is
+        left alone rather than restarted, which would cancel that work.
+        """
+        executor = self._executor
+        try:
+            future = executor.submit(_ping)
+            return future.result(timeout=timeout)
+        except BrokenProcessPool as e:
+            logger.warning("Tesseract pool health check failed: %s", e)
+            self._restart(executor)
+        except TimeoutError:
+            future.cancel()
+            logger.info("Tesseract pool health check timed out after %g s; pool busy", timeout)
+        except Exception as e:
+            logger.warning("Tesseract pool health check failed: %s", e)
+        return None
+
+    def _monitor(self, interval):
+        while not self._stopped.wait(interval):
+            self.health_check()
+
+    def shutdown(self, wait=True):
+        self._stopped.set()
+        self._executor.shutdown(wait=wait)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_tesseract_pool():
+    """Process-wide warm pool, created on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = TesseractPool(health_interval=TESSERACT_HEALTH_INTERVAL)
+        return _pool
@@ -0,0 +1,308 @@
+"""Lightweight spans: wall/CPU time, bytes in/out and peak memory per stage
+
+    with span("ocr.image", bytes_in=len(data)) as s:
+        ...
+        s.bytes_out = len(text)
+
+Spans nest through a context variable, so a page render or a background job
+(see trace()) collects the tree of stages it ran. Finished spans go to the
+in-memory recent-trace buffer used by the debug panel and to the configured
+sinks: INK2DECK_METRICS_JSONL (one JSON record per span appended to a file)
+and INK2DECK_METRICS_PORT (Prometheus text format on
+http://INK2DECK_METRICS_HOST:port/metrics, localhost only by default).
+
+Worker threads do not inherit context variables; submit through
+bind_context() so their spans join the caller's trace.
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Python-level peak memory per span via tracemalloc; it slows every allocation, so opt-in
+TRACE_MEMORY = os.getenv("INK2DECK_TRACE_MEMORY") == "1"
+METRICS_JSONL = os.getenv("INK2DECK_METRICS_JSONL")
+METRICS_PORT = int(os.getenv("INK2DECK_METRICS_PORT", "0"))
+# Interface the metrics port binds to; 0.0.0.0 exposes it beyond this host
+METRICS_HOST = os.getenv("INK2DECK_METRICS_HOST", "127.0.0.1")
+# Per-render stage breakdown under each page, for staging/debugging
+DEBUG_PANEL = os.getenv("INK2DECK_DEBUG_PANEL") == "1"
+# Traces kept in memory for the debug panel
+TRACE_HISTORY = int(os.getenv("INK2DECK_TRACE_HISTORY", "200"))
+
+_current = contextvars.ContextVar("ink2deck_span", default=None)
+
+
+class Span:
+    """One timed stage; callers may set bytes_in, bytes_out and attrs while it runs"""
+
+    __slots__ = (
+        "trace_id", "span_id", "parent_id", "name", "attrs", "bytes_in", "bytes_out",
+        "started_at", "wall", "cpu", "peak_bytes", "error", "_start", "_cpu_start",
+        "_mem_base", "_mem_peak", "_parent",
+    )
+
+    def __init__(self, name, trace_id, parent, bytes_in=None, attrs=None):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self._parent = parent
+        self.parent_id = parent.span_id if parent is not None else None
+        self.name = name
+        self.attrs = dict(attrs or {})
+        self.bytes_in = bytes_in
+        self.bytes_out = None
+        self.started_at = time.time()
+        self.wall = self.cpu = None
+        self.peak_bytes = None
+        self.error = None
+        self._mem_base = self._mem_peak = 0
+
+    def record(self):
+        return {
+            "trace": self.trace_id,
+            "span": self.span_id,
+            "parent": self.parent_id,
+            "name": self.name,
+            "start": round(self.started_at, 6),
+            "wall_ms": round(self.wall * 1000, 3),
+            "cpu_ms": round(self.cpu * 1000, 3),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "peak_bytes": self.peak_bytes,
+            "max_rss_bytes": _max_rss(),
+            "thread": threading.current_thread().name,
+            "error": self.error,
+            "attrs": self.attrs,
+        }
+
+
+def _max_rss():
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux (bytes on macOS; close enough for a high-water mark)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+@contextmanager
+def span(name, bytes_in=None, **attrs):
+    """Time the block as a child of the current span (or a new trace if there is none)"""
+    parent = _current.get()
+    current = Span(name, parent.trace_id if parent else uuid.uuid4().hex, parent, bytes_in, attrs)
+    token = _current.set(current)
+    if start_memory_tracing():
+        # reset_peak() is process-wide: children report their peak up to the parent,
+        # and concurrent spans in other threads inflate each other's numbers
+        current._mem_base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    current._cpu_start = time.thread_time()
+    current._start = time.perf_counter()
+    try:
+        yield current
+    except Exception as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.wall = time.perf_counter() - current._start
+        current.cpu = time.thread_time() - current._cpu_start
+        if TRACE_MEMORY and tracemalloc.is_tracing():
+            current._mem_peak = max(current._mem_peak, tracemalloc.get_traced_memory()[1])
+            current.peak_bytes = max(0, current._mem_peak - current._mem_base)
+            if parent is not None:
+                parent._mem_peak = max(parent._mem_peak, current._mem_peak)
+        _current.reset(token)
+        _finish(current)
+
+
+@contextmanager
+def trace(name, trace_id=None, **attrs):
+    """Root span of a new trace (a page render, a job), detached from any current span"""
+    token = _current.set(None)
+    try:
+        with span(name, **attrs) as root:
+            if trace_id:
+                root.trace_id = trace_id
+            yield root
+    finally:
+        _current.reset(token)
+
+
+def bind_context(func):
+    """func wrapped to run in a copy of the caller's context, for executor.submit()"""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(func, *args, **kwargs)
+
+
+def start_memory_tracing():
+    """Start tracemalloc if INK2DECK_TRACE_MEMORY=1; False if memory is not traced"""
+    if not TRACE_MEMORY:
+        return False
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    return True
+
+
+class TraceBuffer:
+    """The most recent traces' span records, for the debug panel"""
+
+    def __init__(self, max_traces=TRACE_HISTORY):
+        self._lock = threading.Lock()
+        self._traces = OrderedDict()
+        self._max = max_traces
+
+    def add(self, record):
+        with self._lock:
+            spans = self._traces.setdefault(record["trace"], [])
+            spans.append(record)
+            self._traces.move_to_end(record["trace"])
+            while len(self._traces) > self._max:
+                self._traces.popitem(last=False)
+
+    def get(self, trace_id):
+        with self._lock:
+            return list(self._traces.get(trace_id, ()))
+
+
+recent_traces = TraceBuffer()
+
+
+class JsonlSink:
+    """Appends one JSON object per span to path"""
+
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+
+    def emit(self, record):
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+class PrometheusSink:
+    """Per-stage latency histograms and CPU/bytes/error counters in Prometheus text format"""
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def emit(self, record):
+        seconds = record["wall_ms"] / 1000
+        with self._lock:
+            stage = self._stages.setdefault(record["name"], {
+                "buckets": [0] * len(self.BUCKETS), "count": 0, "sum": 0.0, "cpu": 0.0,
+                "bytes_in": 0, "bytes_out": 0, "errors": 0, "peak": 0,
+            })
+            for i, bound in enumerate(self.BUCKETS):
+                if seconds <= bound:
+                    stage["buckets"][i] += 1
+            stage["count"] += 1
+            stage["sum"] += seconds
+            stage["cpu"] += record["cpu_ms"] / 1000
+            stage["bytes_in"] += record["bytes_in"] or 0
+            stage["bytes_out"] += record["bytes_out"] or 0
+            stage["errors"] += 1 if record["error"] else 0
+            stage["peak"] = max(stage["peak"], record["peak_bytes"] or 0)
+
+    def render(self):
+        lines = [
+            "# HELP ink2deck_stage_seconds Wall time per stage",
+            "# TYPE ink2deck_stage_seconds histogram",
+        ]
+        with self._lock:
+            stages = {name: dict(stage, buckets=list(stage["buckets"])) for name, stage in self._stages.items()}
+        for name, stage in sorted(stages.items()):
+            label = f'stage="{name}"'
+            for bound, count in zip(self.BUCKETS, stage["buckets"]):
+                lines.append(f'ink2deck_stage_seconds_bucket{{{label},le="{bound}"}} {count}')
+            lines.append(f'ink2deck_stage_seconds_bucket{{{label},le="+Inf"}} {stage["count"]}')
+            lines.append(f"ink2deck_stage_seconds_sum{{{label}}} {stage['sum']:.6f}")
+            lines.append(f"ink2deck_stage_seconds_count{{{label}}} {stage['count']}")
+        for metric, key, kind, help_text in (
+            ("ink2deck_stage_cpu_seconds_total", "cpu", "counter", "CPU time of the stage's thread"),
+            ("ink2deck_stage_bytes_in_total", "bytes_in", "counter", "Bytes handed to the stage"),
+            ("ink2deck_stage_bytes_out_total", "bytes_out", "counter", "Bytes produced by the stage"),
+            ("ink2deck_stage_errors_total", "errors", "counter", "Stages that raised"),
+            ("ink2deck_stage_peak_bytes", "peak", "gauge", "Largest traced peak (INK2DECK_TRACE_MEMORY=1)"),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for name, stage in sorted(stages.items()):
+                lines.append(f'{metric}{{stage="{name}"}} {stage[key]:g}')
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="127.0.0.1"):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = sink.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+        logger.info("Prometheus metrics on http://%s:%d/metrics", host, port)
+        return server
+
+
+_sinks = None
+_sinks_lock = threading.Lock()
+
+
+def get_sinks():
+    """Sinks from the environment, created (and the metrics port bound) once per process"""
+    global _sinks
+    with _sinks_lock:
+        if _sinks is None:
+            sinks = []
+            if METRICS_JSONL:
+                sinks.append(JsonlSink(METRICS_JSONL))
+            if METRICS_PORT:
+                prometheus = PrometheusSink()
+                try:
+                    prometheus.serve(METRICS_PORT, METRICS_HOST)
+                    sinks.append(prometheus)
+                except OSError as e:
+                    # Another process (e.g. a second Streamlit worker) already serves it
+                    logger.warning("Metrics port %d unavailable: %s", METRICS_PORT, e)
+            _sinks = sinks
+        return _sinks
+
+
+def _finish(current):
+    record = current.record()
+    recent_traces.add(record)
+    for sink in get_sinks():
+        try:
+            sink.emit(record)
+        except Exception as e:
+            logger.warning("Metrics sink %s failed: %s", type(sink).__name__, e)
@@ -0,0 +1,177 @@
+"""Keyframes of a filmed board: one frame per board state instead of every frame
+
+Frames are sampled at INK2DECK_VIDEO_SAMPLE_FPS and reduced to a small grey
+thumbnail. Frame differencing against the previous sample tells whether the
+board is still (nobody writing or walking past, camera steady); only samples
+that stay still for STABLE_SAMPLES in a row are considered. Their ink masks
+are compared with the current keyframe's:
+
+    little ink added or removed   a duplicate, skipped
+    ink added, little removed     the board grew; the sample replaces the keyframe
+    ink removed                   erased or a new board; the keyframe is final
+
+A keyframe is yielded as soon as the board moves on, so OCR starts on the
+first board while the rest of the video is still being decoded. Only the
+current keyframe is held at full resolution.
+"""
+import logging
+import os
+
+import cv2
+import numpy as np
+
+from ink2deck.tracing import span
+
+logger = logging.getLogger(__name__)
+
+VIDEO_SAMPLE_FPS = float(os.getenv("INK2DECK_VIDEO_SAMPLE_FPS", "2"))
+# Mean absolute grey-level difference (0-255) between samples above which the board is moving
+VIDEO_MOTION_THRESHOLD = float(os.getenv("INK2DECK_VIDEO_MOTION_THRESHOLD", "3"))
+# Share of the ink that must change for a new board state, and be removed for a new keyframe
+VIDEO_CHANGE_THRESHOLD = float(os.getenv("INK2DECK_VIDEO_CHANGE_THRESHOLD", "0.05"))
+VIDEO_ERASE_THRESHOLD = float(os.getenv("INK2DECK_VIDEO_ERASE_THRESHOLD", "0.25"))
+VIDEO_MAX_KEYFRAMES = int(os.getenv("INK2DECK_VIDEO_MAX_KEYFRAMES", "100"))
+STABLE_SAMPLES = 2
+# Width of the thumbnails that motion and ink are measured on
+SIGNATURE_WIDTH = 320
+# Boards with less ink than this share of the thumbnail are blank
+MIN_INK_SHARE = 0.001
+KEYFRAME_JPEG_QUALITY = 90
+
+_DILATE = np.ones((3, 3), np.uint8)
+
+
+def thumbnail(gray):
+    """Small blurred copy of a grey frame; what motion and ink are measured on"""
+    height, width = gray.shape[:2]
+    small = cv2.resize(gray, (SIGNATURE_WIDTH, max(1, round(height * SIGNATURE_WIDTH / width))),
+                       interpolation=cv2.INTER_AREA)
+    return cv2.GaussianBlur(small, (3, 3), 0)
+
+
+def ink_mask(small):
+    """Dark strokes on a light board, as a boolean mask"""
+    return cv2.adaptiveThreshold(small, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 15, 12) > 0
+
+
+def is_blank(mask):
+    return mask.sum() < MIN_INK_SHARE * mask.size
+
+
+def ink_change(old, new):
+    """(added, removed) ink as shares of the larger mask's ink; one pixel of shift is not a change"""
+    if old.shape != new.shape:
+        new = cv2.resize(new.astype(np.uint8), old.shape[::-1], interpolation=cv2.INTER_NEAREST) > 0
+    added = np.count_nonzero(new & ~cv2.dilate(old.astype(np.uint8), _DILATE).astype(bool))
+    removed = np.count_nonzero(old & ~cv2.dilate(new.astype(np.uint8), _DILATE).astype(bool))
+    ink = max(np.count_nonzero(old), np.count_nonzero(new), 1)
+    return added / ink, removed / ink
+
+
+def _encode(frame, max_edge):
+    height, width = frame.shape[:2]
+    if max_edge and max(height, width) > max_edge:
+        scale = max_edge / max(height, width)
+        frame = cv2.resize(frame, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+    ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, KEYFRAME_JPEG_QUALITY])
+    if not ok:
+        raise ValueError("Could not encode video frame")
+    return encoded.tobytes()
+
+
+def _scan(capture, step, fps, frame_count, on_position, stats):
+    """(frame, seconds) per board state, read lazily from an open capture"""
+    # (frame, ink mask, seconds) of the board state being built up
+    keyframe = None
+    last_sample = None
+    previous = None
+    still = 0
+    found = 0
+    index = -1
+    while True:
+        # grab() skips the colour conversion of frames that are not sampled
+        if not capture.grab():
+            break
+        index += 1
+        stats["frames"] += 1
+        if index % step:
+            continue
+        ok, frame = capture.retrieve()
+        if not ok:
+            break
+        stats["samples"] += 1
+        seconds = index / fps
+        if on_position and frame_count:
+            on_position(min(1.0, index / frame_count))
+        small = thumbnail(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+        last_sample = (frame, seconds)
+        # Frame differencing: a moving board (or a moving camera) is not read
+        moving = previous is None or previous.shape != small.shape or (
+            cv2.absdiff(previous, small).mean() > VIDEO_MOTION_THRESHOLD
+        )
+        previous = small
+        still = 0 if moving else still + 1
+        if still < STABLE_SAMPLES:
+            stats["moving"] += moving
+            continue
+
+        mask = ink_mask(small)
+        if keyframe is None:
+            keyframe = (frame, mask, seconds)
+            continue
+        added, removed = ink_change(keyframe[1], mask)
+        if added + removed < VIDEO_CHANGE_THRESHOLD:
+            stats["duplicates"] += 1
+            continue
+        if removed < VIDEO_ERASE_THRESHOLD or is_blank(keyframe[1]):
+            # More writing on the same board: keep the fuller frame
+            stats["replaced"] += 1
+            keyframe = (frame, mask, seconds)
+            continue
+        yield keyframe[0], keyframe[2]
+        found += 1
+        keyframe = (frame, mask, seconds)
+
+    if keyframe is not None and not is_blank(keyframe[1]):
+        yield keyframe[0], keyframe[2]
+    elif not found and last_sample is not None:
+        # Too short or too shaky to ever settle: the last frame is the best guess
+        yield last_sample
+
+
+def iter_keyframes(path, max_edge=0, sample_fps=VIDEO_SAMPLE_FPS, on_position=None):
+    """(JPEG bytes, seconds into the video) per board state, in time order
+
+    on_position(fraction) is called as the video is read, for progress. Each
+    keyframe's decoding is its own video.keyframe span, closed before the
+    keyframe is handed on, so the consumer's work is not counted in it.
+    """
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError("Could not open video")
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    frame_count = capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0
+    step = max(1, round(fps / sample_fps)) if sample_fps else 1
+    stats = {"frames": 0, "samples": 0, "moving": 0, "duplicates": 0, "replaced": 0}
+    scan = _scan(capture, step, fps, frame_count, on_position, stats)
+    emitted = 0
+    try:
+        while emitted < VIDEO_MAX_KEYFRAMES:
+            with span("video.keyframe", keyframe=emitted + 1, fps=round(fps, 2), step=step) as s:
+                before = dict(stats)
+                found = next(scan, None)
+                if found is not None:
+                    encoded = _encode(found[0], max_edge)
+                    s.bytes_out = len(encoded)
+                s.attrs.update({name: stats[name] - before[name] for name in stats})
+            if found is None:
+                break
+            yield encoded, found[1]
+            emitted += 1
+        logger.info(
+            "Video: %d frames, %d sampled, %d moving, %d duplicate, %d grew; %d keyframe(s)",
+            stats["frames"], stats["samples"], stats["moving"], stats["duplicates"], stats["replaced"], emitted
+        )
+    finally:
+        scan.close()
+        capture.release()
@@ -0,0 +1 @@
+"""Streamlit pages, imported by app.py only when routed to"""
@@ -0,0 +1,67 @@
+"""Per-request stage breakdown, shown under each page when INK2DECK_DEBUG_PANEL=1"""
+import html
+
+import streamlit as st
+
+from ink2deck.tracing import recent_traces
+
+
+def _rows(spans):
+    """Spans as table rows in start order, indented under their parent"""
+    children = {}
+    for record in spans:
+        children.setdefault(record["parent"], []).append(record)
+    known = {record["span"] for record in spans}
+    # Spans whose parent is missing (e.g. evicted) are shown as roots
+    roots = [record for record in spans if record["parent"] is None or record["parent"] not in known]
+
+    rows = []
+
+    def walk(record, depth):
+        rows.append({
+            "stage": (depth, record["name"]),
+            "wall ms": round(record["wall_ms"], 1),
+            "cpu ms": round(record["cpu_ms"], 1),
+            "in KB": round(record["bytes_in"] / 1024, 1) if record["bytes_in"] is not None else None,
+            "out KB": round(record["bytes_out"] / 1024, 1) if record["bytes_out"] is not None else None,
+            "peak MB": round(record["peak_bytes"] / 1024 / 1024, 1) if record["peak_bytes"] is not None else None,
+            "thread": record["thread"],
+            "error": record["error"] or "",
+        })
+        for child in sorted(children.get(record["span"], ()), key=lambda r: r["start"]):
+            walk(child, depth + 1)
+
+    for root in sorted(roots, key=lambda r: r["start"]):
+        walk(root, 0)
+    return rows
+
+
+def _cell(value):
+    """Table cell text; span names and errors may carry user input, so HTML and table syntax are escaped"""
+    if value is None:
+        return ""
+    return html.escape(" ".join(str(value).split())).replace("|", "&#124;")
+
+
+def debug_panel(render_trace_id):
+    traces = [("This render", render_trace_id)]
+    if st.session_state.get("last_ocr_job"):
+        traces.append(("Text extraction job", st.session_state.last_ocr_job))
+    for (kind, _), job_id in st.session_state.get("prepared_artifacts", {}).items():
+        traces.append((f"{kind.upper()} build job", job_id))
+
+    with st.expander("Performance breakdown (debug)"):
+        for label, trace_id in traces:
+            spans = recent_traces.get(trace_id)
+            if not spans:
+                continue
+            st.markdown(f"**{label}** `{trace_id[:12]}`")
+            # A markdown table rather than st.dataframe, which would pull in pyarrow
+            rows = _rows(spans)
+            columns = list(rows[0])
+            lines = ["| " + " | ".join(columns) + " |", "|" + "---|" * len(columns)]
+            for row in rows:
+                depth, name = row["stage"]
+                cells = ["&nbsp;&nbsp;" * depth + _cell(name)] + [_cell(row[c]) for c in columns[1:]]
+                lines.append("| " + " | ".join(cells) + " |")
+            st.markdown("\n".join(lines), unsafe_allow_html=True)
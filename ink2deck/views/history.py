@@ -0,0 +1,70 @@
+"""The signed-in user's earlier conversions, with the decks stored for them"""
+import streamlit as st
+
+from ink2deck.history import delete_entry, history_enabled, history_page, load_deck
+
+DECK_FORMATS = [
+    ("pdf", "PDF", "extracted_content.pdf", "application/pdf"),
+    ("pptx", "PowerPoint", "whiteboard_presentation.pptx",
+     "application/vnd.openxmlformats-officedocument.presentationml.presentation"),
+]
+# Loaded decks kept in the session for their download buttons
+MAX_LOADED_DECKS = 4
+
+
+def _title(names):
+    shown = ", ".join(names[:3])
+    return shown if len(names) <= 3 else f"{shown} and {len(names) - 3} more"
+
+
+def history_section(owner):
+    """One page of history, newest first; nothing when the store is off or the user has no entries"""
+    if not history_enabled():
+        return
+    # Cursors of the pages walked so far; None is the newest page
+    cursors = st.session_state.setdefault("history_cursors", [None])
+    entries, next_cursor = history_page(owner, cursors[-1])
+    if not entries and len(cursors) == 1:
+        return
+
+    st.subheader("Your conversions")
+    loaded = st.session_state.setdefault("history_decks", {})
+    for entry in entries:
+        entry_id = str(entry["_id"])
+        with st.expander(f"{entry['converted_at']:%Y-%m-%d %H:%M} UTC · {_title(entry['names'])}"):
+            st.caption(f"{len(entry['names'])} image(s), {entry['bytes'] / 1024:.0f} KB stored")
+            columns = st.columns(3)
+            for col, (kind, label, file_name, mime) in zip(columns, DECK_FORMATS):
+                deck = entry.get("decks", {}).get(kind)
+                with col:
+                    if deck is None:
+                        st.caption(f"No {label} prepared")
+                        continue
+                    data = loaded.get(deck["key"])
+                    if data is None and st.button(f"Load {label}", key=f"load_{kind}_{entry_id}"):
+                        data = load_deck(deck["key"])
+                        if data is None:
+                            st.warning(f"This {label} has expired")
+                        else:
+                            loaded[deck["key"]] = data
+                            while len(loaded) > MAX_LOADED_DECKS:
+                                loaded.pop(next(iter(loaded)))
+                    if data is not None:
+                        st.download_button(
+                            f"Download {label}", data, file_name=file_name, mime=mime,
+                            key=f"download_{kind}_{entry_id}"
+                        )
+            with columns[2]:
+                if st.button("Delete", key=f"delete_{entry_id}"):
+                    delete_entry(owner, entry_id)
+                    st.rerun()
+
+    col1, _, col3 = st.columns([1, 3, 1])
+    with col1:
+        if len(cursors) > 1 and st.button("Newer"):
+            cursors.pop()
+            st.rerun()
+    with col3:
+        if next_cursor and st.button("Older"):
+            cursors.append(next_cursor)
+            st.rerun()
@@ -0,0 +1,169 @@
+"""Landing page with the hero image and chatbot"""
+from functools import lru_cache
+
+import streamlit as st
+
+from ink2deck.assets import hero_src
+
+# =============================================
+# Home Page (with chatbot)
+# =============================================
+
+@lru_cache(maxsize=None)
+def home_html(img_src):
+    """The landing page markup; only the hero src varies, so it is built once"""
+    return f"""
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/css/all.min.css">
+    <title>Ink2Deck</title>
+    <style>
+        @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@100;200;300;400;500;600&display=swap');
+        *{{
+            padding: 0;
+            margin: 0;
+            font-family: 'Poppins', sans-serif;
+            box-sizing: border-box;
+        }}
+
+        body{{
+            width: 100%;
+            height: 100vh;
+            overflow: hidden;
+            background-color: black;
+        }}
+        nav{{
+            width: 100%;
+            height: 10vh;
+            position: sticky;
+        }}
+        .nav-container{{
+            width: 100%;
+            height: 100%;
+            display: flex;
+            justify-content: space-around;
+            align-items: center;
+        }}
+        .logo{{
+            color: white;
+            font-size: 2rem;
+            font-weight: bold;
+        }}
+        .logo span{{
+            color: #077b32;
+            text-shadow: 0 0 10px #077b32;
+        }}
+        .main-container{{
+            width: 100%;
+            height: 90vh;
+            display: flex;
+            justify-content: space-evenly;
+            align-items: center;
+        }}
+        .main-container .image-container {{
+            width: 500px;
+            height: 500px;
+            border-radius: 50%;
+            overflow: hidden;
+            box-shadow: 0 0 50px #077b32;
+            display: flex;
+            justify-content: center;
+            align-items: center;
+        }}
+        .main-container .image-container img{{
+            width: 100%;
+            height: 100%;
+            object-fit: cover;
+        }}
+        .main-container .content{{
+            color: white;
+            width: 40%;
+        }}
+        .content h1{{
+            font-size: clamp(1rem, 1rem + 5vw, 1.8rem);
+        }}
+        .content h1 span{{
+            color: #077b32;
+            text-shadow: 0  0 10px #077b32;
+        }}
+        .content .deck-maker{{
+            font-size: clamp(1rem, 1rem + 5vw, 2.5rem);
+            font-weight: 600;
+        }}
+        .content .deck-maker span{{
+            color: #077b32;
+            text-shadow: 0 0 10px #077b32;
+        }}
+        .content p{{
+            font-size: clamp(0.4rem , 0.2rem + 9vw, 1rem);
+            margin: 10px 0 30px 0;
+        }}
+        @media (max-width:884px) {{
+            .main-container {{
+                flex-direction: column;
+            }}
+            .main-container .content{{
+                width: 80%;
+            }}
+            .main-container .image-container{{
+                width: 300px;
+                height: 300px;
+            }}
+        }}
+        @media (max-width:440px){{
+            .main-container .image-container{{
+                width: 250px;
+                height: 250px;
+            }}
+        }}
+    </style>
+</head>
+<body>
+    <nav>
+        <div class="nav-container">
+            <div class="logo">
+                Ink2<span>Deck</span>
+            </div>
+        </div>
+    </nav>
+    <div class="main-container">
+        <div class="image-container">
+            <img src="{img_src}" alt="Ink2Deck">
+        </div>
+        <div class="content">
+            <h1>Hey I'm <span>Ink2Deck</span></h1>
+            <div class="deck-maker">I'm a <span>DECK MAKER</span></div>
+            <p>The Ink2Deck captures whiteboard content and converts handwritten notes, diagrams, and equations into structured slide decks. It generates downloadable PowerPoint or PDF files, ensuring clarity and easy sharing.</p>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+
+def home_page():
+    html_content = home_html(hero_src())
+    st.markdown(html_content, unsafe_allow_html=True)
+    
+    # Add the Streamlit button
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        if st.button("Get Started!", key="get_started"):
+            st.session_state.page = "login"
+            st.rerun()
+    
+    # Add Orimon AI Chatbot (only on home page)
+    st.markdown(
+        """
+        <div class="orimon-chatbot">
+            <div class="orimon-chat-icon" id="chat-icon">
+                <i class="fas fa-comment-dots"></i>
+            </div>
+            <div class="orimon-chat-window" id="chat-window"></div>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
@@ -0,0 +1,134 @@
+"""Login and signup forms"""
+import hashlib
+
+import streamlit as st
+
+from ink2deck.db import create_user, find_login, get_client, user_exists
+
+# =============================================
+# Login/Signup Page
+# =============================================
+
+def login_page():
+    # Custom CSS for the login container
+    st.markdown(
+        """
+        <style>
+            /* Main container styling */
+            .login-box {
+                background-color: #ffffff;
+                border-radius: 10px;
+                padding: 2rem;
+                width: 350px;
+                margin: 2rem auto;
+                box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+            }
+            
+            /* Input field styling */
+            .stTextInput>div>div>input {
+                background-color: #f8f9fa !important;
+                color: #333 !important;
+                border: 1px solid #ced4da !important;
+                width: 100% !important;
+            }
+            
+            /* Button styling */
+            .stButton>button {
+                width: 100% !important;
+                margin: 0.5rem 0 !important;
+                transition: all 0.3s ease !important;
+            }
+            
+            /* Primary button */
+            div[data-testid="stButton"]:has(button[kind="primary"]) button {
+                background-color: #077b32 !important;
+                color: white !important;
+                border: none !important;
+            }
+            
+            /* Secondary button */
+            div[data-testid="stButton"]:has(button[kind="secondary"]) button {
+                background-color: transparent !important;
+                color: #077b32 !important;
+                border: 1px solid #077b32 !important;
+            }
+            
+            /* Tab styling */
+            [data-baseweb="tab-list"] {
+                gap: 0.5rem !important;
+            }
+            
+            button[data-baseweb="tab"] {
+                background-color: #f8f9fa !important;
+                color: #333 !important;
+                border-radius: 4px !important;
+                padding: 0.5rem 1rem !important;
+                flex: 1 !important;
+            }
+            
+            button[data-baseweb="tab"][aria-selected="true"] {
+                background-color: #077b32 !important;
+                color: white !important;
+            }
+        </style>
+        """,
+        unsafe_allow_html=True
+    )
+
+    # Shared MongoDB client, created once per process
+    try:
+        get_client()
+    except Exception as e:
+        st.error(f"Database connection failed: {str(e)}")
+        return
+
+    # Create the white box container
+    with st.container():
+        st.markdown('<div class="login-box">', unsafe_allow_html=True)
+        
+        # Create tabs for Login and Sign Up
+        tab1, tab2 = st.tabs(["Login", "Sign Up"])
+        
+        with tab1:
+            with st.form("login_form"):
+                st.header("Login")
+                username = st.text_input("Username", placeholder="Enter your username")
+                password = st.text_input("Password", type="password", placeholder="••••••••")
+                
+                if st.form_submit_button("Login", type="primary"):
+                    user = find_login(username)
+                    if user and user["password"] == hashlib.sha256(password.encode()).hexdigest():
+                        st.session_state.logged_in = True
+                        st.session_state.username = username
+                        st.session_state.page = "upload"
+                        st.rerun()
+                    else:
+                        st.error("Invalid username or password")
+        
+        with tab2:
+            with st.form("signup_form"):
+                st.header("Create Account")
+                name = st.text_input("Full Name", placeholder="Your full name")
+                email = st.text_input("Email", placeholder="your@email.com")
+                username = st.text_input("Username", placeholder="Choose a username")
+                password = st.text_input("Password", type="password", placeholder="••••••••")
+                terms = st.checkbox("I agree to the Terms and Conditions")
+                
+                if st.form_submit_button("Create Account", type="primary"):
+                    if not terms:
+                        st.error("Please accept the Terms and Conditions")
+                    elif not all([name, email, username, password]):
+                        st.error("Please fill all fields")
+                    elif user_exists(username, email):
+                        st.error("Username or email already exists")
+                    elif create_user(name, email, username, hashlib.sha256(password.encode()).hexdigest()):
+                        st.success("Account created! Please login.")
+                    else:
+                        # Lost a race with a concurrent signup; the unique index caught it
+                        st.error("Username or email already exists")
+        
+        if st.button("Back to Home", type="secondary"):
+            st.session_state.page = "home"
+            st.rerun()
+        
+        st.markdown('</div>', unsafe_allow_html=True)
@@ -0,0 +1,242 @@
+"""Upload page: background OCR, extracted text and deck downloads"""
+import time
+
+import streamlit as st
+
+from ink2deck.cache import cache_key, get_ocr_cache
+from ink2deck.engines import engine_stats
+from ink2deck.gemini import gemini_upload_stats
+from ink2deck.gemini_client import get_gemini_client
+from ink2deck.jobs import DONE, FAILED, get_job_queue
+
+# Seconds between reruns while a background job is still running
+JOB_POLL_INTERVAL = 0.5
+# How long a rerun waits inline for a deck rebuild after a text edit before polling instead
+REBUILD_WAIT = 1.0
+
+# =============================================
+# Upload/Processing Page
+# =============================================
+
+def upload_page():
+    st.title("Upload Whiteboard Images")
+    st.write(f"Welcome, {st.session_state.username}!")
+    
+    if not st.session_state.get("logged_in", False):
+        st.warning("Please login first")
+        st.session_state.page = "login"
+        st.rerun()
+        return
+    
+    # File uploader
+    uploaded_files = st.file_uploader(
+        "Choose images (JPG, PNG), PDFs or videos of the board (MP4, MOV, WebM)",
+        type=["png", "jpg", "jpeg", "pdf", "mp4", "mov", "m4v", "webm", "avi", "mkv"], accept_multiple_files=True
+    )
+    
+    if uploaded_files:
+        try:
+            # OCR modules pull in OpenCV/Tesseract, so load them once there is work
+            from ink2deck.ocr import ocr_cache_key
+            
+            images_bytes = [f.getvalue() for f in uploaded_files]
+            ocr_cache = get_ocr_cache()
+            batch_key = cache_key(*[ocr_cache_key(b) for b in images_bytes])
+            
+            # OCR runs as a background job and the page just polls it, so reruns
+            # (downloads, logout, text edits) never restart or block on the work
+            jobs = get_job_queue()
+            ocr_results = st.session_state.setdefault("ocr_results", {})
+            if batch_key not in ocr_results:
+                ocr_jobs = st.session_state.setdefault("ocr_jobs", {})
+                if batch_key not in ocr_jobs:
+                    ocr_jobs[batch_key] = jobs.submit(
+                        "ocr",
+                        # Content only: the job is shared by everyone who uploads these boards
+                        {"images": images_bytes},
+                        key=batch_key,
+                        owner=st.session_state.username
+                    )
+                    # Job IDs are trace IDs; the debug panel shows this job's stages
+                    st.session_state.last_ocr_job = ocr_jobs[batch_key]
+                job = jobs.get(ocr_jobs[batch_key])
+                if job is None or job.status == FAILED:
+                    del ocr_jobs[batch_key]
+                    raise RuntimeError(f"text extraction failed: {job.error if job else 'job was lost'}")
+                if not job.finished:
+                    st.progress(job.progress, text=job.message or f"Extracting text from {len(images_bytes)} file(s)...")
+                    time.sleep(JOB_POLL_INTERVAL)
+                    st.rerun()
+                ocr_results[batch_key] = job.result
+                del ocr_jobs[batch_key]
+            # PDFs come back as one rendered image per page, videos as one per keyframe,
+            # named here after this session's own files
+            result = ocr_results[batch_key]
+            extracted_texts = result["texts"]
+            page_images = result["images"]
+            file_names = [f.name for f in uploaded_files]
+            page_names = [file_names[upload] + suffix for upload, suffix in result["sources"]]
+            unreadable = [file_names[upload] for upload in result["unreadable"]]
+            if unreadable:
+                st.warning(f"Could not read {len(unreadable)} file(s), skipped: {', '.join(unreadable)}")
+            
+            # Recorded once per session, so every user uploading these boards gets their own entry
+            recorded = st.session_state.setdefault("history_recorded", set())
+            if batch_key not in recorded:
+                from ink2deck.history import record_conversion
+                record_conversion(st.session_state.username, batch_key, page_names, result["keys"], extracted_texts)
+                recorded.add(batch_key)
+            
+            if any(text.strip() for text in extracted_texts):
+                st.success(f"Text extracted from {sum(1 for t in extracted_texts if t.strip())} of {len(extracted_texts)} image(s)!")
+                skipped = [file_names[upload] for upload in result["skipped"] if upload not in result["unreadable"]]
+                if skipped:
+                    st.caption(
+                        f"Skipped {len(skipped)} photo(s) of a board another photo shows as fully: {', '.join(skipped)}"
+                    )
+                
+                # One collapsible section per image or PDF page, in upload order
+                for index, (page_name, extracted_text) in enumerate(zip(page_names, extracted_texts)):
+                    with st.expander(f"{index + 1}. {page_name}", expanded=len(page_names) == 1):
+                        # Create two columns for image and text
+                        col1, col2 = st.columns(2)
+                        
+                        with col1:
+                            st.image(page_images[index], caption="Uploaded Image", use_container_width=True)
+                        
+                        with col2:
+                            # Edits feed the decks; keyed by batch so a new upload starts from its own text
+                            st.text_area(
+                                "Extracted Text", extracted_text, height=400, key=f"text_{batch_key[:16]}_{index}"
+                            )
+                            if not extracted_text.strip():
+                                st.warning("No text detected in this image.")
+                
+                stats = ocr_cache.stats()
+                st.caption(
+                    f"OCR cache: {stats['hits']} hits "
+                    f"({stats['memory_hits']} memory / {stats['disk_hits']} disk), "
+                    f"{stats['misses']} misses"
+                )
+                uploads = gemini_upload_stats.snapshot()
+                if uploads["requests"]:
+                    st.caption(
+                        f"Gemini uploads: {uploads['requests']} requests, "
+                        f"{uploads['bytes_sent'] / 1024:.0f} KB sent "
+                        f"(avg {uploads['avg_bytes'] / 1024:.0f} KB)"
+                    )
+                client = get_gemini_client().snapshot()
+                if client["throttled"] or client["rejected"] or client["breaker"] != "closed":
+                    st.caption(
+                        f"Gemini API: {client['throttled']} throttled, {client['retries']} retries, "
+                        f"{client['rejected']} skipped while unhealthy (circuit {client['breaker']})"
+                    )
+                engines = engine_stats.snapshot()
+                if engines["wins"]:
+                    st.caption("OCR engines: " + ", ".join(
+                        f"{engine} won {wins} (p50 {engines['latency'][engine]['p50_ms']:.0f} ms, "
+                        f"p99 {engines['latency'][engine]['p99_ms']:.0f} ms)"
+                        for engine, wins in engines["wins"].items()
+                    ))
+                
+                # Download and navigation buttons
+                st.write("---")  # Add a divider
+                
+                # Center-align the buttons
+                col1, col2, col3, col4, col5 = st.columns([1,2,2,2,1])
+                
+                with col2:
+                    logout_button = st.button("Logout")
+                    if logout_button:
+                        st.session_state.logged_in = False
+                        st.session_state.page = "login"
+                        st.rerun()
+                
+                # Decks are only built once the user asks for them, as background jobs;
+                # finished jobs (and the memoized bytes behind them) serve every rerun.
+                # Once a format is prepared, editing the text rebuilds it from the edited
+                # text (the PPTX incrementally, see LiveDeck) without another click.
+                texts = [
+                    st.session_state.get(f"text_{batch_key[:16]}_{index}", text)
+                    for index, text in enumerate(extracted_texts)
+                ]
+                sections = list(zip(texts, page_images))
+                prepared = st.session_state.setdefault("prepared_artifacts", {})
+                building = False
+                
+                for col, kind, label, payload, file_name, mime in [
+                    (col3, "pdf", "PDF", {"sections": sections},
+                     "extracted_content.pdf", "application/pdf"),
+                    (col4, "pptx", "PowerPoint", {"sections": sections},
+                     "whiteboard_presentation.pptx",
+                     "application/vnd.openxmlformats-officedocument.presentationml.presentation"),
+                ]:
+                    with col:
+                        job_id = prepared.get((kind, batch_key))
+                        content_key = cache_key(kind, batch_key, *texts)
+                        previous = jobs.get(job_id) if job_id is not None else None
+                        stale = previous is not None and previous.key != content_key
+                        if stale or (job_id is None and st.button(f"Prepare {label}")):
+                            job_id = prepared[(kind, batch_key)] = jobs.submit(
+                                kind, payload, key=content_key, owner=st.session_state.username
+                            )
+                            # Rebuilds after an edit are usually quick; skip the poll rerun if so
+                            jobs.wait(job_id, timeout=REBUILD_WAIT)
+                        if job_id is None:
+                            continue
+                        job = jobs.get(job_id)
+                        if job is not None and job.status == DONE:
+                            if job_id not in recorded:
+                                from ink2deck.decks import deck_key
+                                from ink2deck.history import record_deck
+                                record_deck(
+                                    st.session_state.username, batch_key, kind,
+                                    deck_key(kind, sections), len(job.result)
+                                )
+                                recorded.add(job_id)
+                            st.download_button(
+                                label=f"Download {label}",
+                                data=job.result,
+                                file_name=file_name,
+                                mime=mime
+                            )
+                            st.caption(f"{len(job.result) / 1024:.0f} KB")
+                        elif job is None or job.status == FAILED:
+                            del prepared[(kind, batch_key)]
+                            st.error(f"Building the {label} failed: {job.error if job else 'job was lost'}")
+                        else:
+                            st.caption(f"Building {label}...")
+                            building = True
+                
+                # Centered Back to Home button
+                st.write("---")
+                col1, col2, col3 = st.columns([3,2,3])
+                with col2:
+                    if st.button("Back to Home"):
+                        st.session_state.page = "home"
+                        st.rerun()
+                
+                if building:
+                    time.sleep(JOB_POLL_INTERVAL)
+                    st.rerun()
+            else:
+                st.error("No text detected. Please try clearer images.")
+                
+        except Exception as e:
+            st.error(f"An error occurred: {str(e)}")
+    else:
+        # Earlier conversions, when MongoDB keeps them; pymongo is only loaded here
+        from ink2deck.views.history import history_section
+        history_section(st.session_state.username)
+        
+        # Add back and logout buttons when no file is uploaded
+        col1, col2, col3 = st.columns([3,2,3])
+        with col1:
+            if st.button("Logout"):
+                st.session_state.logged_in = False
+                st.session_state.page = "login"
+                st.rerun()
+        with col3:
+            if st.button("Back to Home"):
+                st.session_state.page = "home"
+                st.rerun()
@@ -0,0 +1,34 @@
+import os
+
+from ink2deck import cache
+
+
+def test_disk_store_stays_within_its_budget(tmp_path):
+    store = cache.ResultCache("test", max_items=1, disk_dir=str(tmp_path), max_disk_bytes=10_000)
+    for index in range(30):
+        store.put(f"{index:064x}", os.urandom(500))
+    sizes = [size for _, size, _ in store._disk_entries()]
+    assert sum(sizes) <= 10_000
+    assert store.stats()["evictions"] > 0
+    # The newest entries are the ones kept
+    store.clear()
+    assert store.get(f"{29:064x}") is not None
+    assert store.get(f"{0:064x}") is None
+
+
+def test_evictions_are_batched(tmp_path, monkeypatch):
+    store = cache.ResultCache("test", max_items=1, disk_dir=str(tmp_path), max_disk_bytes=20_000)
+    scans = []
+    evict = store._evict_disk
+
+    def counted():
+        evict()
+        scans.append(store._disk_bytes)
+
+    monkeypatch.setattr(store, "_evict_disk", counted)
+    for index in range(200):
+        store.put(f"{index:064x}", os.urandom(500))
+    assert scans
+    assert all(size <= 20_000 * cache.DISK_LOW_WATER for size in scans)
+    # Each scan frees about a tenth of the budget, so several writes fit before the next
+    assert len(scans) < 200 // 3
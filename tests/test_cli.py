@@ -0,0 +1,64 @@
+"""ink2deck command line: output names, conflicts and resuming"""
+from pathlib import Path
+
+import pytest
+
+from ink2deck import cli, pipeline
+
+
+def _touch(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"\xff\xd8\xff")
+    return path
+
+
+def test_inputs_mirror_the_glob_base(tmp_path):
+    _touch(tmp_path / "archive" / "2023" / "x.jpg")
+    _touch(tmp_path / "archive" / "2024" / "x.jpg")
+    _touch(tmp_path / "archive" / "notes.pdf")
+    inputs, conflicts = cli.find_inputs([str(tmp_path / "archive" / "**" / "*.*")])
+    assert conflicts == []
+    assert sorted(str(stem) for _, stem in inputs) == ["2023/x", "2024/x", "notes.pdf"]
+
+
+def test_conflicting_inputs_are_left_out(tmp_path):
+    jpg, png = _touch(tmp_path / "x.jpg"), _touch(tmp_path / "x.png")
+    a, b = _touch(tmp_path / "a" / "y.jpg"), _touch(tmp_path / "b" / "y.jpg")
+    keep = _touch(tmp_path / "z.jpg")
+    inputs, conflicts = cli.find_inputs([str(jpg), str(png), str(a), str(b), str(keep)])
+    assert inputs == [(keep, Path("z"))]
+    assert sorted((str(stem), sorted(paths)) for stem, paths in conflicts) == [
+        ("x", [jpg, png]), ("y", [a, b]),
+    ]
+
+
+@pytest.fixture
+def no_text(monkeypatch):
+    calls = []
+
+    def convert(images_bytes, formats, model=None, memoize=True):
+        calls.append(len(images_bytes))
+        return pipeline.Conversion(texts=[""])
+
+    monkeypatch.setattr(pipeline, "convert", convert)
+    monkeypatch.setattr("ink2deck.gemini.get_model", lambda: None)
+    return calls
+
+
+def test_conflicts_do_not_stop_the_run(tmp_path, no_text):
+    _touch(tmp_path / "in" / "x.jpg")
+    _touch(tmp_path / "in" / "x.png")
+    _touch(tmp_path / "in" / "z.jpg")
+    assert cli.main([str(tmp_path / "in"), "-o", str(tmp_path / "out"), "--no-gemini", "-w", "1"]) == 1
+    assert no_text == [1]
+
+
+def test_inputs_without_text_are_not_converted_again(tmp_path, no_text):
+    _touch(tmp_path / "in" / "blank.jpg")
+    args = [str(tmp_path / "in"), "-o", str(tmp_path / "out"), "--no-gemini", "-w", "1"]
+    assert cli.main(args) == 0
+    assert (tmp_path / "out" / "blank.empty").exists()
+    assert cli.main(args) == 0
+    assert no_text == [1]
+    assert cli.main(args + ["--force"]) == 0
+    assert no_text == [1, 1]
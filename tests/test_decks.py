@@ -0,0 +1,29 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from ink2deck import cache, decks, history
+
+
+@pytest.fixture
+def artifacts(monkeypatch):
+    monkeypatch.setattr(history, "HISTORY_ENABLED", False)
+    monkeypatch.setitem(cache._caches, "artifacts", cache.ResultCache("artifacts", max_items=32))
+    return decks._artifact_cache()
+
+
+def test_small_decks_are_cached(artifacts):
+    data = decks.get_pdf_bytes(["Agenda"])
+    assert artifacts.get(decks.deck_key("pdf", ["Agenda"])) == data
+
+
+def test_decks_over_the_spool_limit_are_not_cached(artifacts, monkeypatch):
+    monkeypatch.setattr(decks, "SPOOL_MAX_BYTES", 100)
+    stream = BytesIO()
+    Image.new("RGB", (64, 48), "white").save(stream, format="PNG")
+    sections = [("Agenda", stream.getvalue())]
+    data = decks.get_pptx_bytes(sections)
+    assert len(data) > 100
+    assert artifacts.get(decks.deck_key("pptx", sections)) is None
+    assert artifacts.stats()["memory_items"] == 0
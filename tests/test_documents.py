@@ -0,0 +1,38 @@
+"""Pages: burst photos and uploads that cannot be read"""
+from io import BytesIO
+
+import pytest
+from PIL import Image, ImageDraw
+
+from ink2deck.documents import Pages
+
+
+def _board(lines):
+    image = Image.new("L", (640, 480), 255)
+    draw = ImageDraw.Draw(image)
+    for y in lines:
+        draw.rectangle((60, y, 580, y + 12), fill=0)
+    stream = BytesIO()
+    image.save(stream, format="PNG")
+    return stream.getvalue()
+
+
+@pytest.mark.parametrize("broken", [_board([100])[:500], b"\x89PNG garbage"], ids=["truncated", "not an image"])
+def test_unreadable_photo_is_skipped(broken):
+    good = _board([100, 200])
+    pages = Pages([broken, good], ["broken.png", "good.png"])
+    assert list(pages) == [good]
+    assert pages.names == ["good.png"]
+    assert pages.skipped == ["broken.png"]
+    assert pages.unreadable_uploads == [0]
+
+
+def test_burst_keeps_fullest_photo_per_board():
+    first = _board([100])
+    fuller = _board([100, 200])
+    other = _board([300, 400])
+    pages = Pages([first, fuller, fuller, other], ["a", "b", "c", "d"])
+    assert list(pages) == [fuller, other]
+    assert pages.names == ["b", "d"]
+    assert sorted(pages.skipped) == ["a", "c"]
+    assert pages.unreadable_uploads == []
@@ -0,0 +1,45 @@
+import threading
+
+from ink2deck.engines import Engine, EnginePolicy, run_engines
+
+
+def _slow(text, seconds=0.05):
+    def run(cancel):
+        cancel.wait(seconds)
+        return text
+    return run
+
+
+def _broken(cancel):
+    raise RuntimeError("engine crashed")
+
+
+def test_engines_without_deadlines_are_waited_for():
+    result = run_engines([Engine("tesseract", _slow("board"))], EnginePolicy(deadlines={}))
+    assert result.text == "board"
+    assert result.attempts == {"tesseract": "won"}
+
+
+def test_errors_are_recorded_apart_from_empty_answers():
+    engines = [Engine("gemini", _broken), Engine("blank", lambda cancel: " "), Engine("tesseract", _slow("board"))]
+    result = run_engines(engines, EnginePolicy(deadlines={}))
+    assert result.engine == "tesseract"
+    assert result.attempts == {"gemini": "error", "blank": "empty", "tesseract": "won"}
+
+
+def test_missed_deadline_starts_the_next_engine():
+    release = threading.Event()
+    engines = [Engine("gemini", lambda cancel: release.wait(5) and "late"), Engine("tesseract", _slow("board"))]
+    try:
+        result = run_engines(engines, EnginePolicy(deadlines={"gemini": 0.05}))
+    finally:
+        release.set()
+    assert result.text == "board"
+    assert result.attempts["gemini"] == "timeout"
+
+
+def test_race_takes_the_first_answer():
+    engines = [Engine("gemini", _slow("slow", 1.0)), Engine("tesseract", _slow("fast", 0.0))]
+    result = run_engines(engines, EnginePolicy(mode="race", deadlines={}))
+    assert result.text == "fast"
+    assert result.attempts == {"tesseract": "won", "gemini": "cancelled"}
@@ -0,0 +1,177 @@
+"""GeminiClient limits: token bucket, circuit breaker, and retries against the local stub"""
+import threading
+import time
+
+import pytest
+
+from ink2deck.gemini_client import CallCancelled, CircuitBreaker, CircuitOpenError, GeminiClient, TokenBucket
+from ink2deck.gemini_stub import StubConfig, start_stub
+
+
+class Flaky(StubConfig):
+    """Answers the first failures requests with 429 (throttled) or 503, then succeeds"""
+
+    def __init__(self):
+        super().__init__(latency=0.0, jitter=0.0)
+        self.reset()
+
+    def reset(self, failures=0, throttled=False):
+        self.failures, self.throttled = failures, throttled
+        self.requests, self.responses = 0, {}
+
+    def _failing(self):
+        return self.requests < self.failures
+
+    # The stub reads these on every request; StubConfig.__init__ sets them, which is ignored
+    throttle_rate = property(lambda self: 1.0 if self._failing() and self.throttled else 0.0,
+                             lambda self, value: None)
+    error_rate = property(lambda self: 1.0 if self._failing() and not self.throttled else 0.0,
+                          lambda self, value: None)
+
+
+@pytest.fixture(scope="module")
+def stub():
+    pytest.importorskip("google.generativeai")
+    from ink2deck.gemini import _build_model
+
+    config = Flaky()
+    server, endpoint = start_stub(config)
+    # genai.configure is process-wide, so the whole module shares one stub and model
+    yield config, _build_model("stub", "gemini-1.5-flash", endpoint)
+    server.shutdown()
+
+
+@pytest.fixture
+def flaky(stub):
+    config, model = stub
+    config.reset()
+    return config, model
+
+
+def _client(**options):
+    options = dict({"rate": 0, "max_retries": 3, "backoff_base": 0.001, "backoff_max": 0.002}, **options)
+    return GeminiClient(**options)
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_throttled_requests_are_retried(flaky):
+    config, model = flaky
+    config.reset(failures=2, throttled=True)
+    client = _client()
+    assert client.generate(model, ["board"]).text == config.text
+    assert config.responses == {429: 2, 200: 1}
+    stats = client.stats.snapshot()
+    assert (stats["calls"], stats["ok"], stats["retries"], stats["throttled"], stats["failed"]) == (3, 1, 2, 2, 0)
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_server_errors_give_up_after_max_retries(flaky):
+    config, model = flaky
+    config.reset(failures=100)
+    client = _client(max_retries=2)
+    with pytest.raises(Exception) as error:
+        client.generate(model, ["board"], timeout=10)
+    assert error.value.code == 503
+    # One request per attempt: the API library's own retries stay off
+    assert config.responses == {503: 3}
+    assert client.stats.snapshot()["failed"] == 1
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_open_breaker_rejects_without_calling_the_api(flaky):
+    config, model = flaky
+    config.reset(failures=100)
+    client = _client(max_retries=0, breaker=CircuitBreaker(failure_threshold=2, reset_after=60))
+    for _ in range(2):
+        with pytest.raises(Exception):
+            client.generate(model, ["board"])
+    assert client.breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        client.generate(model, ["board"])
+    assert config.requests == 2
+    assert client.snapshot()["rejected"] == 1
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_half_open_probe_closes_or_reopens_the_breaker(flaky):
+    config, model = flaky
+    config.reset(failures=2)
+    breaker = CircuitBreaker(failure_threshold=1, reset_after=0.05)
+    client = _client(max_retries=0, breaker=breaker)
+    with pytest.raises(Exception):
+        client.generate(model, ["board"])
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # The probe fails, so the breaker opens again
+    with pytest.raises(Exception):
+        client.generate(model, ["board"])
+    assert breaker.state == CircuitBreaker.OPEN
+    time.sleep(0.06)
+    assert client.generate(model, ["board"]).text == config.text
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_after=0.0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert not breaker.allow()
+    # A cancelled probe frees the slot without a verdict
+    breaker.release()
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_bad_requests_do_not_count_against_the_breaker():
+    class BadRequest(Exception):
+        code = 400
+
+    class Model:
+        def generate_content(self, contents, request_options=None):
+            raise BadRequest("invalid image")
+
+    client = _client(breaker=CircuitBreaker(failure_threshold=1, reset_after=60))
+    with pytest.raises(BadRequest):
+        client.generate(Model(), ["board"])
+    assert client.breaker.state == CircuitBreaker.CLOSED
+    assert client.stats.snapshot()["retries"] == 0
+
+
+def test_backoff_is_jittered_and_capped():
+    client = _client(backoff_base=0.5, backoff_max=2.0)
+    for attempt, cap in [(0, 0.5), (1, 1.0), (2, 2.0), (6, 2.0)]:
+        delays = [client.backoff(attempt) for _ in range(200)]
+        assert all(0 <= delay <= cap for delay in delays)
+        assert len(set(delays)) > 1
+
+
+def test_token_bucket_allows_a_burst_then_paces():
+    bucket = TokenBucket(rate=20, burst=3)
+    start = time.monotonic()
+    for _ in range(3):
+        assert bucket.acquire()
+    assert time.monotonic() - start < 0.04
+    assert bucket.acquire()
+    assert time.monotonic() - start >= 0.04
+
+
+def test_token_bucket_gives_up_at_the_deadline_or_on_cancel():
+    bucket = TokenBucket(rate=1, burst=1)
+    assert bucket.acquire()
+    assert not bucket.acquire(deadline=time.monotonic() + 0.1)
+    cancel = threading.Event()
+    threading.Timer(0.05, cancel.set).start()
+    start = time.monotonic()
+    assert not bucket.acquire(cancel=cancel)
+    assert time.monotonic() - start < 0.5
+    assert TokenBucket(rate=0, burst=1).acquire()
+
+
+def test_no_token_before_the_deadline_cancels_the_call():
+    client = _client(rate=1, burst=1)
+    client.limiter.acquire()
+    with pytest.raises(CallCancelled):
+        client.generate(object(), ["board"], timeout=0.1)
+    assert client.breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,122 @@
+"""Conversion history on mongomock (INK2DECK_MONGO_MOCK=1)"""
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("mongomock")
+
+from ink2deck import db, history  # noqa: E402
+
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setenv("INK2DECK_MONGO_MOCK", "1")
+    monkeypatch.setattr(db, "_client", None)
+    monkeypatch.setattr(history, "_down_until", 0.0)
+    yield db.get_db()
+    db._client = None
+
+
+def _deck_files(store):
+    return sorted(doc["filename"] for doc in store[f"{history.DECKS_BUCKET}.files"].find())
+
+
+def test_rebuilt_deck_replaces_the_previous_one(store):
+    history.record_conversion("alice", "batch", ["a.jpg"], ["k1"], ["text"])
+    history.save_deck("deck-1", "pdf", b"first")
+    history.record_deck("alice", "batch", "pdf", "deck-1", 5)
+    history.save_deck("deck-2", "pdf", b"second")
+    history.record_deck("alice", "batch", "pdf", "deck-2", 6)
+    assert _deck_files(store) == ["deck-2"]
+    assert history.load_deck("deck-2") == b"second"
+
+
+def test_replaced_deck_stays_while_another_entry_points_at_it(store):
+    for owner in ("alice", "bob"):
+        history.record_conversion(owner, "batch", ["a.jpg"], ["k1"], ["text"])
+        history.record_deck(owner, "batch", "pdf", "deck-1", 5)
+    history.save_deck("deck-1", "pdf", b"first")
+    history.save_deck("deck-2", "pdf", b"second")
+    history.record_deck("alice", "batch", "pdf", "deck-2", 6)
+    assert _deck_files(store) == ["deck-1", "deck-2"]
+
+
+def _record(owner, count, text="text"):
+    for index in range(count):
+        history.record_conversion(owner, f"batch-{index}", [f"{index}.jpg"], [f"k{index}"], [text])
+
+
+def _batches(owner):
+    entries, _ = history.history_page(owner, limit=100)
+    return [entry["batch_key"] for entry in entries]
+
+
+def test_entry_cap_drops_the_oldest_and_their_decks(store, monkeypatch):
+    monkeypatch.setattr(history, "HISTORY_MAX_ENTRIES", 3)
+    _record("alice", 2)
+    history.save_deck("deck-0", "pdf", b"old")
+    history.record_deck("alice", "batch-0", "pdf", "deck-0", 3)
+    _record("bob", 1)
+    for index in range(2, 5):
+        history.record_conversion("alice", f"batch-{index}", [], [], ["text"])
+    assert _batches("alice") == ["batch-4", "batch-3", "batch-2"]
+    assert _batches("bob") == ["batch-0"]
+    assert _deck_files(store) == []
+
+
+def test_size_quota_counts_text_and_decks_but_keeps_the_newest(store, monkeypatch):
+    monkeypatch.setattr(history, "HISTORY_QUOTA_BYTES", 20)
+    _record("alice", 2, text="x" * 8)
+    assert _batches("alice") == ["batch-1", "batch-0"]
+    history.record_deck("alice", "batch-1", "pptx", "deck-1", 10)
+    assert _batches("alice") == ["batch-1"]
+    history.record_deck("alice", "batch-1", "pdf", "deck-2", 50)
+    assert _batches("alice") == ["batch-1"]
+
+
+def test_writes_set_and_reads_extend_expiry(store, monkeypatch):
+    # mongomock enforces the TTL indexes, so stay clear of the real clock
+    start = datetime(2100, 1, 1)
+    monkeypatch.setattr(history, "_now", lambda: start)
+    history.save_text("k1", "text")
+    history.save_deck("deck-1", "pdf", b"deck")
+    history.record_conversion("alice", "batch", ["a.jpg"], ["k1"], ["text"])
+    expires = start + history.HISTORY_TTL
+    assert store["conversions"].find_one({"_id": "k1"})["expires_at"] == expires
+    assert store[f"{history.DECKS_BUCKET}.files"].find_one()["metadata"]["expires_at"] == expires
+    assert store["conversion_history"].find_one()["expires_at"] == expires
+
+    later = start + timedelta(days=3)
+    monkeypatch.setattr(history, "_now", lambda: later)
+    assert history.find_text("k1") == "text"
+    assert history.load_deck("deck-1") == b"deck"
+    history.record_deck("alice", "batch", "pdf", "deck-1", 4)
+    assert store["conversions"].find_one({"_id": "k1"})["expires_at"] == later + history.HISTORY_TTL
+    assert store[f"{history.DECKS_BUCKET}.files"].find_one()["metadata"]["expires_at"] == later + history.HISTORY_TTL
+    assert store["conversion_history"].find_one()["expires_at"] == later + history.HISTORY_TTL
+
+
+def test_ttl_indexes(store):
+    for collection in ("conversions", "conversion_history"):
+        index = store[collection].index_information()["expires_at_ttl"]
+        assert index["expireAfterSeconds"] == 0
+
+
+def test_cursor_pages_walk_newest_first_without_gaps(store, monkeypatch):
+    # Several entries share a timestamp, so the _id tie-break is exercised
+    stamps = iter([datetime(2100, 1, 1, 12, 0, index // 2) for index in range(7)]
+                  + [datetime(2100, 1, 1, 13, 0, index) for index in range(3)])
+    monkeypatch.setattr(history, "_now", lambda: next(stamps))
+    _record("alice", 7)
+    pages, cursor = [], None
+    while True:
+        entries, cursor = history.history_page("alice", cursor, limit=3)
+        pages.append([entry["batch_key"] for entry in entries])
+        if cursor is None:
+            break
+        # Entries added while paging land on the first page, not in the middle
+        history.record_conversion("alice", f"new-{len(pages)}", [], [], [""])
+    assert pages == [
+        ["batch-6", "batch-5", "batch-4"], ["batch-3", "batch-2", "batch-1"], ["batch-0"],
+    ]
+    assert all("conversion_ids" not in entry for entry in entries)
@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+from ink2deck import jobs
+
+
+@jobs.register("echo")
+def echo_job(payload, report):
+    return payload["data"]
+
+
+@pytest.fixture
+def make_queue():
+    queues = []
+
+    def make(**options):
+        queue = jobs.JobQueue(max_workers=1, **options)
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue.shutdown()
+
+
+def _run(queue, data, key=None):
+    job_id = queue.submit("echo", {"data": data}, key=key)
+    return queue.wait(job_id, timeout=5)
+
+
+def test_finished_jobs_drop_their_payload(make_queue, tmp_path):
+    store = jobs.SqliteJobStore(str(tmp_path / "jobs.db"))
+    job = _run(make_queue(store=store), b"deck")
+    assert job.status == jobs.DONE
+    assert job.payload is None
+    assert job.size == 4
+    stored = store.load(job.id)
+    assert stored.payload is None
+    assert stored.result == b"deck"
+
+
+def test_results_over_the_byte_budget_are_forgotten(make_queue):
+    queue = make_queue(max_result_bytes=10)
+    first = _run(queue, b"x" * 6, key="first")
+    second = _run(queue, b"y" * 6, key="second")
+    assert queue.get(first.id) is None
+    assert queue.get(second.id) is second
+    # The key no longer points at the forgotten job, so it runs again
+    assert queue.submit("echo", {"data": b"x"}, key="first") != first.id
+
+
+def test_the_newest_result_is_kept_even_when_too_large(make_queue):
+    queue = make_queue(max_result_bytes=1)
+    job = _run(queue, b"z" * 100)
+    assert queue.get(job.id) is job
+
+
+def test_old_results_are_forgotten(make_queue):
+    queue = make_queue(max_age=60)
+    first = _run(queue, b"a")
+    first.updated_at = time.time() - 120
+    second = _run(queue, b"b")
+    assert queue.get(first.id) is None
+    assert queue.get(second.id) is second
+
+
+def test_count_limit(make_queue):
+    queue = make_queue(history=2)
+    finished = [_run(queue, str(index)) for index in range(4)]
+    assert [queue.get(job.id) for job in finished] == [None, None] + finished[2:]
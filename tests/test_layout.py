@@ -0,0 +1,80 @@
+"""Figure detection: found once per upload, and skipped with INK2DECK_LAYOUT_FIGURES=0"""
+from concurrent.futures import Future
+
+import cv2
+import numpy as np
+import pytest
+
+from ink2deck import cache, layout, ocr
+from ink2deck.layout import Word
+from ink2deck.preprocess import PreprocessedImage
+
+# A word in the text column and one inside the drawn box
+WORDS = [("notes", 90, 60, 80, 200, 40, 1, 1, 1), ("axis", 90, 800, 600, 80, 30, 2, 1, 1)]
+
+
+def _board():
+    image = np.full((900, 1200, 3), 255, np.uint8)
+    for line, text in enumerate(["Lecture notes", "first point here", "second point"]):
+        cv2.putText(image, text, (60, 100 + line * 70), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 0), 3)
+    cv2.rectangle(image, (650, 450), (1100, 820), (0, 0, 0), 6)
+    cv2.line(image, (650, 820), (1100, 450), (0, 0, 0), 6)
+    return cv2.imencode(".png", image)[1].tobytes()
+
+
+class _Pool:
+    def submit_data(self, binary):
+        future = Future()
+        future.set_result(WORDS)
+        return future
+
+
+@pytest.fixture
+def memory_caches(monkeypatch):
+    monkeypatch.setenv("INK2DECK_CACHE_DISK", "0")
+    monkeypatch.setattr(cache, "_caches", {})
+    monkeypatch.setattr(ocr, "get_tesseract_pool", lambda: _Pool())
+    monkeypatch.setattr("ink2deck.history.history_enabled", lambda: False)
+
+
+@pytest.fixture
+def counted(monkeypatch):
+    calls = []
+    find_figures = layout.find_figures
+
+    def counting(binary, *args, **kwargs):
+        calls.append(binary.shape)
+        return find_figures(binary, *args, **kwargs)
+
+    monkeypatch.setattr(layout, "find_figures", counting)
+    return calls
+
+
+def test_figure_words_are_dropped_and_figures_found_once(memory_caches, counted):
+    data = _board()
+    assert ocr.cached_ocr(data) == "notes"
+    figures = layout.page_figures(data)
+    assert len(figures) == 1
+    x, y = figures[0][1]
+    assert 0.5 < x < 1 and 0.5 < y < 1
+    assert len(counted) == 1
+
+
+def test_figures_off_keeps_every_word(monkeypatch, counted):
+    monkeypatch.setattr(layout, "LAYOUT_FIGURES", False)
+    binary = PreprocessedImage.from_bytes(_board()).ocr_input
+    result = layout.analyze(binary, [Word(*word) for word in WORDS])
+    assert "axis" in result.text
+    assert result.figures == []
+    assert counted == []
+
+
+@pytest.mark.parametrize("setting, value", [
+    ("LAYOUT_MIN_CONFIDENCE", 60.0), ("LAYOUT_FIGURES", False), ("FIGURE_MAX_TEXT_SHARE", 0.2),
+    ("FIGURE_MIN_AREA", 0.05), ("FIGURE_MAX_AREA", 0.9), ("FIGURE_LIMIT", 1),
+])
+def test_layout_settings_change_the_ocr_cache_key(monkeypatch, setting, value):
+    data = _board()
+    before = ocr.ocr_cache_key(data, use_gemini=False)
+    monkeypatch.setattr(ocr, setting, value)
+    assert ocr.ocr_cache_key(data, use_gemini=False) != before
@@ -0,0 +1,35 @@
+"""Deck images: when uploads are embedded as they are and when they are re-encoded"""
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from ink2deck.media import prepare_image
+
+
+def _photo(width, height, quality=80):
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 255, (height // 8, width // 8, 3), dtype=np.uint8)
+    stream = BytesIO()
+    Image.fromarray(pixels).resize((width, height), Image.BILINEAR).save(stream, format="JPEG", quality=quality)
+    return stream.getvalue()
+
+
+def test_slightly_oversized_upload_is_kept():
+    data = _photo(1000, 750)
+    assert prepare_image(data, 900, 900) == (data, "JPEG")
+
+
+def test_large_upload_is_downscaled():
+    data = _photo(3200, 2400)
+    encoded, image_format = prepare_image(data, 900, 900)
+    assert image_format == "JPEG"
+    assert len(encoded) < len(data)
+    with Image.open(BytesIO(encoded)) as image:
+        assert max(image.size) == 900
+
+
+def test_reencoding_never_grows_an_upload():
+    data = _photo(1000, 750, quality=40)
+    encoded, _ = prepare_image(data, 1000, 1000, quality=75)
+    assert len(encoded) <= len(data)
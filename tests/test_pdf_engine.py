@@ -0,0 +1,75 @@
+"""fpdf2 internals that pdf_engine relies on
+
+pdf_engine clones parsed fonts into fpdf2's font table and seeds its image
+cache directly (see _attach_font and _attach_image). Neither is public API,
+so these tests pin the shapes it depends on; if one fails after an fpdf2
+upgrade, fix pdf_engine before moving the pin in requirements.txt.
+"""
+import hashlib
+from io import BytesIO
+
+import pypdfium2 as pdfium
+import pytest
+from fpdf import FPDF
+from PIL import Image
+
+from ink2deck import pdf_engine
+
+
+def _png(color=(200, 30, 30)):
+    stream = BytesIO()
+    Image.new("RGB", (64, 48), color).save(stream, format="PNG")
+    return stream.getvalue()
+
+
+def _text(data):
+    pdf = pdfium.PdfDocument(data)
+    try:
+        return "".join(pdf[index].get_textpage().get_text_bounded() for index in range(len(pdf)))
+    finally:
+        pdf.close()
+
+
+@pytest.fixture
+def font():
+    if pdf_engine.unicode_font() is None:
+        pytest.skip("no Unicode TTF available")
+    return pdf_engine.unicode_font()[0]
+
+
+def test_font_table_fields(font):
+    for attribute in ("i", "ttfont", "missing_glyphs", "subset"):
+        assert hasattr(font, attribute), f"fpdf2 fonts no longer have {attribute!r}"
+    pdf = FPDF()
+    assert isinstance(pdf.fonts, dict)
+    assert hasattr(pdf, "str_alias_nb_pages")
+    assert pdf_engine._attach_font(pdf) == pdf_engine.FONT_FAMILY
+    assert pdf.fonts[pdf_engine.FONT_FAMILY.lower()].i == 1
+
+
+def test_image_cache_key_and_fields():
+    data = _png()
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.image(BytesIO(data), x=10, y=10, w=20)
+    images = pdf.image_cache.images
+    name = hashlib.new("md5", data.strip(), usedforsecurity=False).hexdigest()
+    assert name in images, "fpdf2 no longer keys in-memory images by the MD5 of their bytes"
+    info = images[name]
+    assert isinstance(info, dict)
+    for key in ("i", "usages"):
+        assert key in info, f"fpdf2 image info no longer has {key!r}"
+
+
+def test_rebuild_reuses_fonts_and_images(font):
+    image = _png()
+    sections = [("Größe über\n\nÄnderung", image)]
+    pdf_engine._parsed_images.clear()
+    first = pdf_engine.render_pdf(sections)
+    assert len(pdf_engine._parsed_images) == 1
+    second = pdf_engine.render_pdf(sections)
+    for data in (first, second):
+        text = _text(data)
+        assert "Größe über" in text
+        assert "Änderung" in text
+    assert len(second) == pytest.approx(len(first), rel=0.01)